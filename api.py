@@ -6,11 +6,22 @@ Flussi esposti (prefisso /api):
 * POST /validate-order
     Valida un file in base al testo dell’ordine e salva l’esito in-memory.
 
+* POST /validate-batch
+    Valida N file contro lo stesso ordine; esiti in streaming NDJSON.
+
+* POST /jobs · GET /jobs/{job_id} · GET /jobs/{job_id}/events · DELETE /jobs/{job_id}
+    Validazione come job in background: id subito, poi stato e avanzamento
+    (fase, pagine analizzate / totali) anche in streaming SSE; annullabile.
+
 * POST /validation-reports/{validation_id}
     Rende un PDF riassuntivo dell’esito appena validato.
 
 * POST /zendesk-ticket
-    Crea un ticket Zendesk con commento + PDF in allegato per il cliente.
+    Crea un ticket Zendesk con commento + PDF in allegato per il cliente
+    (subito, oppure in background con `background=true` → job id).
+
+* GET  /zendesk-ticket/{job_id}
+    Stato di un ticket inviato in background.
 
 * GET  /health
     Health-check basilare (nessun DB).
@@ -18,10 +29,14 @@ Flussi esposti (prefisso /api):
 Gli esiti di validazione vengono mantenuti in RAM tramite utils.local_store.
 """
 
+import asyncio
+import json
 import os
+import time
+import uuid
 from datetime import datetime
+from typing import Any
 
-import requests  # per catch HTTPError Zendesk
 from fastapi import (
     APIRouter,
     File,
@@ -33,14 +48,27 @@ from fastapi import (
     status,
 )
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, EmailStr
 
 from config import settings
-from models import DocumentSpec, ReportFormat, ValidationResult
-from utils.local_store import get_entry, save_result
+from models import DocumentSpec, JobStatus, ReportFormat, ValidationResult
+from utils.jobs import (
+    TERMINAL_STATUSES,
+    ProgressCallback,
+    cancel_job,
+    get_job,
+    start_job,
+    watch_job,
+)
+from utils.lo_pool import PoolSaturatedError, get_lo_pool
+from utils.local_store import get_entry, has_entry, save_result
 from utils.logging import get_logger
 from utils.metrics import VALIDATION_RESULT
 from utils.order_parser import parse_order
+from utils.tracing import annotate, span, tracing
+from utils.upload import IngestedUpload, detach_upload, ingest_upload
+from utils.zendesk import ZendeskError, enqueue_ticket, get_ticket_job, get_zendesk_client
 
 # Logger per questo modulo
 log = get_logger("document_validator")
@@ -58,118 +86,438 @@ async def root():
 # ------------------------------------------------------------------ #
 # 1) VALIDAZIONE BASATA SUL TESTO DELL’ORDINE
 # ------------------------------------------------------------------ #
+def _spec_from_order(order_text: str) -> tuple[DocumentSpec, dict[str, bool]]:
+    """Parse del testo ordine → (DocumentSpec derivata, servizi)."""
+    parsed = parse_order(order_text)
+    width_cm, height_cm = parsed["final_format_cm"]
+    spec = DocumentSpec(
+        name="Specifica derivata dall’ordine",
+        page_width_cm=width_cm,
+        page_height_cm=height_cm,
+        top_margin_cm=0,
+        bottom_margin_cm=0,
+        left_margin_cm=0,
+        right_margin_cm=0,
+        min_page_count=40,  # soglia demo
+    )
+    return spec, parsed["services"]
+
+
+async def _validate_upload(
+    upload: IngestedUpload,
+    spec: DocumentSpec,
+    services: dict[str, bool],
+    on_progress: ProgressCallback | None = None,
+    *,
+    fail_fast: bool = False,
+    sample: bool = False,
+) -> ValidationResult:
+    """
+    Estrazione → validazione → salvataggio di un file già ingerito.
+    `on_progress` riceve fase e pagine analizzate (job asincroni).
+
+    Con `sample` (o `spec.sampled_analysis`) font, immagini e colore dei
+    documenti lunghi vengono stimati su un campione di pagine; se una regola
+    che legge quelle stime è KO l'analisi viene ripetuta completa.
+
+    Con `fail_fast` si valutano prima le regole che dipendono solo dalla
+    geometria (probe economico): se una è KO l'esito è deciso e l'analisi
+    completa (font, colore, immagini) non parte. Altrimenti si estraggono
+    solo le proprietà lette dalle regole attive per la spec; senza
+    `fail_fast` l'estrazione è completa (serve al report).
+    """
+    # import locali (evita import circolari)
+    from services.extract import probe_document_async, process_document_cached
+    from services.reports import get_report_renderer
+    from services.validation import required_properties, sampled_failures, validate_document
+
+    ext = upload.file_format
+    result_id = str(uuid.uuid4())
+    sample = sample or spec.sampled_analysis
+
+    # traccia con l'id dell'esito: span nei log, istogrammi per fase
+    with tracing(result_id, file_format=ext):
+        with span("read"):
+            source = await upload.source()
+        try:
+            # ─── fail-fast: regole di formato sul solo probe ────────────
+            validation: dict[str, Any] | None = None
+            if fail_fast:
+                with span("probe"):
+                    doc_props = await probe_document_async(source, ext)
+                if doc_props is not None:
+                    validation = validate_document(doc_props, spec, services, fail_fast=True, complete=False)
+                    if all(validation["validations"].values()):
+                        validation = None  # nessun KO: serve l'estrazione completa
+                    else:
+                        log.info("validate_fail_fast_exit", document=upload.filename,
+                                 skipped=len(validation["skipped_rules"]))
+
+            if validation is None:
+                # ─── estrai proprietà (async, non blocca event-loop) ────
+                properties = required_properties(spec, services) if fail_fast else None
+                doc_props = await process_document_cached(
+                    source,
+                    ext,
+                    digest=upload.sha256,
+                    on_progress=on_progress,
+                    properties=properties,
+                    sample=sample,
+                )
+
+                # ─── valida rispetto alla spec ──────────────────────────
+                if on_progress is not None:
+                    on_progress("validate", None, None)
+                with span("validate"):
+                    validation = validate_document(doc_props, spec, services, fail_fast=fail_fast)
+
+                # ─── KO su stime a campione: si conferma sul completo ───
+                if failed := sampled_failures(validation, doc_props):
+                    log.info("sampling_escalated", document=upload.filename, rules=failed)
+                    report = doc_props["sampling"]
+                    doc_props = await process_document_cached(
+                        source,
+                        ext,
+                        digest=upload.sha256,
+                        on_progress=on_progress,
+                        properties=properties,
+                    )
+                    doc_props["sampling"] = {**report, "estimated": [], "escalated_rules": failed}
+                    with span("validate"):
+                        validation = validate_document(doc_props, spec, services, fail_fast=fail_fast)
+            assert doc_props is not None  # esito dal probe o dall'estrazione completa
+            annotate(pages=doc_props.get("page_count"))
+
+            # ─── serializza e salva ─────────────────────────────────────
+            result = ValidationResult(
+                id=result_id,
+                document_name=upload.filename,
+                spec_id=spec.id,
+                spec_name=spec.name,
+                file_format=ext,
+                validations=validation["validations"],
+                is_valid=validation["is_valid"],
+                skipped_rules=validation.get("skipped_rules", []),
+                detailed_analysis=doc_props.get("detailed_analysis"),
+                raw_props=jsonable_encoder(doc_props),
+            )
+            with span("store"):
+                save_result(result, spec)
+                get_report_renderer().invalidate(result.id)  # save_result può sovrascrivere
+        finally:
+            source.close()
+
+    # ─── metriche & log ─────────────────────────────────────────────
+    VALIDATION_RESULT.labels(
+        status="ok" if result.is_valid else "ko"
+    ).inc()
+
+    log.info(
+        "validate_order_completed",
+        document=result.document_name,
+        spec_id=spec.id,
+        is_valid=result.is_valid,
+        rule_costs_ms=validation.get("rule_costs_ms"),
+    )
+    return result
+
+
+def _http_error(ex: Exception, event: str) -> HTTPException:
+    """Mappa le eccezioni della validazione sullo status HTTP (e logga)."""
+    # ╭─ errori controllati ─────────────────────────────────────────╮
+    if isinstance(ex, HTTPException):
+        return ex
+    if isinstance(ex, PoolSaturatedError):
+        log.warning(f"{event}_busy", error=str(ex))
+        return HTTPException(status_code=503, detail=str(ex))
+    if isinstance(ex, ValueError):
+        log.warning(f"{event}_bad_request", error=str(ex))
+        return HTTPException(status_code=400, detail=str(ex))
+    if isinstance(ex, TimeoutError):
+        log.warning(f"{event}_timeout", error=str(ex))
+        VALIDATION_RESULT.labels(status="error").inc()
+        return HTTPException(status_code=504, detail="Tempo massimo di analisi superato")
+
+    # ╰─ errori imprevisti → 500 + metrica "error" ─────────────────╯
+    log.error(f"{event}_failed", error=str(ex))
+    VALIDATION_RESULT.labels(status="error").inc()
+    return HTTPException(status_code=500, detail="Errore interno")
+
+
 @api_router.post("/validate-order", response_model=ValidationResult)
 async def validate_with_order(
     request: Request,
     order_text: str = Form(...),
     file: UploadFile = File(...),
+    fail_fast: bool = False,
+    sample: bool = False,
 ):
-    # import locali (evita import circolari)
-    from services.extract import process_document_async
-    from services.validation import validate_document
-
+    """
+    `?fail_fast=true`: ci si ferma alla prima regola KO (triage), le
+    altre finiscono in `skipped_rules`.
+    `?sample=true`: analisi a campione dei documenti molto lunghi.
+    """
     try:
-        # ─── 1. parse testo ordine ──────────────────────────────────
-        parsed = parse_order(order_text)
-        width_cm, height_cm = parsed["final_format_cm"]
-        services = parsed["services"]
-
-        # ─── 2. costruisci la DocumentSpec derivata ─────────────────
-        spec = DocumentSpec(
-            name="Specifica derivata dall’ordine",
-            page_width_cm=width_cm,
-            page_height_cm=height_cm,
-            top_margin_cm=0,
-            bottom_margin_cm=0,
-            left_margin_cm=0,
-            right_margin_cm=0,
-            min_page_count=40,  # soglia demo
-        )
+        # ─── 1. parse testo ordine e DocumentSpec derivata ──────────
+        spec, services = _spec_from_order(order_text)
 
-        # ─── 3. leggi file e verifica dimensione ────────────────────
-        file_bytes = await file.read()
-        if len(file_bytes) > settings.MAX_FILE_SIZE:
-            max_mb = settings.MAX_FILE_SIZE // (1024 * 1024)
-            raise HTTPException(
-                status_code=413,
-                detail=f"File troppo grande: massimo {max_mb} MB.",
-            )
+        # ─── 2. leggi il file a blocchi: dimensione, hash, formato ──
+        with span("upload"):
+            upload = await ingest_upload(file, settings.MAX_FILE_SIZE)
+        annotate(file_format=upload.file_format)
 
-        # ─── 4. estrai proprietà (async, non blocca event-loop) ─────
-        if not file.filename:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Nome file non specificato.",
-            )
-        ext = file.filename.split(".")[-1].lower()
-        doc_props = await process_document_async(file_bytes, ext)
-
-        # ─── 5. valida rispetto alla spec ───────────────────────────
-        validation = validate_document(doc_props, spec, services)
-
-        # ─── 6. serializza e salva in memoria ───────────────────────
-        result = ValidationResult(
-            document_name=file.filename,
-            spec_id=spec.id,
-            spec_name=spec.name,
-            file_format=ext,
-            validations=validation["validations"],
-            is_valid=validation["is_valid"],
-            detailed_analysis=doc_props.get("detailed_analysis"),
-            raw_props=jsonable_encoder(doc_props),
-        )
-        save_result(result, spec)
-
-        # ─── 7. metriche & log ──────────────────────────────────────
-        VALIDATION_RESULT.labels(
-            status="ok" if result.is_valid else "ko"
-        ).inc()
-
-        log.info(
-            "validate_order_completed",
-            document=result.document_name,
-            spec_id=spec.id,
-            is_valid=result.is_valid,
+        # ─── 3. estrai, valida, salva ───────────────────────────────
+        return await _validate_upload(upload, spec, services, fail_fast=fail_fast, sample=sample)
+    except Exception as ex:  # noqa: BLE001
+        raise _http_error(ex, "validate_order")
+
+
+# ------------------------------------------------------------------ #
+# 1b) VALIDAZIONE BATCH: N FILE, UN ORDINE
+# ------------------------------------------------------------------ #
+def _ndjson(obj: dict[str, Any]) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+@api_router.post("/validate-batch")
+async def validate_batch(
+    order_text: str = Form(...),
+    files: list[UploadFile] = File(...),
+    fail_fast: bool = False,
+    sample: bool = False,
+):
+    """
+    Valida più file contro lo stesso ordine (parse + spec una volta sola).
+
+    Le estrazioni girano in parallelo (al più BATCH_CONCURRENCY alla volta)
+    e ogni esito viene inviato appena pronto come riga NDJSON:
+
+        {"type": "result", "index": 0, "filename": "...", "result": {...}}
+        {"type": "error",  "index": 1, "filename": "...", "status": 400, "detail": "..."}
+        {"type": "summary", "total": 2, "valid": 1, "invalid": 0, "errors": 1, "elapsed_s": 3.2}
+    """
+    if len(files) > settings.BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Troppi file: massimo {settings.BATCH_MAX_FILES} per batch.",
         )
+    try:
+        spec, services = _spec_from_order(order_text)
+    except Exception as ex:  # noqa: BLE001
+        raise _http_error(ex, "validate_batch")
+
+    # FastAPI chiude gli UploadFile al ritorno dell'endpoint, prima dello
+    # stream: ogni file viene copiato in uno spool proprio
+    ingested: list[IngestedUpload | HTTPException] = []
+    with span("upload"):
+        for file in files:
+            try:
+                ingested.append(await detach_upload(await ingest_upload(file, settings.MAX_FILE_SIZE)))
+            except HTTPException as he:
+                ingested.append(he)
+
+    async def stream():
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(max(1, settings.BATCH_CONCURRENCY))
+        counts = {"valid": 0, "invalid": 0, "errors": 0}
+
+        async def run(index: int, item: IngestedUpload | HTTPException) -> dict[str, Any]:
+            filename = files[index].filename
+            try:
+                if isinstance(item, HTTPException):
+                    raise item
+                async with semaphore:
+                    result = await _validate_upload(item, spec, services, fail_fast=fail_fast, sample=sample)
+            except Exception as ex:  # noqa: BLE001
+                err = _http_error(ex, "validate_batch")
+                counts["errors"] += 1
+                return {"type": "error", "index": index, "filename": filename,
+                        "status": err.status_code, "detail": err.detail}
+            counts["valid" if result.is_valid else "invalid"] += 1
+            return {"type": "result", "index": index, "filename": filename,
+                    "result": result.model_dump(mode="json")}
+
+        tasks = []
+        for i, item in enumerate(ingested):
+            task = asyncio.create_task(run(i, item))
+            if isinstance(item, IngestedUpload):
+                # callback e non `finally`: anche un task annullato prima di
+                # partire (client disconnesso) chiude il proprio spool
+                task.add_done_callback(lambda _, upload=item.upload: upload.file.close())
+            tasks.append(task)
+        try:
+            for done in asyncio.as_completed(tasks):
+                yield _ndjson(await done)
+            yield _ndjson({
+                "type": "summary",
+                "total": len(tasks),
+                **counts,
+                "elapsed_s": round(time.perf_counter() - started, 3),
+            })
+        finally:
+            # client disconnesso: niente lavoro per nessuno
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
-        return result
 
-    # ╭─ errori controllati ─────────────────────────────────────────╮
-    except ValueError as ve:
-        log.warning("validate_order_bad_request", error=str(ve))
-        raise HTTPException(status_code=400, detail=str(ve))
+# ------------------------------------------------------------------ #
+# 1c) VALIDAZIONE COME JOB ASINCRONO
+# ------------------------------------------------------------------ #
+_SSE_KEEPALIVE = 15.0  # s: commento SSE contro i timeout di proxy e ingress
 
-    # ╰─ errori imprevisti → 500 + metrica "error" ─────────────────╯
+
+def _job_body(job: JobStatus) -> dict[str, Any]:
+    """Stato del job; a lavoro concluso anche l'esito completo."""
+    body = job.model_dump(mode="json")
+    if job.status == "done" and job.result_id:
+        entry = get_entry(job.result_id)
+        body["result"] = entry["result"].model_dump(mode="json") if entry else None
+    return body
+
+
+@api_router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def create_validation_job(
+    order_text: str = Form(...),
+    file: UploadFile = File(...),
+    fail_fast: bool = False,
+    sample: bool = False,
+):
+    """
+    Come /validate-order, ma risponde subito con l'id del job: stato e
+    avanzamento su GET /jobs/{job_id} o in streaming su /jobs/{job_id}/events.
+    """
+    try:
+        spec, services = _spec_from_order(order_text)
+        with span("upload"):
+            upload = await ingest_upload(file, settings.MAX_FILE_SIZE)
     except Exception as ex:  # noqa: BLE001
-        log.error("validate_order_failed", error=str(ex))
-        VALIDATION_RESULT.labels(status="error").inc()
-        raise HTTPException(status_code=500, detail="Errore interno")  # pragma: no cover
+        raise _http_error(ex, "validation_job")
+    annotate(file_format=upload.file_format)
+
+    # il job sopravvive alla richiesta: serve una copia propria del file
+    upload = await detach_upload(upload)
+
+    async def work(on_progress: ProgressCallback) -> str:
+        try:
+            result = await _validate_upload(
+                upload, spec, services, on_progress, fail_fast=fail_fast, sample=sample
+            )
+        except Exception as ex:  # noqa: BLE001 – l'annullamento passa oltre
+            raise _http_error(ex, "validation_job")
+        finally:
+            await upload.upload.close()
+        assert result.id is not None  # generato da ValidationResult
+        return result.id
+
+    job = start_job(upload.filename, work)
+    log.info("validation_job_created", job_id=job.id, document=upload.filename)
+    return job.model_dump(mode="json")
+
+
+@api_router.get("/jobs/{job_id}")
+async def validation_job_status(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job non trovato")
+    return _job_body(job)
+
+
+@api_router.get("/jobs/{job_id}/events")
+async def validation_job_events(job_id: str):
+    """
+    Server-Sent Events: un evento `progress` a ogni cambiamento di stato,
+    l'ultimo (`done` | `failed` | `cancelled`) con lo stato finale.
+    """
+    if get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job non trovato")
+
+    async def stream():
+        quiet = 0.0
+        async for job in watch_job(job_id):
+            if job is None:
+                quiet += settings.JOB_POLL_INTERVAL
+                if quiet >= _SSE_KEEPALIVE:
+                    quiet = 0.0
+                    yield b": keep-alive\n\n"
+                continue
+            quiet = 0.0
+            event = job.status if job.status in TERMINAL_STATUSES else "progress"
+            data = json.dumps(_job_body(job), ensure_ascii=False, separators=(",", ":"))
+            yield f"event: {event}\ndata: {data}\n\n".encode()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@api_router.delete("/jobs/{job_id}", status_code=status.HTTP_202_ACCEPTED)
+async def cancel_validation_job(job_id: str):
+    """Annulla il job: conversione LibreOffice ed estrazione in corso vengono interrotte."""
+    job = cancel_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job non trovato")
+    return job.model_dump(mode="json")
 
 
 # ------------------------------------------------------------------ #
 # 2) GENERAZIONE PDF DI REPORT
 # ------------------------------------------------------------------ #
+_REPORT_CHUNK = 64 * 1024
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def _iter_chunks(data: bytes):
+    view = memoryview(data)
+    for start in range(0, len(view), _REPORT_CHUNK):
+        yield bytes(view[start:start + _REPORT_CHUNK])
+
+
 @api_router.post("/validation-reports/{validation_id}")
 async def generate_report(
     validation_id: str,
+    request: Request,
     report_format: ReportFormat = ReportFormat(),
 ):
-    from server import generate_validation_report  # import locale
-
-    entry = get_entry(validation_id)
-    if not entry:
-        raise HTTPException(status_code=404, detail="Validation result not found")
-
-    validation_result: ValidationResult = entry["result"]
-    spec: DocumentSpec = entry["spec"]
-
-    pdf_report = generate_validation_report(validation_result, spec, report_format)
-
-    return Response(
-        content=pdf_report,
+    """
+    PDF del report, inviato a blocchi con Content-Length ed ETag.
+    Con `If-None-Match` uguale all'ETag risponde 304 senza corpo: se il PDF
+    è in cache non viene nemmeno riletto l'esito dallo store.
+    """
+    from services.reports import get_report_renderer
+
+    renderer = get_report_renderer()
+    if_none_match = request.headers.get("if-none-match")
+
+    report = renderer.cached(validation_id, report_format) if has_entry(validation_id) else None
+    if report is None:
+        entry = get_entry(validation_id)
+        if not entry:
+            raise HTTPException(status_code=404, detail="Validation result not found")
+        annotate(file_format=entry["result"].file_format)
+        with span("render"):
+            report = await asyncio.to_thread(renderer.report, entry["result"], entry["spec"], report_format)
+
+    headers = {"ETag": report.etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, report.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return StreamingResponse(
+        _iter_chunks(report.pdf),
         media_type="application/pdf",
         headers={
-            "Content-Disposition": f"attachment; filename=validation_report_{validation_id}.pdf"
+            **headers,
+            "Content-Length": str(len(report.pdf)),
+            "Content-Disposition": f"attachment; filename=validation_report_{validation_id}.pdf",
         },
     )
 
@@ -181,42 +529,54 @@ class ZendeskPayload(BaseModel):
     email: EmailStr        # destinatario originale
     message: str           # testo e-mail preparato dal front-end
     validation_id: str     # id risultato già salvato
+    background: bool = False  # True → 202 + job_id, invio asincrono
 
 
 @api_router.post("/zendesk-ticket")
-async def zendesk_ticket(payload: ZendeskPayload):
+async def zendesk_ticket(payload: ZendeskPayload, response: Response):
     """
     • recupera il risultato di validazione
     • genera il PDF
-    • chiama send_ticket_to_zendesk() per upload + ticket
+    • crea il ticket (upload + tickets.json) col client asincrono,
+      oppure lo accoda e ritorna subito il job id
     """
     entry = get_entry(payload.validation_id)
     if not entry:
         raise HTTPException(status_code=404, detail="Validation ID non trovato")
 
-    from server import generate_validation_report, send_ticket_to_zendesk
+    from server import generate_validation_report
 
-    pdf_bytes = generate_validation_report(
-        entry["result"], entry["spec"], ReportFormat()
+    pdf_bytes = await asyncio.to_thread(
+        generate_validation_report, entry["result"], entry["spec"], ReportFormat()
     )
 
-    subject = f"Esito validazione – {entry['result'].document_name}"
-    body = f"{payload.message}\n\nCliente origine: {payload.email}"
+    args = (
+        f"Esito validazione – {entry['result'].document_name}",
+        f"{payload.message}\n\nCliente origine: {payload.email}",
+        pdf_bytes,
+        f"validation_{payload.validation_id}.pdf",
+        payload.email,
+    )
 
     try:
-        ticket_id = send_ticket_to_zendesk(
-            subject,
-            body,
-            pdf_bytes,
-            f"validation_{payload.validation_id}.pdf",
-            requester_email=payload.email,
-        )
+        if payload.background:
+            get_zendesk_client()  # configurazione mancante → errore subito, non nel job
+            response.status_code = status.HTTP_202_ACCEPTED
+            return {"status": "queued", "job_id": enqueue_ticket(*args)}
+
+        ticket_id = await get_zendesk_client().create_ticket(*args)
         return {"status": "ok", "ticket_id": ticket_id}
-    except requests.HTTPError as e:
+    except ZendeskError as e:
         log.error(f"Zendesk API error: {e}")
-        raise HTTPException(
-            status_code=502, detail=f"Errore Zendesk {e.response.status_code}"
-        )
+        raise HTTPException(status_code=502, detail=str(e))
+
+
+@api_router.get("/zendesk-ticket/{job_id}")
+async def zendesk_ticket_status(job_id: str):
+    job = get_ticket_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job non trovato")
+    return {"job_id": job_id, **job}
 
 
 # ------------------------------------------------------------------ #
@@ -224,8 +584,10 @@ async def zendesk_ticket(payload: ZendeskPayload):
 # ------------------------------------------------------------------ #
 @api_router.get("/health")
 async def health_check():
+    lo_pool = get_lo_pool()
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
         "build": os.getenv("APP_BUILD", "dev"),
+        "libreoffice_pool": lo_pool.stats() if lo_pool else None,
     }
@@ -0,0 +1,9 @@
+"""
+Benchmark e strumenti di confronto delle prestazioni.
+
+Gli script `bench_*.py` si lanciano come moduli dalla root del repo, ad es.:
+
+    python -m benchmarks.bench_pdf_extraction --pages 300
+
+Non vengono raccolti da pytest (il pattern è `test_*.py`).
+"""
@@ -0,0 +1,118 @@
+"""
+Benchmark rilevamento pagine a colori
+=====================================
+Controllo vettoriale (`_samples_have_color`, NumPy se presente) contro il
+vecchio loop Python pixel per pixel, sugli stessi pixmap a scala 0.1, e poi
+`extract_pdf_detailed_analysis` completo contro la pipeline legacy.
+
+    python -m benchmarks.bench_color_detection --pages 500 --repeat 3
+
+Tre corpus: "colore" (immagine a colori su ogni pagina, testo rosso ogni 5),
+"grigio" (stesse pagine con immagine grigia: il caso peggiore del loop,
+che deve scorrere tutto il buffer) e "misto" (immagine a colori ogni 3
+pagine, grigia nelle altre ogni 2, testo rosso ogni 5).
+
+Per ogni analisi si riportano anche le pagine renderizzate: la legacy
+considera a colori ogni pagina con immagini e non la renderizza; il
+single-pass guarda i pixel di ogni immagine (una volta per xref) e salta
+il render solo se ne trova una a colori. Con immagini solo grigie il
+render resta, perché il colore può venire da tracciati o shading.
+La cache per pagina è disattivata (PAGE_CACHE_MAX_BYTES=0).
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import fitz  # PyMuPDF
+
+from benchmarks.bench_pdf_extraction import measure
+from benchmarks.corpus import make_pdf
+from benchmarks.legacy import legacy_extract_pdf_detailed_analysis, legacy_samples_have_color
+from config import settings
+from services.extract import pdf as pdf_engine
+from services.extract.pdf import _samples_have_color, extract_pdf_detailed_analysis
+
+
+def _pixmaps(pdf: bytes) -> list[tuple[bytes, int]]:
+    with fitz.open(stream=pdf, filetype="pdf") as doc:
+        out = []
+        for page in doc:
+            pix = page.get_pixmap(matrix=fitz.Matrix(0.1, 0.1), colorspace=fitz.csRGB, alpha=False)
+            out.append((pix.samples, pix.n))
+        return out
+
+
+def _renders(fn, pdf: bytes) -> int:
+    """Pagine renderizzate (chiamate a `Page.get_pixmap`) da un'esecuzione di `fn`."""
+    calls = 0
+    real = fitz.Page.get_pixmap
+
+    def counting(self, *args, **kwargs):
+        nonlocal calls
+        calls += 1
+        return real(self, *args, **kwargs)
+
+    fitz.Page.get_pixmap = counting
+    try:
+        fn(pdf)
+    finally:
+        fitz.Page.get_pixmap = real
+    return calls
+
+
+def _mixed_pdf(pages: int) -> bytes:
+    """Immagine a colori ogni 3 pagine, grigia ogni 2 (delle altre), testo rosso ogni 5."""
+    color = fitz.open("pdf", make_pdf(pages, color_text_every=5, image_every=3))
+    grey = fitz.open("pdf", make_pdf(pages, color_text_every=5, image_every=2, image_rgb=(128, 128, 128)))
+    out = fitz.open()
+    for n in range(pages):
+        src = color if (n + 1) % 3 == 0 else grey
+        out.insert_pdf(src, from_page=n, to_page=n)
+    return out.tobytes(garbage=3, deflate=True)
+
+
+def _time_detector(fn, pixmaps, repeat: int) -> tuple[float, int]:
+    best = float("inf")
+    hits = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        hits = sum(fn(data, n) for data, n in pixmaps)
+        best = min(best, time.perf_counter() - t0)
+    return best, hits
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--pages", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    settings.PAGE_CACHE_MAX_BYTES = 0
+    tol = settings.COLOR_TOLERANCE
+    print(f"backend vettoriale: {'numpy' if pdf_engine.np is not None else 'slice di bytes'}, tolleranza {tol}")
+
+    corpora = {
+        "colore": make_pdf(args.pages, color_text_every=5, image_every=1),
+        "grigio": make_pdf(args.pages, image_every=1, image_rgb=(128, 128, 128)),
+        "misto": _mixed_pdf(args.pages),
+    }
+    for name, pdf in corpora.items():
+        pixmaps = _pixmaps(pdf)
+        old_s, old_hits = _time_detector(legacy_samples_have_color, pixmaps, args.repeat)
+        new_s, new_hits = _time_detector(lambda d, n: _samples_have_color(d, n, tol), pixmaps, args.repeat)
+        print(f"\n[{name}] {args.pages} pagine, {len(pdf) / 1024:.0f} KB")
+        print(f"  loop per pixel      {old_s * 1000:9.1f} ms   pagine a colori {old_hits}")
+        print(f"  vettoriale          {new_s * 1000:9.1f} ms   pagine a colori {new_hits}")
+
+        (old_e, old_peak) = measure(legacy_extract_pdf_detailed_analysis, pdf, args.repeat)
+        (new_e, new_peak) = measure(extract_pdf_detailed_analysis, pdf, args.repeat)
+        old_r = _renders(legacy_extract_pdf_detailed_analysis, pdf)
+        new_r = _renders(extract_pdf_detailed_analysis, pdf)
+        print(f"  analisi legacy      {old_e:9.2f} s    picco heap {old_peak / 2**20:6.1f} MB   render {old_r}")
+        print(f"  analisi single-pass {new_e:9.2f} s    picco heap {new_peak / 2**20:6.1f} MB   render {new_r}")
+
+
+if __name__ == "__main__":
+    main()
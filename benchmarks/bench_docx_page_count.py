@@ -0,0 +1,58 @@
+"""
+Benchmark page_count DOCX
+=========================
+Confronta, su DOCX sintetici da 50 a 500 pagine:
+• percorso veloce: `<Pages>` di docProps/app.xml (read_docx_declared_pages)
+• percorso completo: conversione LibreOffice → PDF + conteggio pagine
+
+    python -m benchmarks.bench_docx_page_count --pages 50 100 250 500
+
+Il percorso completo richiede `soffice` nel PATH.
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+from benchmarks.corpus import make_docx
+from services.extract.docx import read_docx_declared_pages
+from utils.conversion import convert_to_pdf_via_lo, extract_pdf_page_count
+
+
+def _render_count(data: bytes) -> int:
+    return extract_pdf_page_count(convert_to_pdf_via_lo(data, "docx"))
+
+
+def _timed(fn, data: bytes, repeat: int) -> tuple[float, object]:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(data)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--pages", type=int, nargs="+", default=[50, 100, 250, 500])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--skip-render", action="store_true", help="solo percorso veloce")
+    args = ap.parse_args()
+
+    print(f"{'pagine':>6}  {'app.xml':>10}  {'render PDF':>10}  {'speedup':>8}  conteggi")
+    for pages in args.pages:
+        data = make_docx(pages)
+        fast_s, fast_n = _timed(read_docx_declared_pages, data, args.repeat)
+        if args.skip_render:
+            print(f"{pages:>6}  {fast_s * 1000:>8.1f}ms  {'—':>10}  {'—':>8}  {fast_n}")
+            continue
+        slow_s, slow_n = _timed(_render_count, data, 1)
+        print(
+            f"{pages:>6}  {fast_s * 1000:>8.1f}ms  {slow_s:>9.2f}s  "
+            f"{slow_s / fast_s:>7.0f}x  {fast_n} / {slow_n}"
+        )
+
+
+if __name__ == "__main__":
+    main()
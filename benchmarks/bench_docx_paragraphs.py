@@ -0,0 +1,66 @@
+"""
+Benchmark giro su paragrafi e run del DOCX
+==========================================
+Giro in streaming (services.extract.docx_stream, `iterparse` + tabella
+degli stili) contro il vecchio giro su `doc.paragraphs` / `par.runs` di
+python-docx (benchmarks.legacy), su DOCX sintetici da 100 a 400 pagine.
+
+    python -m benchmarks.bench_docx_paragraphs --pages 100 400 --repeat 3
+
+Ogni strategia gira in un processo a parte: oltre al tempo migliore si
+riporta la crescita del picco di memoria residente (ru_maxrss) durante
+l'estrazione. I due risultati devono coincidere, font esclusi: lo
+streaming li risolve anche lungo `basedOn`, docDefaults e tema.
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing as mp
+import resource
+import time
+
+from benchmarks.corpus import make_docx
+
+
+def _run(strategy: str, data: bytes, repeat: int) -> tuple[float, int, dict]:
+    from benchmarks.legacy import legacy_extract_docx_detailed_analysis
+    from services.extract.docx import extract_docx_detailed_analysis
+
+    fn = {"python-docx": legacy_extract_docx_detailed_analysis, "streaming": extract_docx_detailed_analysis}[strategy]
+    base_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(data)
+        best = min(best, time.perf_counter() - t0)
+    grown_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base_kb
+    assert out is not None, "--repeat deve essere almeno 1"
+    return best, grown_kb, out.model_dump(exclude={"fonts"})
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--pages", type=int, nargs="+", default=[100, 400])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--paragraphs", type=int, default=8, help="paragrafi per pagina")
+    args = ap.parse_args()
+
+    ctx = mp.get_context("spawn")  # processo pulito: il picco RSS è solo dell'estrazione
+    print(f"{'pagine':>6}  {'python-docx':>12}  {'streaming':>12}  {'speedup':>8}  {'RSS +MB (old/new)':>18}")
+    for pages in args.pages:
+        data = make_docx(pages, paragraphs_per_page=args.paragraphs, fonts=("Arial", "Georgia"), color_text_every=5)
+        rows = {}
+        for strategy in ("python-docx", "streaming"):
+            with ctx.Pool(1) as pool:
+                rows[strategy] = pool.apply(_run, (strategy, data, args.repeat))
+        (old_s, old_kb, old), (new_s, new_kb, new) = rows["python-docx"], rows["streaming"]
+        assert old == new, "le strategie danno risultati diversi"
+        print(
+            f"{pages:>6}  {old_s * 1000:>10.1f}ms  {new_s * 1000:>10.1f}ms  {old_s / new_s:>7.1f}x"
+            f"  {old_kb / 1024:>8.1f} / {new_kb / 1024:<8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
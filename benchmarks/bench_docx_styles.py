@@ -0,0 +1,116 @@
+"""
+Micro-benchmark risoluzione degli stili DOCX
+============================================
+Font effettivo (nome + dimensione) di ogni run di un DOCX pesante di stili
+(benchmarks.corpus.make_styled_docx), in due modi:
+
+• ad hoc: per ogni run si risale la catena (run → stile di carattere →
+  `basedOn`… → stile di paragrafo → `basedOn`… → docDefaults), cercando
+  ogni stile in styles.xml con XPath come fa python-docx
+• indice: `StyleTable` costruito una volta, poi un lookup per run
+
+    python -m benchmarks.bench_docx_styles --pages 50 200 --styles 24 --depth 6
+
+Le run vengono estratte una volta sola prima di cronometrare: si misura
+solo la risoluzione (per l'indice anche la sua costruzione). I due modi
+devono dare gli stessi font.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import time
+import zipfile
+
+from lxml import etree
+
+from benchmarks.corpus import make_styled_docx
+from services.extract.docx_stream import _VAL, _W, RunFont, StyleTable, _run_font, theme_fonts
+
+
+def _runs(data: bytes) -> tuple[bytes, dict[str, str], list[tuple[str | None, str | None, etree._Element | None]]]:
+    """styles.xml, font del tema e (stile paragrafo, stile carattere, rPr) di ogni run del corpo."""
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        styles_xml, theme = zf.read("word/styles.xml"), theme_fonts(zf.read("word/theme/theme1.xml"))
+        body = etree.fromstring(zf.read("word/document.xml")).find(f"{_W}body")
+    runs = []
+    for p in body.iterfind(f"{_W}p"):
+        pstyle = p.find(f"{_W}pPr/{_W}pStyle")
+        for r in p.iterfind(f"{_W}r"):
+            rstyle = r.find(f"{_W}rPr/{_W}rStyle")
+            runs.append((
+                pstyle.get(_VAL) if pstyle is not None else None,
+                rstyle.get(_VAL) if rstyle is not None else None,
+                r.find(f"{_W}rPr"),
+            ))
+    return styles_xml, theme, runs
+
+
+def adhoc(styles_xml: bytes, theme: dict[str, str], runs: list) -> list[RunFont]:
+    root = etree.fromstring(styles_xml)
+    ns = {"w": _W[1:-1]}
+    defaults = _run_font(root.find(f"{_W}docDefaults/{_W}rPrDefault/{_W}rPr"), theme)
+    default_p = root.xpath('w:style[@w:type="paragraph" and @w:default="1"]/@w:styleId', namespaces=ns)
+
+    def chain(style_id: str | None, style_type: str) -> RunFont:
+        font, seen = RunFont(None, None), set()
+        while style_id and style_id not in seen:
+            seen.add(style_id)
+            found = root.xpath(f'w:style[@w:styleId="{style_id}"]', namespaces=ns)
+            if not found or found[0].get(f"{_W}type") != style_type:
+                break
+            font = font.over(_run_font(found[0].find(f"{_W}rPr"), theme))
+            based_on = found[0].find(f"{_W}basedOn")
+            style_id = based_on.get(_VAL) if based_on is not None else None
+        return font
+
+    out = []
+    for pstyle, rstyle, rpr in runs:
+        font = _run_font(rpr, theme)
+        font = font.over(chain(rstyle, "character"))
+        font = font.over(chain(pstyle or (default_p[-1] if default_p else None), "paragraph"))
+        out.append(font.over(defaults))
+    return out
+
+
+def indexed(styles_xml: bytes, theme: dict[str, str], runs: list) -> list[RunFont]:
+    table = StyleTable.from_xml(styles_xml, theme)
+    return [
+        table.run_font(table.paragraph(pstyle), rstyle, _run_font(rpr, theme))
+        for pstyle, rstyle, rpr in runs
+    ]
+
+
+def _best(fn, args: tuple, repeat: int) -> tuple[float, list[RunFont]]:
+    best, out = float("inf"), []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--pages", type=int, nargs="+", default=[50, 200])
+    ap.add_argument("--styles", type=int, default=24, help="stili di paragrafo (e di carattere)")
+    ap.add_argument("--depth", type=int, default=6, help="lunghezza massima delle catene basedOn")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'pagine':>6}  {'run':>7}  {'ad hoc':>10}  {'indice':>10}  {'speedup':>8}  {'µs/run (indice)':>15}")
+    for pages in args.pages:
+        payload = _runs(make_styled_docx(pages, styles=args.styles, depth=args.depth))
+        slow_s, slow = _best(adhoc, payload, args.repeat)
+        fast_s, fast = _best(indexed, payload, args.repeat)
+        assert slow == fast, "ad hoc e indice danno font diversi"
+        n = len(payload[2])
+        print(
+            f"{pages:>6}  {n:>7}  {slow_s * 1000:>8.1f}ms  {fast_s * 1000:>8.1f}ms"
+            f"  {slow_s / fast_s:>7.1f}x  {fast_s / n * 1e6:>15.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
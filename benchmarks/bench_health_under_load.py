@@ -0,0 +1,107 @@
+"""
+Benchmark latenza /api/health sotto carico
+==========================================
+Avvia uvicorn in un sottoprocesso, lancia N validazioni concorrenti di PDF
+da M pagine e nel frattempo interroga /api/health, riportando p50/p99/max.
+
+    python -m benchmarks.bench_health_under_load --workers 4
+    python -m benchmarks.bench_health_under_load --workers 0   # solo thread
+
+`--workers` viene passato al server come EXTRACT_WORKERS.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from benchmarks.corpus import make_pdf
+
+ORDER_TEXT = "Formato: 17x24\n1x Servizio impaginazione testo"
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(base: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f"{base}/api/health", timeout=1)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError("il server non risponde")
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--pages", type=int, default=200)
+    ap.add_argument("--interval", type=float, default=0.02, help="pausa tra due health-check (s)")
+    args = ap.parse_args()
+
+    pdf = make_pdf(args.pages, color_text_every=5, image_every=9)
+    port = _free_port()
+    base = f"http://127.0.0.1:{port}"
+    env = {**os.environ, "EXTRACT_WORKERS": str(args.workers), "LOG_LEVEL": "WARNING"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        _wait_ready(base)
+
+        def validate() -> None:
+            requests.post(
+                f"{base}/api/validate-order",
+                data={"order_text": ORDER_TEXT},
+                files={"file": ("bench.pdf", pdf, "application/pdf")},
+                timeout=600,
+            ).raise_for_status()
+
+        jobs = [threading.Thread(target=validate) for _ in range(args.concurrency)]
+        t0 = time.perf_counter()
+        for j in jobs:
+            j.start()
+
+        latencies: list[float] = []
+        while any(j.is_alive() for j in jobs):
+            s = time.perf_counter()
+            requests.get(f"{base}/api/health", timeout=60)
+            latencies.append((time.perf_counter() - s) * 1000)
+            time.sleep(args.interval)
+        elapsed = time.perf_counter() - t0
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+    print(
+        f"EXTRACT_WORKERS={args.workers}  {args.concurrency}×{args.pages} pagine "
+        f"in {elapsed:.1f}s  ({len(latencies)} health-check)"
+    )
+    print(
+        f"/api/health  p50 {statistics.median(latencies):7.1f} ms   "
+        f"p99 {_percentile(latencies, 99):7.1f} ms   max {max(latencies):7.1f} ms"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark rilevamento numero di pagina
+======================================
+Rilevatore della fascia footer (pagina ritagliata prima dell'estrazione,
+services.extract.page_numbers) contro:
+
+• la vecchia scansione di tutte le parole con pdfplumber
+  (`extract_words(use_text_flow=True)`, benchmarks.legacy)
+• la scansione di tutte le parole con PyMuPDF
+
+sullo stesso libro sintetico a testo fitto.
+
+    python -m benchmarks.bench_page_numbers --pages 500 --repeat 3
+
+Le tre strategie devono dare le stesse posizioni: il confronto viene
+verificato prima di stampare i tempi.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import time
+from collections.abc import Callable
+
+import fitz  # PyMuPDF
+import pdfplumber
+
+from benchmarks.corpus import make_pdf
+from services.extract.page_numbers import (
+    FOOTER_BAND_PT,
+    page_number_candidates,
+    page_number_position,
+)
+from services.extract.pdf import _footer_words
+
+
+def _position(cx: float, w: float) -> str:
+    if abs(cx - w / 2) <= w * 0.15:
+        return "center"
+    if cx < w * 0.25:
+        return "left"
+    if cx > w * 0.75:
+        return "right"
+    return "missing"
+
+
+def pdfplumber_words(pdf: bytes) -> list[str]:
+    out = []
+    with pdfplumber.open(io.BytesIO(pdf)) as doc:
+        w_pt, h_pt = doc.pages[0].width, doc.pages[0].height
+        for idx, page in enumerate(doc.pages):
+            pos = "missing"
+            for w in page.extract_words(keep_blank_chars=False, use_text_flow=True):
+                if w["text"].strip().isdigit() and int(w["text"]) == idx + 1 and w["bottom"] >= h_pt - FOOTER_BAND_PT:
+                    pos = _position((w["x0"] + w["x1"]) / 2, w_pt)
+                    break
+            out.append(pos)
+    return out
+
+
+def fitz_words(pdf: bytes) -> list[str]:
+    out = []
+    with fitz.open(stream=pdf, filetype="pdf") as doc:
+        ref = doc[0].rect
+        for idx, page in enumerate(doc):
+            pos = "missing"
+            for w in page.get_text("words"):
+                if w[4].strip().isdigit() and int(w[4]) == idx + 1 and w[3] >= ref.height - FOOTER_BAND_PT:
+                    pos = _position((w[0] + w[2]) / 2, ref.width)
+                    break
+            out.append(pos)
+    return out
+
+
+def footer_detector(pdf: bytes) -> list[str]:
+    with fitz.open(stream=pdf, filetype="pdf") as doc:
+        return [
+            page_number_position(page_number_candidates(_footer_words(page)), idx + 1, page.rect.width, page.rect.height)[0]
+            for idx, page in enumerate(doc)
+        ]
+
+
+def _best(fn: Callable[[bytes], list[str]], pdf: bytes, repeat: int) -> tuple[float, list[str]]:
+    best, result = float("inf"), []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(pdf)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--pages", type=int, default=500)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--paragraphs", type=int, default=10, help="paragrafi di testo per pagina")
+    args = ap.parse_args()
+
+    pdf = make_pdf(args.pages, paragraphs_per_page=args.paragraphs)
+    print(f"PDF sintetico: {args.pages} pagine, {len(pdf) / 1024:.0f} KB")
+
+    rows = {
+        "pdfplumber, tutte le parole": _best(pdfplumber_words, pdf, args.repeat),
+        "PyMuPDF, tutte le parole": _best(fitz_words, pdf, args.repeat),
+        "PyMuPDF, fascia footer": _best(footer_detector, pdf, args.repeat),
+    }
+    results = [positions for _, positions in rows.values()]
+    assert all(r == results[0] for r in results), "le strategie danno posizioni diverse"
+
+    footer_s = rows["PyMuPDF, fascia footer"][0]
+    for name, (secs, _) in rows.items():
+        print(f"{name:<30} {secs * 1000:9.1f} ms   {secs / footer_s:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
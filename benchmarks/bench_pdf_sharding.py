@@ -0,0 +1,67 @@
+"""
+Benchmark analisi PDF a shard
+=============================
+Tempo di `ExtractionPool.run("pdf", …)` su un PDF lungo al variare del
+numero di worker: con N worker il documento viene diviso in N intervalli
+di pagine (PDF_SHARD_PAGES permettendo).
+
+    python -m benchmarks.bench_pdf_sharding --pages 1000 --workers 1 2 4 8
+
+I worker vengono avviati prima della misura (un job di riscaldamento),
+così il tempo di spawn non entra nel confronto.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.corpus import make_pdf
+from config import settings
+from services.extract.pool import ExtractionPool, plan_shards
+
+
+async def _measure(workers: int, pdf: bytes, warmup: bytes, repeat: int) -> float:
+    pool = ExtractionPool(workers, timeout=None)
+    try:
+        await asyncio.gather(*(pool.run("pdf", warmup) for _ in range(workers)))
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            await pool.run("pdf", pdf)
+            best = min(best, time.perf_counter() - t0)
+        return best
+    finally:
+        pool.shutdown()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--pages", type=int, default=1000)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, os.cpu_count() or 1])
+    ap.add_argument("--repeat", type=int, default=2)
+    args = ap.parse_args()
+
+    # ogni ripetizione analizza davvero tutte le pagine: i worker spawn
+    # rileggono la configurazione dall'ambiente
+    os.environ["PAGE_CACHE_MAX_BYTES"] = "0"
+    settings.PAGE_CACHE_MAX_BYTES = 0
+    pdf = make_pdf(args.pages, color_text_every=7, image_every=11)
+    warmup = make_pdf(2)
+    print(f"PDF sintetico: {args.pages} pagine, {len(pdf) / 1024:.0f} KB, CPU {os.cpu_count()}")
+
+    base = None
+    for workers in sorted(set(args.workers)):
+        shards = len(plan_shards(args.pages, workers, settings.PDF_SHARD_PAGES))
+        secs = asyncio.run(_measure(workers, pdf, warmup, args.repeat))
+        base = base or secs
+        print(
+            f"worker {workers:>2}  shard {shards:>2}  {secs:7.2f} s   "
+            f"speedup {base / secs:4.1f}x   efficienza {base / secs / workers:5.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark report PDF
+====================
+Report al secondo per tre percorsi sullo stesso esito di validazione:
+
+• legacy      stili, logo e layout ricostruiti a ogni chiamata
+• renderer    ReportRenderer costruito una volta (senza cache)
+• cache       ReportRenderer.render_cached (stesso id e formato)
+
+    python -m benchmarks.bench_reports --pages 50 --seconds 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+from collections.abc import Callable
+
+from fastapi.encoders import jsonable_encoder
+
+from benchmarks.corpus import make_pdf
+from benchmarks.legacy import legacy_generate_validation_report
+from models import DocumentSpec, ReportFormat, ValidationResult
+from services.extract.pdf import extract_pdf_properties
+from services.reports import ReportRenderer
+from services.validation import validate_document
+
+
+def sample_result(pages: int) -> tuple[ValidationResult, DocumentSpec]:
+    """Esito realistico: estrazione vera di un PDF sintetico."""
+    doc_props = extract_pdf_properties(make_pdf(pages, color_text_every=7, image_every=11))
+    spec = DocumentSpec(
+        name="Benchmark",
+        page_width_cm=17,
+        page_height_cm=24,
+        top_margin_cm=0,
+        bottom_margin_cm=0,
+        left_margin_cm=0,
+        right_margin_cm=0,
+        min_page_count=40,
+    )
+    validation = validate_document(doc_props, spec, {})
+    result = ValidationResult(
+        document_name="bench.pdf",
+        spec_id=spec.id,
+        spec_name=spec.name,
+        file_format="pdf",
+        validations=validation["validations"],
+        is_valid=validation["is_valid"],
+        detailed_analysis=doc_props["detailed_analysis"],
+        raw_props=jsonable_encoder(doc_props),
+    )
+    return result, spec
+
+
+def rate(fn: Callable[[], bytes], seconds: float) -> float:
+    """Report al secondo in una finestra di `seconds`."""
+    n = 0
+    t0 = time.perf_counter()
+    while (elapsed := time.perf_counter() - t0) < seconds:
+        fn()
+        n += 1
+    return n / elapsed
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--pages", type=int, default=50)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    args = ap.parse_args()
+
+    result, spec = sample_result(args.pages)
+    fmt = ReportFormat()
+    renderer = ReportRenderer(cache_max_bytes=64 * 1024 * 1024)
+
+    rows = {
+        "legacy": rate(lambda: legacy_generate_validation_report(result, spec, fmt), args.seconds),
+        "renderer": rate(lambda: renderer.render(result, spec, fmt), args.seconds),
+        "cache": rate(lambda: renderer.render_cached(result, spec, fmt), args.seconds),
+    }
+    for name, per_s in rows.items():
+        print(f"{name:<10} {per_s:10.1f} report/s   ({rows['legacy'] and per_s / rows['legacy']:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
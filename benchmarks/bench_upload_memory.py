@@ -0,0 +1,130 @@
+"""
+Benchmark memoria di un upload grande
+=====================================
+Picco di memoria residente per ricevere un PDF (spool su disco, come lo
+lascia Starlette), calcolarne lo SHA-256 ed estrarne le proprietà. Due PDF:
+
+• grande    ~20 MB, un'immagine di rumore da ~3 MB ogni pagina
+• immagini  molte pagine, ognuna con un'immagine diversa e 4 font incorporati
+            condivisi: lo store di MuPDF cresce a ogni pagina, e svuotarlo
+            del tutto costringerebbe a ricaricare i font (tempo contro RSS)
+
+Due strategie:
+
+• bytes   vecchio percorso: l'upload letto in un unico `bytes`, hash e
+          estrattore sui byte in memoria
+• source  utils.document_source: copia a blocchi su file temporaneo, hash
+          a blocchi, estrattore per percorso
+
+    python -m benchmarks.bench_upload_memory --mb 20 --pages 150
+
+Ogni strategia gira in un processo figlio (benchmarks.suite.peak_rss_mb):
+il picco è la crescita dell'RSS, allocazioni di MuPDF incluse, riportata
+anche come multiplo della dimensione del file, sia per la sola ricezione
+(spool → hash, il lavoro dell'API) sia per ricezione + estrazione. Con la cache per pagina
+disattivata (PAGE_CACHE_MAX_BYTES=0) ogni esecuzione analizza davvero.
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from benchmarks.corpus import make_pdf
+from benchmarks.suite import peak_rss_mb
+from config import settings
+from services.extract.pdf import extract_pdf_properties
+from utils.document_source import DocumentSource
+
+_SPOOL_IN_MEMORY = 1024 * 1024  # come Starlette: oltre 1 MB lo spool va su disco
+
+
+def _big_pdf(mb: int) -> bytes:
+    """PDF di testo con un'immagine di rumore (incomprimibile) da ~3 MB ogni pagina."""
+    doc = fitz.open("pdf", make_pdf(max(1, mb // 3)))
+    side = 1000
+    for page in doc:
+        pix = fitz.Pixmap(fitz.csRGB, side, side, os.urandom(side * side * 3), False)
+        page.insert_image(fitz.Rect(72, 72, 272, 272), pixmap=pix)
+    return doc.tobytes()
+
+
+def _image_pages_pdf(pages: int, side: int = 200) -> bytes:
+    """Ogni pagina: un'immagine di rumore diversa e testo in 4 font incorporati (gli stessi ovunque)."""
+    doc = fitz.open()
+    fonts = [fitz.Font(name).buffer for name in ("helv", "tiro", "cour", "hebo")]
+    for n in range(pages):
+        page = doc.new_page(width=482, height=680)
+        for k, buffer in enumerate(fonts):
+            page.insert_font(fontname=f"F{k}", fontbuffer=buffer)
+            page.insert_text((56, 320 + 20 * k), f"Pagina {n + 1}, font {k}", fontname=f"F{k}", fontsize=10)
+        pix = fitz.Pixmap(fitz.csRGB, side, side, os.urandom(side * side * 3), False)
+        page.insert_image(fitz.Rect(72, 72, 272, 272), pixmap=pix)
+    return doc.tobytes(garbage=3, deflate=True)
+
+
+def _spool(path: str) -> tempfile.SpooledTemporaryFile:
+    spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_IN_MEMORY)  # noqa: SIM115 – lo chiude il chiamante
+    with open(path, "rb") as fh:
+        shutil.copyfileobj(fh, spool, _SPOOL_IN_MEMORY)
+    spool.seek(0)
+    return spool
+
+
+def via_bytes(path: str, extract: bool) -> None:
+    with _spool(path) as spool:
+        data = spool.read()
+    hashlib.sha256(data).hexdigest()
+    if extract:
+        extract_pdf_properties(data)
+
+
+def via_source(path: str, extract: bool) -> None:
+    with _spool(path) as spool, DocumentSource.from_fileobj(spool, "pdf") as source:
+        source.sha256()
+        if extract:
+            extract_pdf_properties(source.path)
+
+
+def _peak(fn, path: str, extract: bool, size_mb: float) -> str:
+    peak = peak_rss_mb(functools.partial(fn, path, extract))
+    if peak is None:
+        return f"{'-':>9} {'-':>6}"
+    return f"{f'+{peak:.1f}MB':>9} {peak / size_mb:>5.2f}x"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--mb", type=int, default=20, help="dimensione indicativa del PDF grande")
+    ap.add_argument("--pages", type=int, default=150, help="pagine del PDF con molte immagini")
+    args = ap.parse_args()
+
+    settings.PAGE_CACHE_MAX_BYTES = 0
+    print(f"{'PDF':<18} {'strategia':<10} {'tempo':>9}  {'picco ricezione':>16}  {'picco + estrazione':>16}")
+    for corpus, data in (("grande", _big_pdf(args.mb)), ("immagini", _image_pages_pdf(args.pages))):
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            size_mb = os.path.getsize(path) / 2**20
+            label = f"{corpus} {size_mb:.1f}MB"
+            for name, fn in (("bytes", via_bytes), ("source", via_source)):
+                t0 = time.perf_counter()
+                fn(path, True)
+                elapsed = time.perf_counter() - t0
+                print(
+                    f"{label:<18} {name:<10} {elapsed * 1000:>7.0f}ms  {_peak(fn, path, False, size_mb):>16}"
+                    f"  {_peak(fn, path, True, size_mb):>16}"
+                )
+        finally:
+            os.unlink(path)
+
+if __name__ == "__main__":
+    main()
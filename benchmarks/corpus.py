@@ -0,0 +1,319 @@
+"""
+Generatore di documenti sintetici
+=================================
+Produce PDF, DOCX e ODT da usare nei test di parità e nei benchmark, senza
+dover versionare file binari nel repo. Numero di pagine, font, immagini e
+colore sono configurabili; lo stesso insieme di parametri dà sempre lo
+stesso documento.
+"""
+
+from __future__ import annotations
+
+import io
+import struct
+import zipfile
+import zlib
+
+import fitz  # PyMuPDF
+
+PT_PER_CM: float = 72 / 2.54
+
+_LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod "
+    "tempor incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, "
+    "quis nostrud exercitation ullamco laboris nisi ut aliquip ex ea commodo. "
+)
+
+
+def _solid_png(rgb: tuple[int, int, int], side: int = 48) -> bytes:
+    """PNG RGB a tinta unita, senza dipendenze (per DOCX e ODT)."""
+    def chunk(tag: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+    row = b"\x00" + bytes(rgb) * side
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", side, side, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(row * side))
+        + chunk(b"IEND", b"")
+    )
+
+
+def _solid_pixmap(rgb: tuple[int, int, int], side: int = 48) -> fitz.Pixmap:
+    pix = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, side, side), False)
+    pix.set_rect(pix.irect, rgb)
+    return pix
+
+
+def _roman(n: int) -> str:
+    out = ""
+    for value, digits in ((1000, "m"), (900, "cm"), (500, "d"), (400, "cd"), (100, "c"), (90, "xc"),
+                          (50, "l"), (40, "xl"), (10, "x"), (9, "ix"), (5, "v"), (4, "iv"), (1, "i")):
+        count, n = divmod(n, value)
+        out += digits * count
+    return out
+
+
+def make_pdf(
+    pages: int = 10,
+    *,
+    size_cm: tuple[float, float] = (17.0, 24.0),
+    trim_margin_cm: float = 0.0,
+    page_numbers: str = "center",
+    page_number_style: str = "arabic",
+    toc_page: int | None = 1,
+    paragraphs_per_page: int = 6,
+    color_text_every: int = 0,
+    image_every: int = 0,
+    image_rgb: tuple[int, int, int] = (200, 40, 40),
+    odd_size_pages: tuple[int, ...] = (),
+    fonts: tuple[str, ...] = ("tiro",),
+) -> bytes:
+    """
+    Crea un PDF sintetico.
+
+    • `page_numbers`: "center" | "left" | "right" | "none"
+    • `page_number_style`: "arabic" ("7") | "roman" ("vii") | "label" ("Pag. 7")
+    • `toc_page`: pagina (1-based) che contiene la parola "Indice"
+    • `color_text_every` / `image_every`: ogni N pagine testo rosso / immagine
+    • `image_rgb`: colore (uniforme) dell'immagine
+    • `odd_size_pages`: pagine (1-based) in formato A4 anziché `size_cm`
+    • `fonts`: font base-14 del corpo del testo, a rotazione per pagina
+    """
+    doc = fitz.open()
+    w_pt, h_pt = size_cm[0] * PT_PER_CM, size_cm[1] * PT_PER_CM
+    trim_pt = trim_margin_cm * PT_PER_CM
+    image = _solid_pixmap(image_rgb) if image_every else None
+
+    for n in range(1, pages + 1):
+        pw, ph = (595.0, 842.0) if n in odd_size_pages else (w_pt, h_pt)
+        page = doc.new_page(width=pw, height=ph)
+        if trim_pt:
+            page.set_trimbox(fitz.Rect(trim_pt, trim_pt, pw - trim_pt, ph - trim_pt))
+
+        page.insert_text((56, 60), f"Capitolo {n}", fontname="hebo", fontsize=16)
+        if n == toc_page:
+            page.insert_text((56, 84), "Indice", fontname="helv", fontsize=12)
+
+        color = (0.8, 0, 0) if color_text_every and n % color_text_every == 0 else (0, 0, 0)
+        body = fitz.Rect(56, 100, pw - 56, ph - 80)
+        font = fonts[(n - 1) % len(fonts)]
+        page.insert_textbox(body, _LOREM * paragraphs_per_page, fontname=font, fontsize=10, color=color)
+
+        if image is not None and n % image_every == 0:
+            page.insert_image(fitz.Rect(pw - 120, 20, pw - 72, 68), pixmap=image)
+
+        if page_numbers != "none":
+            label = {"arabic": str(n), "roman": _roman(n), "label": f"Pag. {n}"}[page_number_style]
+            tw = fitz.get_text_length(label, fontname="helv", fontsize=9)
+            x = {"center": (pw - tw) / 2, "left": 40, "right": pw - 40 - tw}[page_numbers]
+            page.insert_text((x, ph - 24), label, fontname="helv", fontsize=9)
+
+    doc.set_toc([[1, f"Capitolo {n}", n] for n in range(1, pages + 1)])
+    doc.set_metadata({"title": "Corpus sintetico", "author": "benchmarks"})
+    data = doc.tobytes(garbage=3, deflate=True)
+    doc.close()
+    return data
+
+
+# ------------------------------------------------------------------ #
+# DOCX
+# ------------------------------------------------------------------ #
+_APP_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Properties xmlns="http://schemas.openxmlformats.org/officeDocument/2006/extended-properties">'
+    "<Application>{application}</Application><Pages>{pages}</Pages></Properties>"
+)
+
+
+def _replace_zip_member(data: bytes, name: str, content: bytes) -> bytes:
+    out = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(data)) as src, zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            dst.writestr(item, content if item.filename == name else src.read(item.filename))
+    return out.getvalue()
+
+
+def make_docx(
+    pages: int = 10,
+    *,
+    paragraphs_per_page: int = 4,
+    declared_pages: int | None = None,
+    application: str = "Microsoft Office Word",
+    fonts: tuple[str, ...] = ("Times New Roman",),
+    color_text_every: int = 0,
+    image_every: int = 0,
+    image_rgb: tuple[int, int, int] = (200, 40, 40),
+) -> bytes:
+    """
+    Crea un DOCX con `pages` pagine separate da salti pagina espliciti.
+
+    `declared_pages` scrive `<Pages>` in docProps/app.xml come farebbe Word
+    (default: `pages`; 0 lascia l'app.xml del template python-docx).
+    `fonts`, `color_text_every`, `image_every`, `image_rgb` come in `make_pdf`.
+    """
+    from docx import Document  # dipendenza solo di questo generatore
+    from docx.shared import Cm, RGBColor
+
+    doc = Document()
+    png = _solid_png(image_rgb) if image_every else b""
+    for n in range(1, pages + 1):
+        doc.add_heading(f"Capitolo {n}", level=1)
+        colored = bool(color_text_every) and n % color_text_every == 0
+        for _ in range(paragraphs_per_page):
+            run = doc.add_paragraph().add_run(_LOREM)
+            run.font.name = fonts[(n - 1) % len(fonts)]
+            if colored:
+                run.font.color.rgb = RGBColor(0xCC, 0, 0)
+        if png and n % image_every == 0:
+            doc.add_picture(io.BytesIO(png), width=Cm(2))
+        if n < pages:
+            doc.add_page_break()
+
+    buf = io.BytesIO()
+    doc.save(buf)
+    data = buf.getvalue()
+
+    declared = pages if declared_pages is None else declared_pages
+    if declared:
+        app_xml = _APP_XML.format(application=application, pages=declared).encode()
+        data = _replace_zip_member(data, "docProps/app.xml", app_xml)
+    return data
+
+
+def make_styled_docx(
+    pages: int = 50,
+    *,
+    styles: int = 24,
+    depth: int = 6,
+    paragraphs_per_page: int = 6,
+    runs_per_paragraph: int = 8,
+) -> bytes:
+    """
+    DOCX "pesante di stili": `styles` stili di paragrafo e altrettanti di
+    carattere, in catene `basedOn` lunghe fino a `depth`, che dichiarano a
+    turno solo il font, solo la dimensione o niente (si eredita fino ai
+    docDefaults e al tema). Ogni paragrafo ha `runs_per_paragraph` run con
+    stili di carattere diversi; una run su cinque ha anche la dimensione
+    diretta.
+    """
+    from docx import Document  # dipendenza solo di questo generatore
+    from docx.enum.style import WD_STYLE_TYPE
+    from docx.shared import Pt
+
+    fonts = ("Georgia", "Arial", "Garamond", "Verdana")
+    doc = Document()
+    chains: dict[WD_STYLE_TYPE, list] = {WD_STYLE_TYPE.PARAGRAPH: [], WD_STYLE_TYPE.CHARACTER: []}
+    for kind, prefix in ((WD_STYLE_TYPE.PARAGRAPH, "Corpo"), (WD_STYLE_TYPE.CHARACTER, "Enfasi")):
+        made = chains[kind]
+        for i in range(styles):
+            style = doc.styles.add_style(f"{prefix} {i}", kind)
+            if i % depth:
+                style.base_style = made[i - 1]
+            if i % 3 == 0:
+                style.font.name = fonts[i % len(fonts)]
+            elif i % 3 == 1:
+                style.font.size = Pt(8 + i % 7)
+            made.append(style)
+
+    words = _LOREM.split()
+    n = 0
+    for page in range(1, pages + 1):
+        doc.add_heading(f"Capitolo {page}", level=1)
+        for _ in range(paragraphs_per_page):
+            par = doc.add_paragraph(style=chains[WD_STYLE_TYPE.PARAGRAPH][n % styles])
+            for _ in range(runs_per_paragraph):
+                run = par.add_run(words[n % len(words)] + " ")
+                run.style = chains[WD_STYLE_TYPE.CHARACTER][(n * 7) % styles]
+                if n % 5 == 0:
+                    run.font.size = Pt(10)
+                n += 1
+        if page < pages:
+            doc.add_page_break()
+
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+# ------------------------------------------------------------------ #
+# ODT
+# ------------------------------------------------------------------ #
+def make_odt(
+    pages: int = 10,
+    *,
+    size_cm: tuple[float, float] = (17.0, 24.0),
+    margin_cm: float = 2.0,
+    paragraphs_per_page: int = 4,
+    fonts: tuple[str, ...] = ("Liberation Serif",),
+    color_text_every: int = 0,
+    image_every: int = 0,
+    image_rgb: tuple[int, int, int] = (200, 40, 40),
+) -> bytes:
+    """
+    Crea un ODT con `pages` capitoli, ognuno su una pagina nuova
+    (interruzione prima dell'heading). Parametri come in `make_docx`.
+    """
+    # dipendenza solo di questo generatore
+    from odf.draw import Frame, Image
+    from odf.opendocument import OpenDocumentText
+    from odf.style import (
+        FontFace,
+        MasterPage,
+        PageLayout,
+        PageLayoutProperties,
+        ParagraphProperties,
+        Style,
+        TextProperties,
+    )
+    from odf.text import H, P, Span
+
+    doc = OpenDocumentText()
+    layout = PageLayout(name="Pagina")
+    layout.addElement(PageLayoutProperties(
+        pagewidth=f"{size_cm[0]}cm",
+        pageheight=f"{size_cm[1]}cm",
+        margintop=f"{margin_cm}cm",
+        marginbottom=f"{margin_cm}cm",
+        marginleft=f"{margin_cm}cm",
+        marginright=f"{margin_cm}cm",
+    ))
+    doc.automaticstyles.addElement(layout)
+    doc.masterstyles.addElement(MasterPage(name="Standard", pagelayoutname=layout))
+
+    chapter = Style(name="Capitolo", family="paragraph")
+    chapter.addElement(ParagraphProperties(breakbefore="page"))
+    doc.automaticstyles.addElement(chapter)
+
+    body_styles = []
+    for i, font in enumerate(fonts):
+        doc.fontfacedecls.addElement(FontFace(name=font, fontfamily=font))
+        style = Style(name=f"Corpo{i}", family="paragraph")
+        style.addElement(TextProperties(fontname=font, fontsize="10pt"))
+        doc.automaticstyles.addElement(style)
+        body_styles.append(style)
+
+    red = Style(name="Rosso", family="text")
+    red.addElement(TextProperties(color="#cc0000"))
+    doc.automaticstyles.addElement(red)
+
+    href = doc.addPicture("Pictures/corpus.png", "image/png", _solid_png(image_rgb)) if image_every else None
+
+    for n in range(1, pages + 1):
+        page_break = {"stylename": chapter} if n > 1 else {}
+        doc.text.addElement(H(outlinelevel=1, text=f"Capitolo {n}", **page_break))
+        colored = bool(color_text_every) and n % color_text_every == 0
+        for _ in range(paragraphs_per_page):
+            par = P(stylename=body_styles[(n - 1) % len(body_styles)])
+            par.addElement(Span(stylename=red, text=_LOREM) if colored else Span(text=_LOREM))
+            doc.text.addElement(par)
+        if href and n % image_every == 0:
+            frame = Frame(width="2cm", height="2cm", anchortype="as-char")
+            frame.addElement(Image(href=href))
+            par = P()
+            par.addElement(frame)
+            doc.text.addElement(par)
+
+    buf = io.BytesIO()
+    doc.write(buf)
+    return buf.getvalue()
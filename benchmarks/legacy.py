@@ -0,0 +1,561 @@
+"""
+Implementazioni di riferimento "congelate"
+==========================================
+Copie delle vecchie pipeline di estrazione, mantenute solo come termine di
+paragone per i test di parità e per i benchmark prima/dopo.
+
+NON usarle nel codice applicativo.
+"""
+
+from __future__ import annotations
+
+import io
+from typing import Any
+
+import fitz  # PyMuPDF
+import pdfplumber
+import PyPDF2
+
+from models import (
+    DetailedDocumentAnalysis,
+    DocumentSpec,
+    FontInfo,
+    ImageInfo,
+    ReportFormat,
+    ValidationResult,
+)
+
+CM_PER_PT: float = 0.0352778
+
+
+def _pick_box(page):
+    for attr in ("trimbox", "cropbox", "mediabox"):
+        box = getattr(page, attr, None)
+        if box is not None:
+            return box
+    return page.mediabox
+
+
+# ------------------------------------------------------------------ #
+# PDF: PyPDF2 + pdfplumber + PyMuPDF (tre parse dello stesso file)
+# ------------------------------------------------------------------ #
+def legacy_extract_pdf_properties(file_content: bytes) -> dict[str, Any]:
+    pdf_io = io.BytesIO(file_content)
+    reader = PyPDF2.PdfReader(pdf_io)
+
+    page_boxes: list[dict[str, float]] = []
+    inconsistent_pages: list[dict[str, float]] = []
+
+    for idx, pg in enumerate(reader.pages):
+        box = _pick_box(pg)
+        w_pt, h_pt = float(box.width), float(box.height)
+        page_boxes.append(
+            {"page": idx + 1, "width_cm": w_pt * CM_PER_PT, "height_cm": h_pt * CM_PER_PT}
+        )
+
+    ref_w, ref_h = page_boxes[0]["width_cm"], page_boxes[0]["height_cm"]
+    for pb in page_boxes[1:]:
+        if abs(pb["width_cm"] - ref_w) > 0.1 or abs(pb["height_cm"] - ref_h) > 0.1:
+            inconsistent_pages.append(pb)
+
+    first_pg = reader.pages[0]
+    trim, media = _pick_box(first_pg), first_pg.mediabox
+    margins = {
+        "top_cm": (float(media.upper_right[1]) - float(trim.upper_right[1])) * CM_PER_PT,
+        "bottom_cm": (float(trim.lower_left[1]) - float(media.lower_left[1])) * CM_PER_PT,
+        "left_cm": (float(trim.lower_left[0]) - float(media.lower_left[0])) * CM_PER_PT,
+        "right_cm": (float(media.upper_right[0]) - float(trim.upper_right[0])) * CM_PER_PT,
+    }
+
+    headings: list[str] = []
+    headers: list[str] = []
+    footnotes: list[str] = []
+    page_num_positions: list[str] = []
+
+    with pdfplumber.open(pdf_io) as pdf:
+        h_pt = pdf.pages[0].height
+        w_pt = pdf.pages[0].width
+        bottom_th = 56
+
+        for idx, p in enumerate(pdf.pages):
+            txt = (p.extract_text() or "").lower()
+
+            if any(k in txt for k in ("indice", "table of contents", "contents", "toc", "sommario")):
+                headings.append("TOC detected")
+
+            if idx < 3 and txt:
+                lines = txt.splitlines()
+                headers.append(lines[0].strip())
+                footnotes.append(lines[-1].strip())
+
+            pos = "missing"
+            for w in p.extract_words(keep_blank_chars=False, use_text_flow=True):
+                if w["text"].strip().isdigit() and int(w["text"]) == idx + 1:
+                    if w["bottom"] < h_pt - bottom_th:
+                        continue
+                    cx = (w["x0"] + w["x1"]) / 2
+                    if abs(cx - w_pt / 2) <= w_pt * 0.15:
+                        pos = "center"
+                    elif cx < w_pt * 0.25:
+                        pos = "left"
+                    elif cx > w_pt * 0.75:
+                        pos = "right"
+                    break
+            page_num_positions.append(pos)
+
+    detailed_analysis = legacy_extract_pdf_detailed_analysis(file_content)
+
+    return {
+        "page_size": {"width_cm": ref_w, "height_cm": ref_h},
+        "margins": margins,
+        "has_toc": bool(headings),
+        "headings": headings,
+        "headers": headers,
+        "footnotes": footnotes,
+        "detailed_analysis": detailed_analysis,
+        "page_count": len(reader.pages),
+        "page_num_positions": page_num_positions,
+        "inconsistent_pages": inconsistent_pages,
+        "has_size_inconsistencies": bool(inconsistent_pages),
+    }
+
+
+def legacy_extract_pdf_detailed_analysis(file_content: bytes) -> DetailedDocumentAnalysis:
+    pdf_io = io.BytesIO(file_content)
+    pdf_doc = fitz.open(stream=pdf_io, filetype="pdf")
+
+    fonts: dict[str, FontInfo] = {}
+    toc_structure: list[dict[str, str]] = []
+    paragraph_count = 0
+    image_count = 0
+    total_image_size = 0
+
+    color_pages: set[int] = set()
+    has_color_text = False
+
+    metadata = {k: str(v) for k, v in pdf_doc.metadata.items() if v and k not in ("format", "encryption")}
+
+    for page_num, page in enumerate(pdf_doc):
+        paragraph_count += len(page.get_text("blocks"))
+
+        page_is_color = False
+
+        for img in page.get_images(full=True):
+            xref = img[0]
+            try:
+                base_image = pdf_doc.extract_image(xref)
+                if base_image:
+                    image_count += 1
+                    total_image_size += len(base_image["image"])
+                    page_is_color = True
+            except Exception:
+                pass
+
+        if not page_is_color:
+            try:
+                pix = page.get_pixmap(matrix=fitz.Matrix(0.1, 0.1), colorspace=fitz.csRGB)
+            except TypeError:
+                pix = page.get_pixmap(matrix=fitz.Matrix(0.1, 0.1))
+
+            step = pix.n
+            data = pix.samples
+
+            for i in range(0, len(data), step):
+                if step >= 3:
+                    r, g, b = data[i], data[i + 1], data[i + 2]
+                    if not (r == g == b):
+                        page_is_color = True
+                        break
+
+        for span in page.get_text("dict")["blocks"]:
+            for l in span.get("lines", []):
+                for s in l.get("spans", []):
+                    font_name = s["font"]
+                    font_size = round(float(s["size"]), 1)
+
+                    fi = fonts.setdefault(font_name, FontInfo(sizes=[], count=0, size_counts={}))
+                    fi.count += 1
+                    if font_size not in fi.sizes:
+                        fi.sizes.append(font_size)
+                    fi.size_counts[font_size] = fi.size_counts.get(font_size, 0) + 1
+
+                    if s["color"] not in (0, 0x000000):
+                        has_color_text = True
+                        page_is_color = True
+
+        if page_is_color:
+            color_pages.add(page_num)
+
+    toc = pdf_doc.get_toc()
+    if toc:
+        for level, title, _ in toc:
+            toc_structure.append({"level": str(level), "text": title})
+
+    image_info = None
+    if image_count:
+        image_info = ImageInfo(
+            count=image_count,
+            avg_size_kb=round((total_image_size / image_count) / 1024, 2),
+        )
+
+    return DetailedDocumentAnalysis(
+        fonts=fonts,
+        images=image_info,
+        line_spacing={"Default": 1.2},
+        paragraph_count=paragraph_count,
+        toc_structure=toc_structure,
+        metadata=metadata,
+        has_color_pages=bool(color_pages),
+        has_color_text=has_color_text,
+        colored_elements_count=len(color_pages),
+    )
+
+
+def legacy_samples_have_color(data: bytes, step: int) -> bool:
+    """Il vecchio controllo pixel per pixel di `legacy_extract_pdf_detailed_analysis`."""
+    for i in range(0, len(data), step):
+        if step >= 3:
+            r, g, b = data[i], data[i + 1], data[i + 2]
+            if not (r == g == b):
+                return True
+    return False
+
+
+# ------------------------------------------------------------------ #
+# DOCX: paragrafi e run tramite il modello a oggetti di python-docx
+# ------------------------------------------------------------------ #
+def legacy_extract_docx_detailed_analysis(file_content: bytes) -> DetailedDocumentAnalysis:
+    """
+    Il vecchio giro su `doc.paragraphs` / `par.runs`, con tre correzioni
+    senza le quali non girava o dava valori senza senso: stile "Normal"
+    cercato per nome (`Styles` non ha `.get`), colore confrontato come
+    stringa (RGBColor non è mai uguale a "000000"), interlinea in twip
+    (`spacing.line` è una Length in EMU).
+    """
+    from docx import Document  # dipendenza solo di questo riferimento
+
+    doc = Document(io.BytesIO(file_content))
+    fonts: dict[str, FontInfo] = {}
+    paragraph_count = 0
+    line_spacing: dict[str, float] = {}
+    toc_structure: list[dict[str, str]] = []
+    colored_runs = 0
+
+    try:
+        normal_style = doc.styles["Normal"]
+    except KeyError:
+        normal_style = None
+    default_font_name = (normal_style.font.name if normal_style else None) or "Default"
+    if normal_style and normal_style.font and normal_style.font.size is not None:
+        default_font_size: float = normal_style.font.size.pt
+    else:
+        default_font_size = 11.0
+
+    for par in doc.paragraphs:
+        paragraph_count += 1
+
+        if par.style and par.style.name.startswith("Heading"):
+            lev = int(par.style.name.replace("Heading", "")) if par.style.name != "Heading" else 1
+            toc_structure.append({"level": str(lev), "text": par.text})
+
+        if par._element.pPr is not None and par._element.pPr.spacing is not None:
+            if par._element.pPr.spacing.line is not None:
+                style = par.style.name if par.style else "Unknown"
+                spacing = par._element.pPr.spacing.line.twips / 240
+                line_spacing[style] = (
+                    spacing if style not in line_spacing else (line_spacing[style] + spacing) / 2
+                )
+
+        for run in par.runs:
+            fname = (
+                run.font.name
+                or (par.style.font.name if par.style else None)
+                or default_font_name
+            )
+            if run.font.size:
+                fsize = round(run.font.size.pt, 1)
+            elif par.style and par.style.font.size:
+                fsize = round(par.style.font.size.pt, 1)
+            else:
+                fsize = round(default_font_size, 1)
+
+            if run.font.color and run.font.color.rgb and str(run.font.color.rgb) != "000000":
+                colored_runs += 1
+
+            fi = fonts.setdefault(fname, FontInfo(sizes=[], count=0, size_counts={}))
+            fi.count += 1
+            if fsize not in fi.sizes:
+                fi.sizes.append(fsize)
+            fi.size_counts[fsize] = fi.size_counts.get(fsize, 0) + 1
+
+    img_cnt = img_size = 0
+    for rel in doc.part.rels.values():
+        if rel.target_ref.startswith("media/"):
+            img_cnt += 1
+            if hasattr(rel.target_part, "blob"):
+                img_size += len(rel.target_part.blob)
+
+    metadata: dict[str, str] = {}
+    cp = doc.core_properties
+    if cp.author:
+        metadata["author"] = cp.author
+    if cp.title:
+        metadata["title"] = cp.title
+    if cp.created:
+        metadata["created"] = cp.created.isoformat()
+    if cp.modified:
+        metadata["modified"] = cp.modified.isoformat()
+
+    return DetailedDocumentAnalysis(
+        fonts=fonts,
+        images=ImageInfo(count=img_cnt, avg_size_kb=round((img_size / img_cnt) / 1024, 2)) if img_cnt else None,
+        line_spacing=line_spacing,
+        paragraph_count=paragraph_count,
+        toc_structure=toc_structure,
+        metadata=metadata,
+        has_color_pages=bool(img_cnt),
+        has_color_text=bool(colored_runs),
+        colored_elements_count=colored_runs + img_cnt,
+    )
+
+
+# ------------------------------------------------------------------ #
+# report PDF: stili e layout ricostruiti a ogni chiamata
+# ------------------------------------------------------------------ #
+def legacy_generate_validation_report(
+    validation_result: ValidationResult,
+    spec: DocumentSpec,
+    report_format: ReportFormat,
+) -> bytes:
+    import datetime
+    import json
+    import pathlib
+
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.units import cm
+    from reportlab.platypus import (
+        HRFlowable,
+        Image,
+        PageBreak,
+        Paragraph,
+        SimpleDocTemplate,
+        Spacer,
+        Table,
+    )
+
+    # ── palette aziendale ─────────────────────────────────────────
+    GREEN   = colors.HexColor("#198754")
+    RED     = colors.HexColor("#d32f2f")
+    ACCENT  = colors.HexColor("#0d6efd")     # blu Bootstrap
+    BG_HEAD = colors.HexColor("#f2f4f6")     # grigio molto chiaro
+
+    # ── helper: converte Color → '#RRGGBB' ────────────────────────
+    def hex_(c):
+        """ReportLab Color → HEX string '#RRGGBB'."""
+        return f"#{c.hexval()[2:]}"        # '0xRRGGBB' → '#RRGGBB'
+
+
+    # ── logo opzionale (PNG trasparente 200×60) ───────────────────
+    LOGO_PATH = pathlib.Path(__file__).resolve().parents[1] / "static" / "logo.png"
+    logo_present = LOGO_PATH.exists()
+
+    # ── buffer in memoria ─────────────────────────────────────────
+    buff = io.BytesIO()
+    doc  = SimpleDocTemplate(
+        buff,
+        pagesize=A4,
+        rightMargin=2 * cm,
+        leftMargin=2 * cm,
+        topMargin=2 * cm,
+        bottomMargin=2 * cm,
+    )
+
+    styles = getSampleStyleSheet()
+    styles.add(
+        ParagraphStyle(
+            "TitleXL",
+            parent=styles["Title"],
+            fontSize=24,
+            textColor=ACCENT,
+            alignment=TA_CENTER,
+            spaceAfter=6,
+        )
+    )
+    styles.add(
+        ParagraphStyle(
+            "Small",
+            parent=styles["Normal"],
+            fontSize=9,
+            leading=11,
+        )
+    )
+
+    elements = []
+
+    # ───────────────────── 1) COPERTINA ───────────────────────────
+    if logo_present:
+        elements.append(
+            Image(str(LOGO_PATH), width=6 * cm, height=2 * cm, hAlign="CENTER")
+        )
+        elements.append(Spacer(1, 0.4 * cm))
+
+    elements.append(
+        Paragraph("Document Validation Report", styles["TitleXL"])
+    )
+    elements.append(
+        Paragraph(
+            datetime.datetime.utcnow().strftime("%d %B %Y, %H:%M UTC"),
+            styles["Small"],
+        )
+    )
+    elements.append(Spacer(1, 1.2 * cm))
+
+    # riquadro riassuntivo
+    status_txt  = "CONFORME" if validation_result.is_valid else "NON CONFORME"
+    status_col  = GREEN if validation_result.is_valid else RED
+
+    status_cell = Paragraph(
+        f"<b><font color='{hex_(status_col)}'>{status_txt}</font></b>",
+        styles["Normal"],
+    )
+
+    summary_tbl = Table(
+        [
+            ["Documento", validation_result.document_name],
+            ["Risultato", status_cell],          # ← usa Paragraph
+            ["Specifica", spec.name],
+        ],
+        colWidths=[4 * cm, 11 * cm],
+        hAlign="LEFT",
+        style=[
+            ("BACKGROUND", (0, 0), (-1, 0), BG_HEAD),
+            ("BACKGROUND", (0, 2), (-1, 2), BG_HEAD),
+            ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.grey),
+            ("BOX", (0, 0), (-1, -1), 0.25, colors.grey),
+        ],
+    )
+
+    elements.append(summary_tbl)
+    elements.append(Spacer(1, 1 * cm))
+
+    # ───────────────────── 2) TABELLA VALIDAZIONE ────────────────────
+    elements.append(Paragraph("Dettaglio verifiche", styles["Heading2"]))
+    elements.append(Spacer(1, 0.2 * cm))
+
+    check_rows = [["Verifica", "Esito"]]
+    for check, ok in validation_result.validations.items():
+        pretty = "Num. pagina (footer)" if check == "page_numbers_position" else check.replace("_", " ").capitalize()
+        sign   = "✓" if ok else "✗"
+        color  = GREEN if ok else RED
+
+        esito  = Paragraph(
+            f"<font color='{hex_(color)}'>{sign}</font>",
+            styles["Normal"],
+        )
+        check_rows.append([pretty, esito])      # ← usa Paragraph
+
+    val_table = Table(
+        check_rows,
+        colWidths=[10 * cm, 2 * cm],
+        hAlign="LEFT",
+        style=[
+            ("BACKGROUND", (0, 0), (-1, 0), BG_HEAD),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("ALIGN", (1, 1), (-1, -1), "CENTER"),
+            ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+            ("BOX", (0, 0), (-1, -1), 0.25, colors.grey),
+        ],
+    )
+    elements.append(val_table)
+
+    elements.append(Spacer(1, 0.8 * cm))
+    elements.append(HRFlowable(width="100%", color=colors.grey))
+    elements.append(Spacer(1, 0.8 * cm))
+
+    # ───────────────────── 3) DISTRIBUZIONE FONT ───────────────────
+    if report_format.include_charts and validation_result.detailed_analysis:
+        da = validation_result.detailed_analysis
+        if da.fonts:
+            elements.append(Paragraph("Distribuzione font", styles["Heading2"]))
+            elements.append(Spacer(1, 0.2 * cm))
+
+            # intestazione
+            font_rows = [["Font", "Size pt → occorrenze", "Totale"]]
+
+            # ordina i font per utilizzo discendente
+            for name, info in sorted(
+                da.fonts.items(), key=lambda it: it[1].count, reverse=True
+            ):
+                # ordina le singole dimensioni per occorrenze discendenti e vai a capo
+                size_parts = sorted(
+                    info.size_counts.items(), key=lambda p: p[1], reverse=True
+                )
+                size_lines = "<br/>".join(f"{s} → {c}" for s, c in size_parts)
+
+                # usa Paragraph per supportare <br/>
+                size_para = Paragraph(size_lines, styles["Small"])
+                font_rows.append([name, size_para, str(info.count)])
+
+            font_tbl = Table(
+                font_rows,
+                colWidths=[5 * cm, 7 * cm, 3 * cm],
+                style=[
+                    ("BACKGROUND", (0, 0), (-1, 0), BG_HEAD),
+                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+                    ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+                    ("BOX", (0, 0), (-1, -1), 0.25, colors.grey),
+                    ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, BG_HEAD]),
+                    ("VALIGN", (0, 1), (-1, -1), "TOP"),
+                ],
+            )
+            elements.append(font_tbl)
+            elements.append(Spacer(1, 0.5 * cm))
+
+    # ───────────────────── 4) RACCOMANDAZIONI  ────────────────────
+    if report_format.include_recommendations and not validation_result.is_valid:
+        elements.append(Paragraph("Raccomandazioni", styles["Heading2"]))
+        elements.append(Spacer(1, 0.2 * cm))
+
+        bullets = []
+        if not validation_result.validations["page_size"]:
+            bullets.append(
+                f"Adeguare la dimensione pagina a "
+                f"{spec.page_width_cm} × {spec.page_height_cm} cm."
+            )
+        if not validation_result.validations["margins"]:
+            bullets.append(
+                "Verificare i margini per rispettare i valori specificati."
+            )
+        if not validation_result.validations["has_toc"] and spec.requires_toc:
+            bullets.append("Inserire un indice automatico (TOC).")
+
+        for b in bullets:
+            elements.append(Paragraph("• " + b, styles["Normal"]))
+            elements.append(Spacer(1, 0.1 * cm))
+
+    # ───────────────────── 5) JSON GREZZO (opzionale) ────────────────
+    if report_format.include_detailed_analysis and validation_result.raw_props:
+        elements.append(PageBreak())
+        elements.append(Paragraph("Raw extract (debug)", styles["Heading2"]))
+        elements.append(Spacer(1, 0.2 * cm))
+
+        raw_json = json.dumps(validation_result.raw_props, indent=2, ensure_ascii=False)
+        mono = ParagraphStyle(
+            "Mono",
+            parent=styles["Code"],
+            fontName="Courier",
+            fontSize=7,
+            leading=8,
+        )
+        for line in raw_json.split("\n")[:800]:  # mostra massimo ~800 righe
+            elements.append(Paragraph(line.replace(" ", "&nbsp;"), mono))
+
+    # ───────────────────── COSTRUISCI PDF ──────────────────────────────
+    doc.build(elements)
+    buff.seek(0)
+    return buff.read()
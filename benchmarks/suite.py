@@ -0,0 +1,297 @@
+"""
+Suite di benchmark riproducibile
+================================
+Misura, su documenti sintetici (benchmarks.corpus) PDF, DOCX e ODT di più
+dimensioni, tempo e picco di memoria di ogni componente della pipeline:
+
+• parse_order                 testo ordine → formato e servizi
+• extract                     extract_{pdf,docx,odt}_properties
+• process_document            dispatcher completo (page_count incluso)
+• validate_document           regole sulla spec
+• generate_validation_report  rendering del report PDF (senza cache)
+
+    python -m benchmarks.suite                           # tabella
+    python -m benchmarks.suite --save benchmarks/baseline.json
+    python -m benchmarks.suite --compare benchmarks/baseline.json
+
+Con `--compare` il processo esce con codice 1 se un caso è più lento del
+riferimento oltre `--tolerance` (default 25%). I tempi sono il migliore di
+`--repeat` esecuzioni; il picco di memoria è la crescita della memoria
+residente (VmHWM) durante un'esecuzione separata in un processo figlio
+(fork), quindi include le allocazioni native di MuPDF e lxml. ODT e DOC
+passano da LibreOffice per il conteggio pagine: senza `soffice` nel PATH
+`process_document` viene saltato per quei formati. Un riferimento ha senso
+solo sulla stessa macchina: il file salvato riporta l'ambiente in `meta`.
+La cache per pagina dei PDF è disattivata (PAGE_CACHE_MAX_BYTES=0).
+benchmarks/baseline.json è stato registrato con `--formats pdf docx`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import ctypes
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import time
+from collections.abc import Callable
+from functools import partial
+from importlib import metadata
+from typing import Any
+
+ORDER_TEXT = "Formato: 17x24\n1x Servizio impaginazione testo\nCopie: 300"
+
+# parametri dei documenti: colore e immagini ogni N pagine, due font
+_CORPUS_KWARGS: dict[str, Any] = {"color_text_every": 7, "image_every": 11}
+_FONTS = {
+    "pdf": ("tiro", "helv"),
+    "docx": ("Times New Roman", "Arial"),
+    "odt": ("Liberation Serif", "Liberation Sans"),
+}
+_PACKAGES = ("PyMuPDF", "python-docx", "odfpy", "reportlab", "pydantic", "numpy")
+
+
+# ------------------------------------------------------------------ #
+# misura
+# ------------------------------------------------------------------ #
+def _status_kb(field: str) -> int | None:
+    """Campo di /proc/self/status in KB (VmRSS attuale, VmHWM picco); None fuori da Linux."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _peak_child(fn: Callable[[], Any], conn: Any) -> None:
+    try:
+        # la memoria liberata dalle esecuzioni precedenti torna al sistema,
+        # altrimenti `fn` la riusa senza che l'RSS cresca (solo glibc)
+        with contextlib.suppress(OSError, AttributeError):
+            ctypes.CDLL(None).malloc_trim(0)
+        # il figlio eredita il picco del padre: "5" in clear_refs lo riporta
+        # all'RSS attuale (Linux >= 4.0), altrimenti resta ru_maxrss
+        try:
+            with open("/proc/self/clear_refs", "w", encoding="ascii") as fh:
+                fh.write("5")
+            start = _status_kb("VmRSS")
+        except OSError:
+            start = None
+        fn()
+        peak = _status_kb("VmHWM") if start is not None else None
+        if start is None or peak is None:
+            start, peak = 0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        conn.send(max(0, peak - start))
+    finally:
+        conn.close()
+
+
+def peak_rss_mb(fn: Callable[[], Any]) -> float | None:
+    """
+    Crescita del picco di memoria residente durante `fn`, eseguita in un
+    figlio (fork: la closure non va serializzata, il picco non risente
+    delle misure precedenti). None se `fn` fallisce nel figlio.
+    """
+    ctx = multiprocessing.get_context("fork")
+    recv, send = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_peak_child, args=(fn, send))
+    proc.start()
+    send.close()
+    try:
+        grown_kb = recv.recv()
+    except EOFError:
+        grown_kb = None
+    proc.join()
+    return None if grown_kb is None else round(grown_kb / 1024, 3)
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> dict[str, float | None]:
+    """Migliore e mediana su `repeat` esecuzioni, poi il picco di memoria residente."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return {
+        "best_s": round(min(times), 6),
+        "median_s": round(statistics.median(times), 6),
+        "peak_rss_mb": peak_rss_mb(fn),
+    }
+
+
+def _environment() -> dict[str, Any]:
+    versions: dict[str, str | None] = {}
+    for name in _PACKAGES:
+        try:
+            versions[name] = metadata.version(name)
+        except metadata.PackageNotFoundError:
+            versions[name] = None
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "soffice": shutil.which("soffice") is not None,
+        "packages": versions,
+    }
+
+
+# ------------------------------------------------------------------ #
+# casi
+# ------------------------------------------------------------------ #
+def _make(fmt: str, pages: int) -> bytes:
+    from benchmarks.corpus import make_docx, make_odt, make_pdf
+
+    factory: Any = {"pdf": make_pdf, "docx": make_docx, "odt": make_odt}[fmt]
+    return factory(pages, fonts=_FONTS[fmt], **_CORPUS_KWARGS)
+
+
+def _extractor(fmt: str) -> Callable[[bytes], dict[str, Any]]:
+    from services.extract import (
+        extract_docx_properties,
+        extract_odt_properties,
+        extract_pdf_properties,
+    )
+
+    return {"pdf": extract_pdf_properties, "docx": extract_docx_properties, "odt": extract_odt_properties}[fmt]
+
+
+def _spec():
+    from models import DocumentSpec
+
+    return DocumentSpec(
+        name="Benchmark",
+        page_width_cm=17,
+        page_height_cm=24,
+        top_margin_cm=0,
+        bottom_margin_cm=0,
+        left_margin_cm=0,
+        right_margin_cm=0,
+        min_page_count=40,
+        no_color_pages=True,
+        no_images=True,
+    )
+
+
+def run_suite(formats: list[str], pages: list[int], repeat: int) -> dict[str, dict[str, float | None]]:
+    """Risultati per caso, chiave "<formato>-<pagine>/<componente>"."""
+    from fastapi.encoders import jsonable_encoder
+
+    from models import ReportFormat, ValidationResult
+    from services.extract import process_document
+    from services.reports import ReportRenderer
+    from services.validation import validate_document
+    from utils.order_parser import parse_order
+
+    has_soffice = shutil.which("soffice") is not None
+    renderer = ReportRenderer(cache_max_bytes=0)
+    spec = _spec()
+    results = {"order/parse_order": measure(lambda: parse_order(ORDER_TEXT), repeat * 100)}
+
+    for fmt in formats:
+        for n in pages:
+            case = f"{fmt}-{n}"
+            data = _make(fmt, n)
+            extract = _extractor(fmt)
+            results[f"{case}/extract"] = measure(partial(extract, data), repeat)
+
+            if fmt == "odt" and not has_soffice:
+                print(f"{case}: process_document saltato (soffice non trovato)", file=sys.stderr)
+                doc_props = extract(data)
+                doc_props.setdefault("page_count", n)
+            else:
+                results[f"{case}/process_document"] = measure(partial(process_document, data, fmt), repeat)
+                doc_props = process_document(data, fmt)
+
+            results[f"{case}/validate_document"] = measure(partial(validate_document, doc_props, spec, {}), repeat)
+            validation = validate_document(doc_props, spec, {})
+            result = ValidationResult(
+                document_name=f"{case}.{fmt}",
+                spec_id=spec.id,
+                spec_name=spec.name,
+                file_format=fmt,
+                validations=validation["validations"],
+                is_valid=validation["is_valid"],
+                detailed_analysis=doc_props.get("detailed_analysis"),
+                raw_props=jsonable_encoder(doc_props),
+            )
+            results[f"{case}/generate_validation_report"] = measure(
+                partial(renderer.render, result, spec, ReportFormat()), repeat
+            )
+    return results
+
+
+# ------------------------------------------------------------------ #
+# confronto con il riferimento
+# ------------------------------------------------------------------ #
+def compare(
+    current: dict[str, dict[str, Any]],
+    baseline: dict[str, dict[str, Any]],
+) -> list[tuple[str, float, float, float]]:
+    """Casi presenti in entrambi come (caso, riferimento s, attuale s, rapporto)."""
+    rows = []
+    for case, now in current.items():
+        ref = baseline.get(case)
+        if ref is None or not ref.get("best_s"):
+            continue
+        rows.append((case, ref["best_s"], now["best_s"], now["best_s"] / ref["best_s"]))
+    return rows
+
+
+def _print_results(results: dict[str, dict[str, Any]]) -> None:
+    print(f"{'caso':<42} {'migliore':>10} {'mediana':>10} {'picco RSS':>11}")
+    for case, r in results.items():
+        peak = f"+{r['peak_rss_mb']:.1f}MB" if r["peak_rss_mb"] is not None else "-"
+        print(f"{case:<42} {r['best_s'] * 1000:>8.1f}ms {r['median_s'] * 1000:>8.1f}ms {peak:>11}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--formats", nargs="+", default=["pdf", "docx", "odt"], choices=["pdf", "docx", "odt"])
+    ap.add_argument("--pages", type=int, nargs="+", default=[10, 100])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--save", metavar="FILE", help="scrive i risultati (JSON) come nuovo riferimento")
+    ap.add_argument("--compare", metavar="FILE", help="confronta con un riferimento salvato")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="rallentamento ammesso (0.25 = 25%%)")
+    args = ap.parse_args()
+
+    from config import settings
+
+    # ogni ripetizione deve analizzare davvero il PDF, non leggere la cache per pagina
+    settings.PAGE_CACHE_MAX_BYTES = 0
+    results = run_suite(args.formats, args.pages, args.repeat)
+    _print_results(results)
+
+    if args.save:
+        payload = {"meta": _environment(), "results": results}
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, indent=2, sort_keys=True)
+            fh.write("\n")
+        print(f"riferimento salvato in {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        if baseline.get("meta", {}).get("platform") != platform.platform():
+            print("attenzione: riferimento registrato su un'altra piattaforma", file=sys.stderr)
+        regressions = 0
+        print(f"\n{'caso':<42} {'rif.':>10} {'attuale':>10} {'rapporto':>9}")
+        for case, ref_s, now_s, ratio in compare(results, baseline["results"]):
+            slow = ratio > 1 + args.tolerance
+            regressions += slow
+            flag = "  REGRESSIONE" if slow else ""
+            print(f"{case:<42} {ref_s * 1000:>8.1f}ms {now_s * 1000:>8.1f}ms {ratio:>8.2f}x{flag}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
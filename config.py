@@ -25,6 +25,65 @@ class Settings(BaseSettings):
     ZENDESK_SUBDOMAIN: str | None = None
     ZENDESK_EMAIL: str | None = None
     ZENDESK_API_TOKEN: str | None = None
+    ZENDESK_BASE_URL: str | None = None         # default https://<subdomain>.zendesk.com/api/v2
+    ZENDESK_TIMEOUT: float = 10.0               # secondi per richiesta
+    ZENDESK_MAX_RETRIES: int = 4                # su 429/5xx ed errori di rete
+
+    # --- Pool di estrazione (processi separati) -----------------------
+    EXTRACT_WORKERS: int = 2                    # 0 = niente processi, solo thread
+    EXTRACT_MAX_TASKS_PER_CHILD: int | None = 50  # ricicla il worker dopo N job
+    EXTRACT_JOB_TIMEOUT: float = 120.0          # secondi per singolo job
+    PDF_SHARD_PAGES: int = 100                  # PDF ≥ 2×N pagine: analisi a shard; 0 = off
+
+    # --- Pool LibreOffice (istanze persistenti via UNO) ---------------
+    LO_POOL_SIZE: int = 2                       # 0 = un soffice per conversione
+    LO_POOL_BASE_PORT: int = 0                  # 0 = porte libere scelte a caso
+    LO_POOL_MAX_CONVERSIONS: int = 200          # ricicla l'istanza dopo N conversioni
+    LO_POOL_MAX_RSS_MB: int = 1024              # … o oltre questa memoria residente
+    LO_POOL_MAX_QUEUE: int = 16                 # attese oltre questa soglia → 503
+
+    # --- Validazione batch (/api/validate-batch) -----------------------
+    BATCH_MAX_FILES: int = 50
+    BATCH_CONCURRENCY: int = 2                  # file in lavorazione contemporanea
+    BATCH_MAX_TOTAL_SIZE: int = 500 * 1024 * 1024  # byte per l'intera richiesta
+
+    # --- Job asincroni (/api/jobs) ------------------------------------
+    JOBS_CONCURRENCY: int = 2                   # job con executor proprio in esecuzione insieme
+    JOB_PROGRESS_PAGES: int = 25                # pagine PDF per aggiornamento di avanzamento
+    JOB_CANCEL_GRACE: float = 2.0               # s concessi ai worker prima di terminarli
+    JOB_POLL_INTERVAL: float = 1.0              # s tra due controlli di stato/annullamento
+
+    # --- DOCX: page_count senza render PDF completo ------------------
+    DOCX_FAST_PAGE_COUNT: bool = True           # app.xml → layout LO → render PDF
+
+    # --- Rilevamento pagine a colori ---------------------------------
+    COLOR_TOLERANCE: int = 8                    # scarto max R/G/B per un pixel "grigio"
+
+    # --- Analisi a campione (services.extract.sampling) ----------------
+    SAMPLE_MIN_PAGES: int = 200                 # sotto questa soglia analisi completa
+    SAMPLE_EDGE_PAGES: int = 10                 # prime/ultime pagine sempre analizzate
+    SAMPLE_MIDDLE_PAGES: int = 50               # pagine a caso nel mezzo (una per strato)
+
+    # --- Cache risultati di estrazione (hash file + formato + versione)
+    RESULT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024   # tier in memoria; 0 = off
+    RESULT_CACHE_DIR: str | None = None              # tier su disco opzionale
+    RESULT_CACHE_DISK_MAX_BYTES: int = 1024 * 1024 * 1024
+    PAGE_CACHE_MAX_BYTES: int = 16 * 1024 * 1024     # analisi per pagina PDF, per processo; 0 = off
+
+    # --- Report PDF: cache per (validation_id, ReportFormat) ----------
+    REPORT_CACHE_MAX_BYTES: int = 32 * 1024 * 1024   # 0 = nessuna cache
+    REPORT_RAW_JSON_MAX_BYTES: int = 256 * 1024      # appendice "Raw extract"…
+    REPORT_RAW_JSON_MAX_PAGES: int = 10              # …e al più queste pagine
+
+    # --- Store esiti di validazione (validation_id → risultato + spec)
+    STORE_BACKEND: str = "memory"                    # memory | sqlite | redis
+    STORE_MAX_BYTES: int = 256 * 1024 * 1024         # budget memory/sqlite
+    STORE_TTL_SECONDS: int = 24 * 3600               # scadenza delle voci
+    STORE_SQLITE_PATH: str = "validation_store.sqlite3"
+    STORE_REDIS_URL: str = "redis://localhost:6379/0"
+
+    # --- Tempi per fase (utils.tracing) --------------------------------
+    SERVER_TIMING: bool = False                      # header Server-Timing sulle risposte /api
 
     # Helper per FastAPI
     @property
@@ -59,7 +118,25 @@ class Settings(BaseSettings):
             return v.split('#')[0].replace("\n", "").strip()
         return v
 
-    @field_validator("ACCESS_TOKEN_EXPIRE_MINUTES", "MAX_FILE_SIZE", mode="before")
+    @field_validator(
+        "ACCESS_TOKEN_EXPIRE_MINUTES",
+        "MAX_FILE_SIZE",
+        "EXTRACT_WORKERS",
+        "LO_POOL_SIZE",
+        "RESULT_CACHE_MAX_BYTES",
+        "RESULT_CACHE_DISK_MAX_BYTES",
+        "PAGE_CACHE_MAX_BYTES",
+        "STORE_MAX_BYTES",
+        "REPORT_CACHE_MAX_BYTES",
+        "BATCH_MAX_TOTAL_SIZE",
+        "STORE_TTL_SECONDS",
+        "JOBS_CONCURRENCY",
+        "JOB_PROGRESS_PAGES",
+        "SAMPLE_MIN_PAGES",
+        "SAMPLE_EDGE_PAGES",
+        "SAMPLE_MIDDLE_PAGES",
+        mode="before",
+    )
     @classmethod
     def _parse_int_fields(cls, v):
         if isinstance(v, str):
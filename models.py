@@ -28,6 +28,9 @@ class DocumentSpec(BaseModel):
     requires_footnotes: bool = False
     min_page_count: int = 0
 
+    # Analisi a campione per documenti molto lunghi (services.extract.sampling)
+    sampled_analysis: bool = False
+
     # Metadati
     created_at: datetime = Field(default_factory=datetime.utcnow)
     created_by: str | None = None
@@ -52,6 +55,7 @@ class DocumentSpecCreate(BaseModel):
     requires_header: bool = False
     requires_footnotes: bool = False
     min_page_count: int = 0
+    sampled_analysis: bool = False
 
 class FontInfo(BaseModel):
     sizes: list[float]
@@ -73,6 +77,8 @@ class DetailedDocumentAnalysis(BaseModel):
     has_color_pages: bool = False
     has_color_text: bool = False
     colored_elements_count: int = 0
+    color_pages: list[int] = []          # pagine (1-based) con colore
+    sampling: dict[str, Any] | None = None  # analisi a campione: campione e limiti
 
 class ValidationResult(BaseModel):
     id: str | None = Field(default_factory=lambda: str(uuid.uuid4()))
@@ -82,11 +88,25 @@ class ValidationResult(BaseModel):
     file_format: str
     validations: dict[str, bool]
     is_valid: bool
+    skipped_rules: list[str] = []       # fail-fast: regole non valutate
     detailed_analysis: DetailedDocumentAnalysis | None = None
     user_id: str | None = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     raw_props: dict[str, Any] | None = None
 
+class JobStatus(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    document_name: str
+    status: str = "queued"              # queued | running | done | failed | cancelled
+    stage: str | None = None            # convert | extract | validate
+    pages_done: int | None = None
+    pages_total: int | None = None
+    result_id: str | None = None        # esito salvato, a job concluso
+    error: str | None = None
+    status_code: int | None = None      # status HTTP equivalente dell'errore
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+
 class EmailTemplate(BaseModel):
     id: str | None = Field(default_factory=lambda: str(uuid.uuid4()))
     subject: str
@@ -102,6 +122,7 @@ class ReportFormat(BaseModel):
     include_charts: bool = True
     include_detailed_analysis: bool = True
     include_recommendations: bool = True
+    embed_raw_json: bool = False      # JSON completo come allegato, non impaginato
 
 class Token(BaseModel):
     access_token: str
@@ -1,15 +1,20 @@
 """Public API del sotto-package extract."""
 
-from .async_base import process_document_async  # noqa: F401
+from .async_base import probe_document_async, process_document_async  # noqa: F401
 from .base import process_document  # noqa: F401
+from .cached import process_document_cached  # noqa: F401
 from .docx import extract_docx_properties  # noqa: F401
 from .odt import extract_odt_properties  # noqa: F401
 from .pdf import extract_pdf_properties  # noqa: F401
+from .version import EXTRACTOR_VERSION  # noqa: F401
 
 __all__ = [
     "process_document",
     "process_document_async",
+    "probe_document_async",
+    "process_document_cached",
     "extract_pdf_properties",
     "extract_docx_properties",
     "extract_odt_properties",
+    "EXTRACTOR_VERSION",
 ]
@@ -1,45 +1,185 @@
 """
 Versione asincrona del dispatcher di estrazione proprietà.
+
+Conversione LibreOffice in un thread, estrazione nel pool di processi
+(`services.extract.pool`): l'event-loop resta libero per le altre richieste.
+
+`on_progress`, se passato, riceve (fase, pagine analizzate, pagine totali)
+con fase "convert" | "extract"; i job asincroni (utils.jobs) lo usano per
+l'avanzamento, e con lui l'annullamento interrompe anche worker e `soffice`.
+
+`properties` limita l'estrazione alle proprietà indicate (grafo pigro degli
+estrattori, services.extract.graph): ad esempio il conteggio pagine di
+DOCX/ODT, che può richiedere LibreOffice, parte solo se serve `page_count`.
+
+Il documento resta su file (utils.document_source): ai worker, a
+LibreOffice e al PDF convertito passa il percorso, mai una copia dei byte.
+
+Le fasi "convert", "extract" e "page_count" sono misurate come span della
+traccia corrente (utils.tracing).
 """
 
 from __future__ import annotations
 
-from typing import Any
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from typing import Any, TypeVar
 
 from fastapi import HTTPException
 
-from utils.async_conversion import convert_to_pdf_via_lo_async
+from config import settings
+from utils.async_conversion import convert_to_pdf_via_lo_async, count_pages_via_lo_async
 from utils.conversion import extract_pdf_page_count
+from utils.document_source import DocumentSource
+from utils.metrics import PDF_PAGE_CACHE_PAGES
+from utils.tracing import span
+
+from .docx import read_docx_declared_pages
+from .pool import get_extraction_pool
+
+# (fase, pagine analizzate, pagine totali)
+ProgressCallback = Callable[[str, int | None, int | None], None]
+
+_T = TypeVar("_T")
+
+# proprietà economiche per la validazione fail-fast
+GEOMETRY_PROPERTIES: tuple[str, ...] = (
+    "page_size",
+    "margins",
+    "inconsistent_pages",
+    "has_size_inconsistencies",
+    "page_count",
+    "page_count_method",
+)
+
+
+async def _timed(stage: str, aw: Awaitable[_T]) -> _T:
+    with span(stage):
+        return await aw
+
+
+def _as_source(document: bytes | DocumentSource, fmt: str) -> tuple[DocumentSource, bool]:
+    """(sorgente, da chiudere qui): i byte vengono scritti su file una volta."""
+    if isinstance(document, DocumentSource):
+        return document, False
+    return DocumentSource.from_bytes(document, fmt), True
+
 
-from .docx import extract_docx_properties
-from .odt import extract_odt_properties
-from .pdf import extract_pdf_properties
+def _observe_page_cache(doc_props: dict[str, Any]) -> dict[str, Any]:
+    """Pagine riusate / rianalizzate dalla cache per pagina (solo PDF)."""
+    stats = doc_props.get("page_cache")
+    if stats:
+        PDF_PAGE_CACHE_PAGES.labels(outcome="reused").inc(stats["reused"])
+        PDF_PAGE_CACHE_PAGES.labels(outcome="analysed").inc(stats["analysed"])
+    return doc_props
 
 
-async def process_document_async(file_content: bytes, file_format: str) -> dict[str, Any]:
+async def _rendered_page_count(source: DocumentSource) -> tuple[int, str]:
+    """page_count dal PDF completo generato da LibreOffice (percorso lento)."""
+    with await convert_to_pdf_via_lo_async(source) as pdf:
+        return await asyncio.to_thread(extract_pdf_page_count, pdf.path), "pdf_render"
+
+
+async def _docx_page_count(source: DocumentSource) -> tuple[int, str]:
+    """
+    page_count DOCX, dal più economico al più costoso:
+    app.xml attendibile → layout LibreOffice (senza export) → render PDF.
+    """
+    if settings.DOCX_FAST_PAGE_COUNT:
+        declared = await asyncio.to_thread(read_docx_declared_pages, source.path)
+        if declared is not None:
+            return declared, "app_xml"
+        counted = await count_pages_via_lo_async(source)
+        if counted is not None:
+            return counted, "lo_layout"
+    return await _rendered_page_count(source)
+
+
+async def process_document_async(
+    document: bytes | DocumentSource,
+    file_format: str,
+    *,
+    on_progress: ProgressCallback | None = None,
+    properties: Iterable[str] | None = None,
+    sample: bool = False,
+) -> dict[str, Any]:
+    """
+    `sample` chiede l'analisi a campione (services.extract.sampling).
+
+    `document` può essere un `DocumentSource` (consigliato: estrattori e
+    LibreOffice lo leggono dal file, senza copie in memoria) oppure i byte
+    del file, scritti su un file temporaneo per la durata dell'estrazione.
+    """
     fmt = file_format.lower()
+    if fmt not in ("doc", "docx", "odt", "pdf"):
+        raise HTTPException(status_code=400, detail=f"Unsupported file format: {file_format}")
+    if properties is not None:
+        properties = tuple(properties)
+    pool = get_extraction_pool()
+
+    def stage(name: str) -> None:
+        if on_progress is not None:
+            on_progress(name, None, None)
+
+    def pages(done: int, total: int) -> None:
+        on_progress("extract", done, total)  # type: ignore[misc]
 
-    # ---------- .DOC binario ----------------------------------------
-    if fmt == "doc":
-        pdf_bytes = await convert_to_pdf_via_lo_async(file_content, "doc")
-        return extract_pdf_properties(pdf_bytes)
-
-    # ---------- .DOCX -----------------------------------------------
-    if fmt == "docx":
-        doc_props = extract_docx_properties(file_content)
-        pdf_bytes = await convert_to_pdf_via_lo_async(file_content, "docx")
-        doc_props["page_count"] = extract_pdf_page_count(pdf_bytes)
-        return doc_props
-
-    # ---------- .ODT -------------------------------------------------
-    if fmt == "odt":
-        odt_props = extract_odt_properties(file_content)
-        pdf_bytes = await convert_to_pdf_via_lo_async(file_content, "odt")
-        odt_props["page_count"] = extract_pdf_page_count(pdf_bytes)
-        return odt_props
-
-    # ---------- .PDF -------------------------------------------------
-    if fmt == "pdf":
-        return extract_pdf_properties(file_content)
-
-    raise HTTPException(status_code=400, detail=f"Unsupported file format: {file_format}")
+    run_kwargs: dict[str, Any] = {"properties": properties, "sample": sample}
+    if on_progress is not None:
+        run_kwargs.update(on_pages=pages, kill_on_cancel=True)
+
+    source, owned = _as_source(document, fmt)
+    try:
+        # ---------- .DOC binario ------------------------------------
+        if fmt == "doc":
+            stage("convert")
+            with await _timed("convert", convert_to_pdf_via_lo_async(source)) as pdf:
+                stage("extract")
+                doc_props = await _timed("extract", pool.run("pdf", pdf.path, **run_kwargs))
+            doc_props["page_count_method"] = "pdf_render"
+            return _observe_page_cache(doc_props)
+
+        # ---------- .DOCX / .ODT ------------------------------------
+        # estrazione e conteggio pagine in parallelo
+        if fmt in ("docx", "odt"):
+            stage("extract")
+            if properties is not None and "page_count" not in properties:
+                return await _timed("extract", pool.run(fmt, source.path, **run_kwargs))
+            page_count = _docx_page_count(source) if fmt == "docx" else _rendered_page_count(source)
+            doc_props, (count, method) = await asyncio.gather(
+                _timed("extract", pool.run(fmt, source.path, **run_kwargs)),
+                _timed("page_count", page_count),
+            )
+            doc_props["page_count"] = count
+            doc_props["page_count_method"] = method
+            return doc_props
+
+        # ---------- .PDF ---------------------------------------------
+        stage("extract")
+        return _observe_page_cache(await _timed("extract", pool.run("pdf", source.path, **run_kwargs)))
+    finally:
+        if owned:
+            source.close()
+
+
+async def probe_document_async(document: bytes | DocumentSource, file_format: str) -> dict[str, Any] | None:
+    """
+    Proprietà economiche (formato, margini, page_count se noto senza
+    LibreOffice) per la validazione fail-fast; None se il formato non ha un
+    probe (.doc e .odt passano comunque da LibreOffice).
+    """
+    fmt = file_format.lower()
+    if fmt not in ("pdf", "docx"):
+        return None
+    source, owned = _as_source(document, fmt)
+    try:
+        props = await get_extraction_pool().run(fmt, source.path, properties=GEOMETRY_PROPERTIES)
+        if fmt == "docx" and settings.DOCX_FAST_PAGE_COUNT:
+            declared = await asyncio.to_thread(read_docx_declared_pages, source.path)
+            if declared is not None:
+                props["page_count"] = declared
+                props["page_count_method"] = "app_xml"
+        return props
+    finally:
+        if owned:
+            source.close()
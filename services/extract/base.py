@@ -8,9 +8,10 @@ from typing import Any
 
 from fastapi import HTTPException
 
+from config import settings
 from utils.conversion import convert_to_pdf_via_lo, extract_pdf_page_count
 
-from .docx import extract_docx_properties
+from .docx import extract_docx_properties, read_docx_declared_pages
 from .odt import extract_odt_properties
 from .pdf import extract_pdf_properties
 
@@ -21,21 +22,30 @@ def process_document(file_content: bytes, file_format: str) -> dict[str, Any]:
 
     Supporta: pdf, docx, odt, doc (binario).
 
-    Per doc/docx/odt converte in PDF con LibreOffice per ricavare il numero
-    di pagine.
+    Per doc/odt converte in PDF con LibreOffice per ricavare il numero
+    di pagine; per docx prova prima il valore dichiarato in app.xml.
+    `page_count_method` registra come è stato ottenuto il conteggio.
     """
     fmt = file_format.lower()
 
     # ---------- .DOC binario ----------------------------------------
     if fmt == "doc":
         pdf_bytes = convert_to_pdf_via_lo(file_content, "doc")
-        return extract_pdf_properties(pdf_bytes)
+        doc_props = extract_pdf_properties(pdf_bytes)
+        doc_props["page_count_method"] = "pdf_render"
+        return doc_props
 
     # ---------- .DOCX -----------------------------------------------
     if fmt == "docx":
         doc_props = extract_docx_properties(file_content)
-        pdf_bytes = convert_to_pdf_via_lo(file_content, "docx")
-        doc_props["page_count"] = extract_pdf_page_count(pdf_bytes)
+        declared = read_docx_declared_pages(file_content) if settings.DOCX_FAST_PAGE_COUNT else None
+        if declared is not None:
+            doc_props["page_count"] = declared
+            doc_props["page_count_method"] = "app_xml"
+        else:
+            pdf_bytes = convert_to_pdf_via_lo(file_content, "docx")
+            doc_props["page_count"] = extract_pdf_page_count(pdf_bytes)
+            doc_props["page_count_method"] = "pdf_render"
         return doc_props
 
     # ---------- .ODT -------------------------------------------------
@@ -43,6 +53,7 @@ def process_document(file_content: bytes, file_format: str) -> dict[str, Any]:
         odt_props = extract_odt_properties(file_content)
         pdf_bytes = convert_to_pdf_via_lo(file_content, "odt")
         odt_props["page_count"] = extract_pdf_page_count(pdf_bytes)
+        odt_props["page_count_method"] = "pdf_render"
         return odt_props
 
     # ---------- .PDF -------------------------------------------------
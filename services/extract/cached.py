@@ -0,0 +1,114 @@
+"""
+Estrazione con cache content-addressed
+======================================
+Le proprietà estratte dipendono solo da (byte del file, formato, versione
+degli estrattori): la spec dell'ordine entra in gioco dopo, in
+`validate_document`. Un manoscritto ricaricato più volte viene quindi
+estratto (e convertito con LibreOffice) una volta sola.
+
+Un'estrazione parziale (`properties`) o a campione (`sample`) ha una voce
+propria; se però esiste già quella completa viene usata quella.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+from collections.abc import Iterable
+from typing import Any
+
+from config import settings
+from utils.document_source import DocumentSource
+from utils.logging import get_logger
+from utils.result_cache import ResultCache
+from utils.tracing import span
+
+from .async_base import ProgressCallback, process_document_async
+from .serialize import dumps_props, loads_props
+from .version import EXTRACTOR_VERSION
+
+log = get_logger("document_validator")
+
+_cache: ResultCache | None = None
+
+
+def get_result_cache() -> ResultCache | None:
+    """Cache condivisa dei `doc_props`, None se RESULT_CACHE_MAX_BYTES=0."""
+    global _cache
+    if _cache is None and settings.RESULT_CACHE_MAX_BYTES > 0:
+        _cache = ResultCache(
+            "doc_props",
+            settings.RESULT_CACHE_MAX_BYTES,
+            disk_dir=settings.RESULT_CACHE_DIR,
+            disk_max_bytes=settings.RESULT_CACHE_DISK_MAX_BYTES,
+        )
+    return _cache
+
+
+def props_cache_key(
+    digest: str,
+    file_format: str,
+    properties: Iterable[str] | None = None,
+    *,
+    sample: bool = False,
+) -> str:
+    """
+    Chiave = (SHA-256 del file, formato, versione estrattori, COLOR_TOLERANCE
+    [, campione e suoi parametri][, proprietà]): cambiare la tolleranza cambia
+    `color_pages`, cambiare i SAMPLE_* cambia il campione e le stime.
+    """
+    key = f"{EXTRACTOR_VERSION}:{settings.COLOR_TOLERANCE}:{file_format.lower()}:{digest}"
+    if sample:
+        key += f":sample:{settings.SAMPLE_EDGE_PAGES}:{settings.SAMPLE_MIDDLE_PAGES}:{settings.SAMPLE_MIN_PAGES}"
+    if properties is None:
+        return key
+    subset = hashlib.sha256(",".join(sorted(set(properties))).encode()).hexdigest()[:16]
+    return f"{key}:{subset}"
+
+
+async def process_document_cached(
+    document: bytes | DocumentSource,
+    file_format: str,
+    *,
+    digest: str | None = None,
+    on_progress: ProgressCallback | None = None,
+    properties: Iterable[str] | None = None,
+    sample: bool = False,
+) -> dict[str, Any]:
+    """
+    Come `process_document_async`, ma consulta prima la cache.
+    `digest` (SHA-256 esadecimale) evita di ricalcolare l'hash se il
+    chiamante lo ha già; altrimenti viene calcolato sul file (mmap) se
+    `document` è un `DocumentSource`.
+    """
+    if properties is not None:
+        properties = tuple(properties)
+    cache = get_result_cache()
+    if cache is None:
+        return await process_document_async(
+            document, file_format, on_progress=on_progress, properties=properties, sample=sample
+        )
+
+    if digest is None:
+        if isinstance(document, DocumentSource):
+            digest = await asyncio.to_thread(document.sha256)
+        else:
+            digest = hashlib.sha256(document).hexdigest()
+    keys = [props_cache_key(digest, file_format)]
+    if sample:
+        keys.append(props_cache_key(digest, file_format, sample=True))
+    if properties is not None:
+        keys.append(props_cache_key(digest, file_format, properties, sample=sample))
+
+    with span("cache"):
+        for key in keys:
+            cached = await asyncio.to_thread(cache.get, key)
+            if cached is not None:
+                log.info("doc_props_cache_hit", file_format=file_format, sha256=digest)
+                return loads_props(cached)
+
+    doc_props = await process_document_async(
+        document, file_format, on_progress=on_progress, properties=properties, sample=sample
+    )
+    await asyncio.to_thread(cache.put, key, dumps_props(doc_props))
+    return doc_props
@@ -4,20 +4,36 @@ Estrattore DOCX
 Contiene:
 • extract_docx_properties
 • extract_docx_detailed_analysis
-Usa python-docx.
+• read_docx_declared_pages (page_count veloce da docProps/app.xml)
+Usa python-docx per sezioni, header, note e media; paragrafi e run si
+leggono in streaming (services.extract.docx_stream). Le proprietà di
+`doc_props` sono nodi di un grafo pigro (services.extract.graph).
 """
 
 from __future__ import annotations
 
 import io
-from typing import Any
+import zipfile
+from collections.abc import Iterable
+from typing import IO, Any
+from xml.etree import ElementTree as ET
 
 from docx import Document  # funzione factory
 from docx.document import Document as _DocxDocument  # vero type per mypy
 from docx.shared import Length
+from lxml import etree
 
 from models import DetailedDocumentAnalysis, FontInfo, ImageInfo
 
+from .docx_stream import DocxPackage, Paragraph, read_paragraph
+from .graph import PropertyGraph
+from .sampling import StreamSample, count_bounds, sampling_report, scale
+
+# modalità campione: il DOCX non ha pagine, l'unità è un blocco di paragrafi
+_SAMPLE_BLOCK_PARAGRAPHS = 20
+# `w:sz` assente anche in stili e docDefaults: 10 pt (ECMA-376)
+_DEFAULT_FONT_SIZE = 10.0
+
 
 # ------------------------------------------------------------------ #
 # helpers tipo-safe
@@ -35,18 +51,63 @@ def _len_or_default(val: Length | None) -> float:  # alias leggibile
 
 
 # ------------------------------------------------------------------ #
-def extract_docx_properties(file_content: bytes) -> dict[str, Any]:
+# page_count dichiarato (docProps/app.xml)
+# ------------------------------------------------------------------ #
+_EP_NS = {"ep": "http://schemas.openxmlformats.org/officeDocument/2006/extended-properties"}
+# applicazioni che impaginano davvero il documento prima di salvarlo
+_LAYOUT_APPS = ("Microsoft Office Word", "LibreOffice")
+# marcatori (byte) di un salto pagina forzato in word/document.xml
+_HARD_BREAK_MARKERS = (
+    b'w:type="page"',          # <w:br w:type="page"/>
+    b"<w:pageBreakBefore",
+    b'w:val="nextPage"',       # interruzioni di sezione
+    b'w:val="oddPage"',
+    b'w:val="evenPage"',
+)
+
+
+def _stream(source: bytes | str) -> IO[bytes] | str:
+    """Percorso così com'è (lettura pigra dal file), byte in un BytesIO."""
+    return io.BytesIO(source) if isinstance(source, bytes) else source
+
+
+def read_docx_declared_pages(file_content: bytes | str) -> int | None:
     """
-    Estrae:
-    • dimensione pagina + margini
-    • intestazioni / piè di pagina
-    • TOC (heading×livello)
-    • inconsistenze formato sezione-sezione
+    Ritorna `<Pages>` di docProps/app.xml solo se attendibile, altrimenti None:
+    • scritto da un'applicazione che impagina (Word, LibreOffice)
+    • non inferiore ai salti pagina forzati + 1 (es. template python-docx
+      con `<Pages>1</Pages>` mai aggiornato)
+    • coerente con i marcatori `w:lastRenderedPageBreak` lasciati da Word
     """
-    # NB: Document() restituisce _DocxDocument (vero type)
-    doc: _DocxDocument = Document(io.BytesIO(file_content))  # type: ignore[call-arg]
+    try:
+        with zipfile.ZipFile(_stream(file_content)) as zf:
+            app = ET.fromstring(zf.read("docProps/app.xml"))
+            body = zf.read("word/document.xml")
+    except (KeyError, zipfile.BadZipFile, ET.ParseError):
+        return None
 
-    # ---------- dimensioni + sezioni -------------------------------
+    application = (app.findtext("ep:Application", default="", namespaces=_EP_NS) or "").strip()
+    try:
+        pages = int(app.findtext("ep:Pages", default="", namespaces=_EP_NS) or "")
+    except ValueError:
+        return None
+    if pages <= 0 or not application.startswith(_LAYOUT_APPS):
+        return None
+
+    hard_breaks = sum(body.count(m) for m in _HARD_BREAK_MARKERS)
+    if pages < hard_breaks + 1:
+        return None
+
+    rendered = body.count(b"<w:lastRenderedPageBreak")
+    if rendered and abs(pages - (rendered + 1)) > max(2, pages // 20):
+        return None
+
+    return pages
+
+
+# ------------------------------------------------------------------ #
+def _section_geometry(doc: _DocxDocument) -> dict[str, Any]:
+    """Formato e margini della 1ª sezione + sezioni di formato diverso."""
     section_data: list[dict[str, Any]] = []
     inconsistent_sections: list[dict[str, str]] = []
 
@@ -68,7 +129,6 @@ def extract_docx_properties(file_content: bytes) -> dict[str, Any]:
 
     first = section_data[0]
     ref_w, ref_h = first["width_cm"], first["height_cm"]
-    margins = first["margins"]
 
     for info in section_data[1:]:
         if abs(info["width_cm"] - ref_w) > 0.1 or abs(info["height_cm"] - ref_h) > 0.1:
@@ -79,97 +139,87 @@ def extract_docx_properties(file_content: bytes) -> dict[str, Any]:
                 }
             )
 
-    # ---------- header / footnote ----------------------------------
-    headers: list[str] = []
-    footnotes_texts: list[str] = []
+    return {
+        "page_size": {"width_cm": ref_w, "height_cm": ref_h},
+        "margins": first["margins"],
+        "all_section_data": section_data,
+        "inconsistent_sections": inconsistent_sections,
+        "has_size_inconsistencies": bool(inconsistent_sections),
+    }
+
+
 
+
+def _headers(doc: _DocxDocument) -> list[str]:
+    headers: list[str] = []
     for section in doc.sections:
         if section.header:  # può essere None
             text = "\n".join(p.text for p in section.header.paragraphs if p.text.strip())
             if text:
                 headers.append(text)
+    return headers
 
+
+def _footnotes(doc: _DocxDocument) -> list[str]:
+    footnotes_texts: list[str] = []
     fp = getattr(doc.part, "footnotes_part", None)
     if fp:
         for fn in fp.footnotes:
             txt = "\n".join(p.text for p in fn.paragraphs if p.text.strip())
             if txt:
                 footnotes_texts.append(txt)
+    return footnotes_texts
 
-    # ---------- TOC / headings -------------------------------------
-    headings = [p.text for p in doc.paragraphs if p.style and p.style.name.startswith("Heading")]
-    has_toc = bool(headings)
 
-    detailed_analysis = extract_docx_detailed_analysis(doc)
-
-    return {
-        "page_size": {"width_cm": ref_w, "height_cm": ref_h},
-        "margins": margins,
-        "has_toc": has_toc,
-        "headings": headings,
-        "headers": headers,
-        "footnotes": footnotes_texts,
-        "detailed_analysis": detailed_analysis,
-        "all_section_data": section_data,
-        "inconsistent_sections": inconsistent_sections,
-        "has_size_inconsistencies": bool(inconsistent_sections),
-    }
+def _heading_level(name: str) -> int:
+    """"Heading 2" → 2; "Heading" o suffissi non numerici → 1."""
+    try:
+        return int(name.replace("Heading", "")) if name != "Heading" else 1
+    except ValueError:
+        return 1
 
 
-# ------------------------------------------------------------------ #
-def extract_docx_detailed_analysis(doc: _DocxDocument) -> DetailedDocumentAnalysis:
+def _paragraph_pass(file_content: bytes | str, *, sample: bool = False) -> dict[str, Any]:
     """
-    Font + immagini + colore ecc. (codice in gran parte invariato,
-    con qualche assert per soddisfare mypy).
+    Un solo giro in streaming su paragrafi e run (services.extract.docx_stream,
+    senza l'albero di python-docx): font, interlinea, struttura TOC, testo
+    colorato.
+
+    Con `sample` run e interlinea si leggono solo nei blocchi di
+    _SAMPLE_BLOCK_PARAGRAPHS paragrafi del campione stratificato, scelto
+    durante lo stesso giro (sampling.StreamSample): i paragrafi dei blocchi
+    che possono ancora finire nel campione restano da parte e le loro run si
+    leggono alla fine. Conteggi dei font stimati, testo colorato con limiti
+    di confidenza in "sampling".
     """
     fonts: dict[str, FontInfo] = {}
     paragraph_count = 0
     line_spacing: dict[str, float] = {}
     toc_structure: list[dict[str, str]] = []
-    has_color_text = False
-    colored_elements_count = 0
-
-    # potrebbero mancare → usa default
-    normal_style = doc.styles.get("Normal", None)
-    default_font_name = getattr(normal_style, "font", None)
-    default_font_name = default_font_name.name if default_font_name else "Default"
-    if normal_style and normal_style.font and normal_style.font.size is not None:
-        default_font_size: float = normal_style.font.size.pt  # type: ignore[assignment]
-    else:
-        default_font_size = 11.0
-
-
-    for par in doc.paragraphs:
-        paragraph_count += 1
-
-        if par._element.pPr is not None and par._element.pPr.spacing is not None:
-            if par._element.pPr.spacing.line is not None:
-                style = par.style.name if par.style else "Unknown"
-                spacing = par._element.pPr.spacing.line / 240
-                line_spacing[style] = (
-                    spacing if style not in line_spacing else (line_spacing[style] + spacing) / 2
-                )
-
-        if par.style and par.style.name.startswith("Heading"):
-            lev = int(par.style.name.replace("Heading", "")) if par.style.name != "Heading" else 1
-            toc_structure.append({"level": str(lev), "text": par.text})
-
-        for run in par.runs:
-            fname = (
-                run.font.name
-                or (par.style.font.name if par.style else None)
-                or default_font_name
+    colored_runs = 0
+    colored_blocks: set[int] = set()
+    analysed = 0
+
+    def read_runs(par: Paragraph, block: int) -> None:
+        nonlocal analysed, colored_runs
+        analysed += 1
+        style = par.style
+        if par.line is not None:
+            # stile senza `w:name` in styles.xml: vale il suo id
+            name = (style.name or style.style_id or "Unknown") if style else "Unknown"
+            spacing = par.line / 240
+            line_spacing[name] = (
+                spacing if name not in line_spacing else (line_spacing[name] + spacing) / 2
             )
-            if run.font.size:
-                fsize = round(run.font.size.pt, 1)
-            elif par.style and par.style.font.size:
-                fsize = round(par.style.font.size.pt, 1)
-            else:
-                fsize = round(default_font_size, 1)
 
-            if run.font.color and run.font.color.rgb and run.font.color.rgb != "000000":
-                has_color_text = True
-                colored_elements_count += 1
+        for run in par.runs or ():
+            # font e dimensione già risolti su stili, docDefaults e tema
+            fname = run.font_name or "Default"
+            fsize = round(run.font_size or _DEFAULT_FONT_SIZE, 1)
+
+            if run.color and run.color != "000000":
+                colored_runs += 1
+                colored_blocks.add(block)
 
             fi = fonts.setdefault(fname, FontInfo(sizes=[], count=0, size_counts={}))
             fi.count += 1
@@ -177,25 +227,66 @@ def extract_docx_detailed_analysis(doc: _DocxDocument) -> DetailedDocumentAnalys
                 fi.sizes.append(fsize)
             fi.size_counts[fsize] = fi.size_counts.get(fsize, 0) + 1
 
-    # immagini
+    stream: StreamSample[list[etree._Element]] | None = StreamSample() if sample else None
+    block_paragraphs: list[etree._Element] = []
+    with DocxPackage(_stream(file_content)) as package:
+        styles = package.styles()
+        for i, p in enumerate(package.paragraph_elements()):
+            paragraph_count += 1
+            par = read_paragraph(p, styles, with_runs=stream is None)
+            style = par.style
+
+            if style and style.name and style.name.startswith("Heading"):
+                toc_structure.append({"level": str(_heading_level(style.name)), "text": par.text})
+
+            if stream is None:
+                read_runs(par, i // _SAMPLE_BLOCK_PARAGRAPHS)
+                continue
+            if i % _SAMPLE_BLOCK_PARAGRAPHS == 0:
+                block_paragraphs = []
+                stream.add(block_paragraphs)
+            block_paragraphs.append(p)
+
+        chosen, blocks = None, 0
+        if stream is not None:
+            (chosen, held), blocks = stream.finish(), stream.total
+            for block, paragraphs in held.items():
+                for p in paragraphs:
+                    read_runs(read_paragraph(p, styles), block)
+
+    result: dict[str, Any] = {
+        "fonts": fonts,
+        "line_spacing": line_spacing,
+        "toc_structure": toc_structure,
+        "paragraph_count": paragraph_count,
+        "colored_runs": colored_runs,
+    }
+    if chosen is not None:
+        for fi in fonts.values():  # stime sul totale dei paragrafi
+            fi.size_counts = {size: scale(n, analysed, paragraph_count) for size, n in fi.size_counts.items()}
+            fi.count = sum(fi.size_counts.values())
+        report = sampling_report(
+            "paragraph_block", blocks, chosen,
+            {"color_text_blocks": count_bounds(colored_blocks, chosen, blocks)},
+        )
+        report["estimated"] = list(DOCX_SAMPLED_PROPERTIES)
+        result["sampling"] = report
+    return result
+
+
+def _media(doc: _DocxDocument) -> dict[str, int]:
+    """Immagini incorporate (word/media): quante e quanti byte in tutto."""
     img_cnt = 0
     img_size = 0
-    has_color_pages = False
     for rel in doc.part.rels.values():
         if rel.target_ref.startswith("media/"):
             img_cnt += 1
             if hasattr(rel.target_part, "blob"):
                 img_size += len(rel.target_part.blob)
-            has_color_pages = True
-            colored_elements_count += 1
+    return {"count": img_cnt, "size": img_size}
 
-    img_info = (
-        ImageInfo(count=img_cnt, avg_size_kb=round((img_size / img_cnt) / 1024, 2))
-        if img_cnt
-        else None
-    )
 
-    # metadati
+def _metadata(doc: _DocxDocument) -> dict[str, str]:
     md: dict[str, str] = {}
     cp = doc.core_properties
     if cp.author:
@@ -206,15 +297,118 @@ def extract_docx_detailed_analysis(doc: _DocxDocument) -> DetailedDocumentAnalys
         md["created"] = cp.created.isoformat()
     if cp.modified:
         md["modified"] = cp.modified.isoformat()
+    return md
+
+
+# ------------------------------------------------------------------ #
+# grafo delle proprietà
+# ------------------------------------------------------------------ #
+# `doc_props` completo di `extract_docx_properties`, in quest'ordine
+DOCX_PROPERTIES: tuple[str, ...] = (
+    "page_size",
+    "margins",
+    "has_toc",
+    "headings",
+    "headers",
+    "footnotes",
+    "detailed_analysis",
+    "all_section_data",
+    "inconsistent_sections",
+    "has_size_inconsistencies",
+    "has_color_pages",
+    "has_color_text",
+    "image_count",
+)
+
+# proprietà che in modalità campione sono stime (services.extract.sampling)
+DOCX_SAMPLED_PROPERTIES: tuple[str, ...] = ("detailed_analysis", "has_color_text")
+
+
+def _docx_graph(file_content: bytes | str, *, sample: bool = False) -> PropertyGraph:
+    """
+    Proprietà di `doc_props` come nodi pigri. Il parsing di python-docx
+    (nodo `document`) serve a sezioni, header, note, media e metadati;
+    paragrafi e run si leggono in streaming (nodo `paragraphs`), a campione
+    con `sample`.
+    """
+    g = PropertyGraph()
+    # NB: Document() restituisce _DocxDocument (vero type)
+    g.node("document")(lambda: Document(_stream(file_content)))  # type: ignore[arg-type]
+
+    # ---------- dimensioni + sezioni -------------------------------
+    g.node("geometry", "document")(_section_geometry)
+    for key in ("page_size", "margins", "all_section_data", "inconsistent_sections", "has_size_inconsistencies"):
+        g.node(key, "geometry")(lambda geo, key=key: geo[key])
+
+    # ---------- header / footnote / headings -----------------------
+    g.node("headers", "document")(_headers)
+    g.node("footnotes", "document")(_footnotes)
+    g.node("headings", "paragraphs")(lambda pp: [t["text"] for t in pp["toc_structure"]])
+    g.node("has_toc", "headings")(bool)
+
+    # ---------- font, colore, immagini -----------------------------
+    # in streaming dal file: non passa dall'albero di python-docx
+    g.node("paragraphs")(lambda: _paragraph_pass(file_content, sample=sample))
+    g.node("has_color_text", "paragraphs")(lambda pp: bool(pp["colored_runs"]))
+    g.node("media", "document")(_media)
+    g.node("image_count", "media")(lambda media: media["count"])
+    # senza impaginazione ogni immagine conta come "pagina a colori"
+    g.node("has_color_pages", "image_count")(bool)
+    g.node("images", "media")(lambda media: (
+        ImageInfo(count=media["count"], avg_size_kb=round((media["size"] / media["count"]) / 1024, 2))
+        if media["count"]
+        else None
+    ))
+    g.node("metadata", "document")(_metadata)
+
+    @g.node("detailed_analysis", "paragraphs", "media", "images", "metadata")
+    def detailed_analysis(pp, media, images, metadata):
+        return DetailedDocumentAnalysis(
+            fonts=pp["fonts"],
+            images=images,
+            line_spacing=pp["line_spacing"],
+            paragraph_count=pp["paragraph_count"],
+            toc_structure=pp["toc_structure"],
+            metadata=metadata,
+            has_color_pages=bool(media["count"]),
+            has_color_text=bool(pp["colored_runs"]),
+            colored_elements_count=pp["colored_runs"] + media["count"],
+            sampling=pp.get("sampling"),
+        )
+
+    return g
+
 
-    return DetailedDocumentAnalysis(
-        fonts=fonts,
-        images=img_info,
-        line_spacing=line_spacing,
-        paragraph_count=paragraph_count,
-        toc_structure=toc_structure,
-        metadata=md,
-        has_color_pages=has_color_pages,
-        has_color_text=has_color_text,
-        colored_elements_count=colored_elements_count,
-    )
+# ------------------------------------------------------------------ #
+def extract_docx_properties(
+    file_content: bytes | str,
+    properties: Iterable[str] | None = None,
+    *,
+    sample: bool = False,
+) -> dict[str, Any]:
+    """
+    Estrae:
+    • dimensione pagina + margini
+    • intestazioni / piè di pagina
+    • TOC (heading×livello)
+    • inconsistenze formato sezione-sezione
+
+    `properties` limita il lavoro alle proprietà indicate (e a ciò da cui
+    dipendono); i nomi che il DOCX non conosce vengono ignorati.
+    `property_timings_ms` riporta il costo di ogni proprietà restituita.
+    Con `sample` (documenti lunghi) font e testo colorato sono stimati su
+    un campione di paragrafi: vedi `doc_props["sampling"]`.
+    """
+    g = _docx_graph(file_content, sample=sample)
+    names = DOCX_PROPERTIES if properties is None else tuple(p for p in properties if p in g)
+    doc_props = g.compute(names)
+    doc_props["property_timings_ms"] = g.costs_ms(names)
+    if sample and "paragraphs" in g.closure(names) and "sampling" in (pp := g.compute(["paragraphs"])["paragraphs"]):
+        doc_props["sampling"] = pp["sampling"]
+    return doc_props
+
+
+# ------------------------------------------------------------------ #
+def extract_docx_detailed_analysis(file_content: bytes | str, *, sample: bool = False) -> DetailedDocumentAnalysis:
+    """Font + immagini + colore ecc. di un DOCX (byte o percorso; a campione con `sample`)."""
+    return _docx_graph(file_content, sample=sample).compute(["detailed_analysis"])["detailed_analysis"]
@@ -0,0 +1,370 @@
+"""
+Lettura in streaming del DOCX
+=============================
+python-docx costruisce l'albero lxml completo di word/document.xml più un
+oggetto proxy per ogni paragrafo e run, e a ogni `par.style.font.name`
+rifà la ricerca dello stile in styles.xml (XPath). Su un manoscritto di
+400 pagine è la parte più lenta e più pesante in memoria dell'estrattore.
+
+Qui invece:
+• `StyleTable` legge styles.xml (e i font del tema) una volta sola e
+  risolve ogni stile di paragrafo e di carattere lungo la catena `basedOn`
+  fino ai docDefaults: il font effettivo di una run è un lookup O(1)
+• `iter_paragraphs` scorre word/document.xml con `iterparse` e restituisce
+  un paragrafo del corpo alla volta; ogni paragrafo letto viene staccato
+  dall'albero, la memoria resta limitata alla dimensione di un paragrafo
+  (più quelli che il chiamante tiene da parte: `paragraph_elements` e
+  `read_paragraph`, per leggere le run solo dopo aver scelto il campione)
+
+Paragrafi, run, testo e stile del paragrafo seguono python-docx
+(`doc.paragraphs`, `par.runs`, `par.text`, `par.style`): solo i paragrafi
+figli diretti di `w:body`, solo le run figlie dirette del paragrafo.
+
+IMPORTANTE: non dipende da FastAPI né dal modello a oggetti di python-docx.
+"""
+
+from __future__ import annotations
+
+import posixpath
+import re
+import zipfile
+from collections.abc import Iterator
+from dataclasses import dataclass
+from typing import IO, TYPE_CHECKING, NamedTuple
+
+from docx.styles import BabelFish  # nomi "heading 1" ↔ "Heading 1"
+from lxml import etree
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_OFFICE_DOCUMENT = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+_STYLES = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"
+_THEME = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/theme"
+_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+
+_BODY, _P, _R, _HYPERLINK = f"{_W}body", f"{_W}p", f"{_W}r", f"{_W}hyperlink"
+_VAL = f"{_W}val"
+
+# testo equivalente degli elementi interni a una run (come python-docx)
+_RUN_TEXT = {f"{_W}tab": "\t", f"{_W}ptab": "\t", f"{_W}cr": "\n", f"{_W}noBreakHyphen": "-"}
+
+# ST_UniversalMeasure → EMU per unità
+_UNIVERSAL = re.compile(r"^(-?[0-9]+(?:\.[0-9]+)?)(mm|cm|in|pt|pc|pi)$")
+_EMU_PER_UNIT = {"mm": 36000, "cm": 360000, "in": 914400, "pt": 12700, "pc": 152400, "pi": 152400}
+
+
+def _parser_kwargs() -> dict:
+    # upload non fidati: niente entità esterne né rete
+    return {"resolve_entities": False, "no_network": True, "huge_tree": True}
+
+
+# ------------------------------------------------------------------ #
+# valori degli attributi
+# ------------------------------------------------------------------ #
+def _half_points(value: str | None) -> float | None:
+    """`w:sz/@w:val` (mezzi punti o misura con unità) in punti."""
+    if not value:
+        return None
+    if m := _UNIVERSAL.match(value):
+        return float(m.group(1)) * _EMU_PER_UNIT[m.group(2)] / 12700
+    try:
+        return int(value) / 2
+    except ValueError:
+        return None
+
+
+def _twips(value: str | None) -> int | None:
+    """`w:spacing/@w:line` in twip (240 = interlinea singola con lineRule=auto)."""
+    if not value:
+        return None
+    if m := _UNIVERSAL.match(value):
+        return round(float(m.group(1)) * _EMU_PER_UNIT[m.group(2)] / 635)
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+def _on(value: str | None) -> bool:
+    return value in ("1", "true", "on")
+
+
+class RunFont(NamedTuple):
+    name: str | None    # None = non dichiarato a questo livello
+    size: float | None  # pt
+
+    def over(self, base: RunFont) -> RunFont:
+        """Questo livello sopra `base`: ogni proprietà non dichiarata si eredita."""
+        return RunFont(
+            self.name if self.name is not None else base.name,
+            self.size if self.size is not None else base.size,
+        )
+
+
+_NO_FONT = RunFont(None, None)
+
+
+def _run_font(rpr: etree._Element | None, theme: dict[str, str]) -> RunFont:
+    """
+    Font e dimensione dichiarati in un `w:rPr`. `w:asciiTheme` prevale su
+    `w:ascii` e si risolve sui font del tema ("major" / "minor").
+    """
+    if rpr is None:
+        return _NO_FONT
+    fonts, size = rpr.find(f"{_W}rFonts"), rpr.find(f"{_W}sz")
+    name = None
+    if fonts is not None:
+        slot = fonts.get(f"{_W}asciiTheme")
+        name = theme.get(slot[:5]) if slot else None  # "majorHAnsi" → "major"
+        name = name or fonts.get(f"{_W}ascii")
+    return RunFont(name, _half_points(size.get(_VAL)) if size is not None else None)
+
+
+def _run_color(rpr: etree._Element | None) -> str | None:
+    """Colore RGB dichiarato sulla run, None se assente o automatico."""
+    color = rpr.find(f"{_W}color") if rpr is not None else None
+    rgb = color.get(_VAL) if color is not None else None
+    return None if rgb is None or rgb.lower() == "auto" else rgb.upper()
+
+
+def theme_fonts(xml: bytes | None) -> dict[str, str]:
+    """Font latini del tema: {"major": …, "minor": …}."""
+    if not xml:
+        return {}
+    root = etree.fromstring(xml, etree.XMLParser(**_parser_kwargs()))
+    out = {}
+    for slot in ("major", "minor"):
+        latin = root.find(f".//{_A}{slot}Font/{_A}latin")
+        if latin is not None and latin.get("typeface"):
+            out[slot] = latin.get("typeface")
+    return out
+
+
+# ------------------------------------------------------------------ #
+# stili
+# ------------------------------------------------------------------ #
+@dataclass(frozen=True)
+class ParagraphStyle:
+    style_id: str | None
+    name: str | None   # None se styles.xml non dichiara `w:name`
+    font: RunFont      # risolto: catena `basedOn` + docDefaults
+
+
+class StyleTable:
+    """
+    Indice degli stili di styles.xml, costruito una volta per documento:
+    ogni stile di paragrafo e di carattere è già risolto lungo la catena
+    `basedOn` (e i docDefaults per quelli di paragrafo), così il font
+    effettivo di una run è un lookup in dizionario (`run_font`).
+
+    Precedenza, dal più debole: docDefaults → stile di paragrafo →
+    stile di carattere → formattazione diretta della run.
+    """
+
+    def __init__(
+        self,
+        paragraph_styles: dict[str, ParagraphStyle],
+        character_styles: dict[str, RunFont],
+        default: ParagraphStyle | None,
+        defaults: RunFont,
+        theme: dict[str, str] | None = None,
+    ) -> None:
+        self._paragraph = paragraph_styles
+        self._character = character_styles
+        self.default = default    # stile dei paragrafi senza `w:pStyle`
+        self.defaults = defaults  # docDefaults
+        self.theme = theme or {}  # font del tema, per le run con `w:asciiTheme`
+        self._bases: dict[tuple[ParagraphStyle | None, str | None], RunFont] = {}
+
+    @classmethod
+    def from_xml(cls, xml: bytes | None, theme: dict[str, str] | None = None) -> StyleTable:
+        theme = theme or {}
+        if not xml:
+            return cls({}, {}, None, _NO_FONT, theme)
+        root = etree.fromstring(xml, etree.XMLParser(**_parser_kwargs()))
+        defaults = _run_font(root.find(f"{_W}docDefaults/{_W}rPrDefault/{_W}rPr"), theme)
+
+        # id → (tipo, nome, basedOn, font proprio); conta il primo stile con un dato id
+        raw: dict[str | None, tuple[str | None, str | None, str | None, RunFont]] = {}
+        default_id = None
+        for el in root.iterfind(f"{_W}style"):
+            style_id, style_type = el.get(f"{_W}styleId"), el.get(f"{_W}type")
+            if style_type == "paragraph" and _on(el.get(f"{_W}default")):
+                default_id = style_id  # vale l'ultimo, come in Word
+            if style_id in raw:
+                continue
+            name_el, based_on = el.find(f"{_W}name"), el.find(f"{_W}basedOn")
+            raw[style_id] = (
+                style_type,
+                name_el.get(_VAL) if name_el is not None else None,
+                based_on.get(_VAL) if based_on is not None else None,
+                _run_font(el.find(f"{_W}rPr"), theme),
+            )
+
+        resolved: dict[str | None, RunFont] = {}
+
+        def resolve(style_id: str | None, style_type: str, visiting: frozenset = frozenset()) -> RunFont:
+            entry = raw.get(style_id)
+            if entry is None or entry[0] != style_type or style_id in visiting:  # catena rotta o ciclica
+                return _NO_FONT
+            if style_id not in resolved:
+                _, _, based_on, own = entry
+                resolved[style_id] = own.over(resolve(based_on, style_type, visiting | {style_id}))
+            return resolved[style_id]
+
+        paragraph = {
+            sid: ParagraphStyle(
+                sid,
+                BabelFish.internal2ui(name) if name is not None else None,
+                resolve(sid, "paragraph").over(defaults),
+            )
+            for sid, (style_type, name, _, _) in raw.items()
+            if style_type == "paragraph"
+        }
+        character = {sid: resolve(sid, "character") for sid, entry in raw.items() if entry[0] == "character"}
+        return cls(paragraph, character, paragraph.get(default_id), defaults, theme)
+
+    def paragraph(self, style_id: str | None) -> ParagraphStyle | None:
+        """Stile con id `style_id`, il default se manca o non è di paragrafo."""
+        return self._paragraph.get(style_id, self.default) if style_id else self.default
+
+    def run_font(self, paragraph: ParagraphStyle | None, character_id: str | None, direct: RunFont) -> RunFont:
+        """Font effettivo di una run: O(1) per coppia (stile paragrafo, stile carattere)."""
+        key = (paragraph, character_id)
+        if (base := self._bases.get(key)) is None:
+            base = self._character.get(character_id, _NO_FONT).over(
+                paragraph.font if paragraph is not None else self.defaults
+            )
+            self._bases[key] = base
+        return direct.over(base)
+
+
+# ------------------------------------------------------------------ #
+# paragrafi
+# ------------------------------------------------------------------ #
+class Run(NamedTuple):
+    font_name: str | None   # effettivi (StyleTable.run_font); None se non dichiarati da nessuna parte
+    font_size: float | None
+    color: str | None       # RGB esadecimale dichiarato sulla run, None = automatico
+
+
+class Paragraph(NamedTuple):
+    style: ParagraphStyle | None
+    text: str
+    line: int | None        # interlinea dichiarata (twip)
+    runs: list[Run] | None  # None se non richieste
+
+
+def _run_text(r: etree._Element) -> str:
+    out = []
+    for child in r:
+        if child.tag == f"{_W}t":
+            out.append(child.text or "")
+        elif child.tag == f"{_W}br":
+            out.append("\n" if child.get(f"{_W}type", "textWrapping") == "textWrapping" else "")
+        elif (text := _RUN_TEXT.get(child.tag)) is not None:
+            out.append(text)
+    return "".join(out)
+
+
+def read_paragraph(p: etree._Element, styles: StyleTable, with_runs: bool = True) -> Paragraph:
+    ppr = p.find(f"{_W}pPr")
+    style_id = line = None
+    if ppr is not None:
+        if (pstyle := ppr.find(f"{_W}pStyle")) is not None:
+            style_id = pstyle.get(_VAL)
+        if (spacing := ppr.find(f"{_W}spacing")) is not None:
+            line = _twips(spacing.get(f"{_W}line"))
+
+    style = styles.paragraph(style_id)
+    text = []
+    runs: list[Run] | None = [] if with_runs else None
+    for child in p:
+        if child.tag == _R:
+            text.append(_run_text(child))
+            if runs is not None:
+                rpr = child.find(f"{_W}rPr")
+                rstyle = rpr.find(f"{_W}rStyle") if rpr is not None else None
+                font = styles.run_font(
+                    style, rstyle.get(_VAL) if rstyle is not None else None, _run_font(rpr, styles.theme)
+                )
+                runs.append(Run(font.name, font.size, _run_color(rpr)))
+        elif child.tag == _HYPERLINK:
+            text.extend(_run_text(r) for r in child.iterfind(_R))
+    return Paragraph(style, "".join(text), line, runs)
+
+
+def _body_paragraphs(fh: IO[bytes]) -> Iterator[etree._Element]:
+    """
+    Paragrafi figli diretti di `w:body`. Dopo ogni paragrafo l'albero viene
+    svuotato: il paragrafo ne è staccato (resta intatto per chi lo tiene,
+    altrimenti viene liberato) insieme a ciò che lo precede.
+    """
+    for _, el in etree.iterparse(fh, events=("end",), tag=_P, **_parser_kwargs()):
+        parent = el.getparent()
+        if parent is None or parent.tag != _BODY:
+            continue  # tabelle, caselle di testo, content control: come python-docx
+        yield el
+        while el.getprevious() is not None:
+            del parent[0]
+        parent.remove(el)
+
+
+# ------------------------------------------------------------------ #
+# package
+# ------------------------------------------------------------------ #
+def _target(zf: zipfile.ZipFile, rels_name: str, base: str, rel_type: str, fallback: str) -> str:
+    """Parte del package puntata dalla prima relazione `rel_type`."""
+    try:
+        rels = etree.fromstring(zf.read(rels_name), etree.XMLParser(**_parser_kwargs()))
+    except (KeyError, etree.XMLSyntaxError):
+        return fallback
+    for rel in rels.iterfind(f"{_REL}Relationship"):
+        if rel.get("Type") == rel_type and rel.get("TargetMode") != "External":
+            target = rel.get("Target", "")
+            return target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(base, target))
+    return fallback
+
+
+class DocxPackage:
+    """Parti del DOCX aperte dallo zip, senza python-docx."""
+
+    def __init__(self, source: IO[bytes] | str) -> None:
+        self._zip = zipfile.ZipFile(source)
+        self.document = _target(self._zip, "_rels/.rels", "", _OFFICE_DOCUMENT, "word/document.xml")
+        folder, name = posixpath.split(self.document)
+        rels = posixpath.join(folder, "_rels", f"{name}.rels")
+        self._styles = _target(self._zip, rels, folder, _STYLES, "word/styles.xml")
+        self._theme = _target(self._zip, rels, folder, _THEME, "word/theme/theme1.xml")
+
+    def _read(self, name: str) -> bytes | None:
+        try:
+            return self._zip.read(name)
+        except KeyError:
+            return None
+
+    def styles(self) -> StyleTable:
+        """Indice degli stili, con i font del tema già risolti."""
+        return StyleTable.from_xml(self._read(self._styles), theme_fonts(self._read(self._theme)))
+
+    def paragraph_elements(self) -> Iterator[etree._Element]:
+        """Elementi `w:p` del corpo in ordine, staccati dall'albero (`read_paragraph`)."""
+        with self._zip.open(self.document) as fh:
+            yield from _body_paragraphs(fh)
+
+    def iter_paragraphs(self, styles: StyleTable) -> Iterator[Paragraph]:
+        """Paragrafi del corpo in ordine, con le run."""
+        for p in self.paragraph_elements():
+            yield read_paragraph(p, styles)
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
@@ -0,0 +1,129 @@
+"""
+Grafo di proprietà pigre
+========================
+Gli estrattori descrivono `doc_props` come un grafo di proprietà con nome
+(`page_size`, `margins`, `fonts`, `color_pages`…), ognuna con le proprie
+dipendenze. `compute(names)` calcola solo la chiusura delle proprietà
+richieste, una volta sola (memoizzazione), e misura il tempo di ciascuna.
+
+Più nodi possono condividere un *batch*: un unico loader li calcola
+insieme (es. le analisi per pagina di un PDF in un solo passaggio, anche se
+servono sia il testo sia i font).
+
+IMPORTANTE: non dipende da FastAPI né da nulla dell'API layer.
+"""
+
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+
+# il loader riceve i nodi del batch da calcolare e ritorna {nodo: valore}
+BatchLoader = Callable[[frozenset[str]], dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class _Node:
+    fn: Callable[..., Any] | None
+    deps: tuple[str, ...]
+    batch: str | None
+
+
+class PropertyGraph:
+    def __init__(self) -> None:
+        self._nodes: dict[str, _Node] = {}
+        self._loaders: dict[str, BatchLoader] = {}
+        self._memo: dict[str, Any] = {}
+        self.timings: dict[str, float] = {}  # s, tempo proprio di nodi e batch
+
+    # -------------------------------------------------------------
+    # definizione
+    # -------------------------------------------------------------
+    def node(self, name: str, *deps: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        """Decoratore: `fn(*valori_delle_dipendenze)` calcola `name`."""
+        def register(fn: Callable[..., Any]) -> Callable[..., Any]:
+            self._nodes[name] = _Node(fn, deps, None)
+            return fn
+        return register
+
+    def batch(self, name: str, members: Iterable[str], loader: BatchLoader) -> None:
+        """Nodi senza dipendenze calcolati insieme da `loader`."""
+        self._loaders[name] = loader
+        for member in members:
+            self._nodes[member] = _Node(None, (), name)
+
+    def seed(self, name: str, value: Any) -> None:
+        """Valore già noto (es. risultati per pagina arrivati dagli shard)."""
+        self._memo[name] = value
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._nodes
+
+    # -------------------------------------------------------------
+    # calcolo
+    # -------------------------------------------------------------
+    def closure(self, names: Iterable[str]) -> list[str]:
+        """Nodi necessari, in ordine topologico (dipendenze prima)."""
+        order: list[str] = []
+        seen: set[str] = set()
+
+        def visit(name: str) -> None:
+            if name in seen:
+                return
+            if name not in self._nodes:
+                raise KeyError(f"Proprietà sconosciuta: {name}")
+            seen.add(name)
+            for dep in self._nodes[name].deps:
+                visit(dep)
+            order.append(name)
+
+        for name in names:
+            visit(name)
+        return order
+
+    def compute(self, names: Iterable[str]) -> dict[str, Any]:
+        """Valori delle proprietà richieste (nell'ordine dato)."""
+        names = list(names)
+        order = self.closure(names)
+
+        pending: dict[str, set[str]] = {}
+        for name in order:
+            node = self._nodes[name]
+            if node.batch is not None and name not in self._memo:
+                pending.setdefault(node.batch, set()).add(name)
+        for batch, members in pending.items():
+            started = time.perf_counter()
+            self._memo.update(self._loaders[batch](frozenset(members)))
+            self.timings[batch] = self.timings.get(batch, 0.0) + time.perf_counter() - started
+
+        for name in order:
+            if name in self._memo:
+                continue
+            node = self._nodes[name]
+            started = time.perf_counter()
+            self._memo[name] = node.fn(*(self._memo[d] for d in node.deps))  # type: ignore[misc]
+            self.timings[name] = time.perf_counter() - started
+
+        return {name: self._memo[name] for name in names}
+
+    def cost(self, name: str) -> float:
+        """
+        Tempo (s) speso per `name` e per tutto ciò da cui dipende. Il lavoro
+        condiviso (una dipendenza comune) conta per ogni proprietà che lo
+        usa: è il costo della proprietà se fosse richiesta da sola.
+
+        Un loader può ripartire il proprio tempo fra i nodi del batch
+        scrivendo in `timings`; altrimenti conta il tempo dell'intero batch.
+        """
+        closure = self.closure([name])
+        total = sum(self.timings.get(n, 0.0) for n in closure)
+        for batch in {self._nodes[n].batch for n in closure} - {None}:
+            members = [n for n in closure if self._nodes[n].batch == batch]
+            if not any(m in self.timings for m in members):
+                total += self.timings.get(batch, 0.0)  # type: ignore[arg-type]
+        return total
+
+    def costs_ms(self, names: Iterable[str]) -> dict[str, float]:
+        return {name: round(self.cost(name) * 1000, 3) for name in names}
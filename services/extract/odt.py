@@ -4,11 +4,14 @@ Estrattore ODT
 Funzioni:
 • extract_odt_properties
 (la detailed_analysis viene già generata al suo interno)
+Il documento ODT è un unico XML: `properties` e `sample` sono accettati per
+uniformità con gli altri estrattori ma l'estrazione resta sempre completa.
 """
 
 from __future__ import annotations
 
 import io
+from collections.abc import Iterable
 from typing import Any
 
 from odf.opendocument import load as load_odt
@@ -31,8 +34,14 @@ def _parse_dimension(value: str | None) -> float:
     return float(value)
 
 
-def extract_odt_properties(file_content: bytes) -> dict[str, Any]:
-    doc = load_odt(io.BytesIO(file_content))
+def extract_odt_properties(
+    file_content: bytes | str,
+    properties: Iterable[str] | None = None,
+    *,
+    sample: bool = False,
+) -> dict[str, Any]:
+    # percorso: odfpy apre lo zip direttamente dal file
+    doc = load_odt(io.BytesIO(file_content) if isinstance(file_content, bytes) else file_content)
 
     # ------------- page layout -------------------------------------
     page_layouts = doc.getElementsByType(PageLayoutProperties)
@@ -44,6 +53,9 @@ def extract_odt_properties(file_content: bytes) -> dict[str, Any]:
             "has_toc": False,
             "headings": [],
             "detailed_analysis": DetailedDocumentAnalysis(),
+            "has_color_pages": False,
+            "has_color_text": False,
+            "image_count": 0,
         }
 
     pl = page_layouts[0]
@@ -115,4 +127,7 @@ def extract_odt_properties(file_content: bytes) -> dict[str, Any]:
         "headers": [],
         "footnotes": [],
         "detailed_analysis": detailed_analysis,
+        "has_color_pages": has_color_pages,
+        "has_color_text": has_color_text,
+        "image_count": image_count,
     }
@@ -0,0 +1,137 @@
+"""
+Cache per pagina dei PDF
+========================
+Un autore ricarica di solito una revisione in cui cambiano poche pagine:
+l'analisi per pagina (`pdf._analyse_page`) viene quindi memorizzata sotto
+l'impronta della pagina e, alla revisione successiva, solo le pagine
+cambiate vengono rianalizzate.
+
+L'impronta è lo SHA-256 di ciò che l'analisi legge:
+• content stream (decompresso) e box della pagina
+• l'intero albero /Resources (anche ereditato), seguito ricorsivamente:
+  font, immagini, ColorSpace, Shading, Pattern, ExtGState e form XObject
+  con le loro /Resources, ciascuno con il suo stream grezzo
+
+I riferimenti sono sostituiti dal digest dell'oggetto a cui puntano:
+l'impronta non contiene numeri di oggetto né la posizione della pagina.
+Una pagina identica spostata più avanti (pagine inserite prima) resta un
+hit. Per lo
+stesso motivo la voce in cache non dipende dall'indice: numero di pagina e
+header/footer vengono ricavati al momento (`pdf._place`).
+
+PAGE_CACHE_MAX_BYTES dimensiona il tier in memoria di ogni processo di
+estrazione (0 = niente cache). Il tier è per processo: i worker spawn
+vengono riciclati ogni EXTRACT_MAX_TASKS_PER_CHILD task (50) e la revisione successiva finisce di solito
+su un worker diverso, quindi senza RESULT_CACHE_DIR (voci anche su disco,
+condivise fra i worker) gli hit sono rari.
+
+IMPORTANTE: non dipende da FastAPI né da nulla dell'API layer.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import re
+from collections.abc import Iterable
+from typing import Any
+
+import fitz  # PyMuPDF
+
+from config import settings
+from utils.result_cache import ResultCache
+
+from .version import EXTRACTOR_VERSION
+
+_cache: ResultCache | None = None
+
+
+def get_page_cache() -> ResultCache | None:
+    """Cache delle analisi per pagina, None se PAGE_CACHE_MAX_BYTES=0."""
+    global _cache
+    if _cache is None and settings.PAGE_CACHE_MAX_BYTES > 0:
+        _cache = ResultCache(
+            "pdf_pages",
+            settings.PAGE_CACHE_MAX_BYTES,
+            disk_dir=settings.RESULT_CACHE_DIR,
+            disk_max_bytes=settings.RESULT_CACHE_DISK_MAX_BYTES,
+        )
+    return _cache
+
+
+# ------------------------------------------------------------------ #
+# impronta
+# ------------------------------------------------------------------ #
+_REF = re.compile(rb"(\d+) \d+ R")
+
+
+def _object_digest(doc: fitz.Document, xref: int, memo: dict[int, bytes]) -> bytes:
+    """
+    Digest dell'oggetto `xref` per contenuto (memoizzato per documento): il
+    dizionario con ogni riferimento sostituito dal digest dell'oggetto a cui
+    punta, più lo stream grezzo se c'è. Font, immagini, shading, pattern,
+    ExtGState e form XObject (con le loro /Resources) entrano per intero.
+    """
+    if xref not in memo:
+        memo[xref] = b""  # riferimenti circolari: il secondo passaggio vale vuoto
+        try:
+            h = hashlib.sha256(_resolve(doc, doc.xref_object(xref, compressed=True), memo))
+            if doc.xref_is_stream(xref):
+                h.update(doc.xref_stream_raw(xref) or b"")
+            memo[xref] = h.digest()
+        except Exception:
+            pass
+    return memo[xref]
+
+
+def _resolve(doc: fitz.Document, obj: str, memo: dict[int, bytes]) -> bytes:
+    """Sorgente PDF di un oggetto con i riferimenti `N G R` sostituiti dal digest."""
+    return _REF.sub(lambda m: _object_digest(doc, int(m[1]), memo).hex().encode(), obj.encode())
+
+
+def _page_resources(doc: fitz.Document, page: fitz.Page) -> tuple[str, str]:
+    """/Resources della pagina, ereditate dai nodi /Pages se mancano."""
+    xref = page.xref
+    while xref:
+        kind, value = doc.xref_get_key(xref, "Resources")
+        if kind != "null":
+            return kind, value
+        kind, value = doc.xref_get_key(xref, "Parent")
+        xref = int(value.split()[0]) if kind == "xref" else 0
+    return "null", "null"
+
+
+def page_fingerprint(
+    doc: fitz.Document,
+    page: fitz.Page,
+    boxes: Iterable[Any],
+    memo: dict[int, bytes],
+) -> str:
+    h = hashlib.sha256()
+    h.update(repr((tuple(boxes), page.rotation)).encode())
+    h.update(page.read_contents())
+    h.update(_resolve(doc, " ".join(_page_resources(doc, page)), memo))
+    return h.hexdigest()
+
+
+def page_cache_key(fingerprint: str) -> str:
+    """Chiave = (versione estrattori, tolleranza colore, impronta)."""
+    return f"{EXTRACTOR_VERSION}:{settings.COLOR_TOLERANCE}:{fingerprint}"
+
+
+# ------------------------------------------------------------------ #
+# serializzazione (i font hanno chiavi float: JSON le renderebbe stringhe)
+# ------------------------------------------------------------------ #
+def dumps_entry(aspects: frozenset[str], content: dict[str, Any]) -> bytes:
+    content = dict(content)
+    if "fonts" in content:
+        content["fonts"] = {name: list(sizes.items()) for name, sizes in content["fonts"].items()}
+    return json.dumps({"aspects": sorted(aspects), "content": content}, separators=(",", ":")).encode()
+
+
+def loads_entry(raw: bytes) -> tuple[frozenset[str], dict[str, Any]]:
+    entry = json.loads(raw)
+    content = entry["content"]
+    if "fonts" in content:
+        content["fonts"] = {name: {size: n for size, n in sizes} for name, sizes in content["fonts"].items()}
+    return frozenset(entry["aspects"]), content
@@ -0,0 +1,118 @@
+"""
+Rilevamento del numero di pagina
+================================
+Lavora sulle sole parole della fascia footer (l'estrattore PDF ritaglia la
+pagina prima di estrarre i caratteri) e riconosce:
+
+• numeri arabi, anche decorati ("- 12 -", "12/300")
+• numeri romani (pagine iniziali), solo se isolati sulla riga o preceduti
+  da un'etichetta: "mi", "di", "vi"… sono anche parole italiane
+• etichette "Pag. 12", "Pagina 12", "p. 12", "Page 12", "pag.12"
+
+`page_number_candidates` non dipende dalla posizione della pagina (il
+risultato finisce nella cache per pagina); `page_number_position` lo
+confronta con il numero atteso e ritorna posizione e confidenza.
+
+IMPORTANTE: non dipende da FastAPI né da PyMuPDF.
+"""
+
+from __future__ import annotations
+
+import re
+from collections.abc import Iterable, Sequence
+
+FOOTER_BAND_PT = 56  # ~2 cm: fascia in cui cercare il numero di pagina
+
+# (valore, centro x, bordo inferiore, tipo)
+Candidate = tuple[int, float, float, str]
+
+# confidenza di una corrispondenza, per tipo di candidato
+_CONFIDENCE = {"label": 1.0, "arabic": 0.9, "roman": 0.7}
+# nessuna corrispondenza: un numero nel footer c'è ma non è quello atteso
+# (numerazione sfalsata?) oppure il footer non ne contiene affatto
+_MISSING_WITH_NUMBERS = 0.5
+_MISSING_EMPTY = 1.0
+
+_LABELS = frozenset({"pag", "pagina", "p", "pg", "page"})
+_LABELLED = re.compile(r"^(?:pag(?:ina)?|pg|p|page)\.?(\d+)$")
+_ROMAN = re.compile(r"^m{0,3}(cm|cd|d?c{0,3})(xc|xl|l?x{0,3})(ix|iv|v?i{0,3})$")
+_ROMAN_VALUES = {"i": 1, "v": 5, "x": 10, "l": 50, "c": 100, "d": 500, "m": 1000}
+_DECORATION = " -–—()[]|·•*"
+
+
+def roman_value(token: str) -> int | None:
+    """Valore di un numero romano valido (minuscolo o maiuscolo), altrimenti None."""
+    token = token.lower()
+    if not token or not _ROMAN.match(token):
+        return None
+    total = 0
+    for cur, nxt in zip(token, token[1:] + " ", strict=False):
+        value = _ROMAN_VALUES[cur]
+        total += -value if nxt != " " and _ROMAN_VALUES[nxt] > value else value
+    return total
+
+
+def _token(text: str) -> str:
+    text = text.strip(_DECORATION)
+    # "12/300", "12-300": conta la prima parte
+    return re.split(r"[/\-–]", text, maxsplit=1)[0] if text[:1].isdigit() else text
+
+
+def page_number_candidates(words: Iterable[Sequence]) -> list[Candidate]:
+    """
+    Candidati numero di pagina fra le parole del footer, nel formato
+    `page.get_text("words")` di PyMuPDF: (x0, y0, x1, y1, testo, blocco, riga, n).
+    """
+    words = list(words)
+    line_sizes: dict[tuple, int] = {}  # parole per riga, decorazioni escluse
+    for w in words:
+        if _token(w[4]):
+            line_sizes[(w[5], w[6])] = line_sizes.get((w[5], w[6]), 0) + 1
+
+    out: list[Candidate] = []
+    labelled = False  # la parola precedente, sulla stessa riga, è un'etichetta
+    prev_line = None
+    for w in words:
+        line = (w[5], w[6])
+        if line != prev_line:
+            labelled, prev_line = False, line
+        token = _token(w[4])
+        cx, bottom = (w[0] + w[2]) / 2, w[3]
+
+        if token.isdecimal():
+            out.append((int(token), cx, bottom, "label" if labelled else "arabic"))
+        elif m := _LABELLED.match(token.lower()):
+            out.append((int(m.group(1)), cx, bottom, "label"))
+        elif (value := roman_value(token)) is not None and (labelled or line_sizes[line] == 1):
+            out.append((value, cx, bottom, "label" if labelled else "roman"))
+        labelled = token.lower().rstrip(".:") in _LABELS
+    return out
+
+
+def page_number_position(
+    candidates: Iterable[Sequence],
+    page_no: int,
+    width: float,
+    height: float,
+) -> tuple[str, float]:
+    """
+    (posizione, confidenza) del numero `page_no` nella fascia footer della
+    pagina stessa, larga `width` e alta `height` punti: "center" | "left" |
+    "right", oppure "missing" se non c'è o non è in una posizione
+    riconoscibile. Con pagine di formati diversi ognuna usa il proprio.
+    """
+    in_band = False
+    for value, cx, bottom, kind in candidates:
+        if bottom < height - FOOTER_BAND_PT:  # non nel footer
+            continue
+        in_band = True
+        if value != page_no:
+            continue
+        if abs(cx - width / 2) <= width * 0.15:
+            return "center", _CONFIDENCE[kind]
+        if cx < width * 0.25:
+            return "left", _CONFIDENCE[kind]
+        if cx > width * 0.75:
+            return "right", _CONFIDENCE[kind]
+        return "missing", _MISSING_WITH_NUMBERS
+    return "missing", _MISSING_WITH_NUMBERS if in_band else _MISSING_EMPTY
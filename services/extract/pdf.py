@@ -4,252 +4,779 @@ Estrattore PDF
 Contiene:
 • extract_pdf_properties
 • extract_pdf_detailed_analysis
-Usa PyPDF2, pdfplumber e PyMuPDF (fitz).
+Usa solo PyMuPDF (fitz): il file viene aperto una volta e ogni pagina viene
+analizzata in un unico passaggio (box, testo, numeri di pagina, font,
+immagini, colore). Le proprietà di `doc_props` sono nodi di un grafo pigro
+(services.extract.graph): chi chiede solo `page_size` e `margins` non paga
+testo, font e render. Le pagine già viste in una revisione precedente
+dello stesso documento vengono prese dalla cache per pagina
+(services.extract.page_cache).
 
 IMPORTANTE: non dipende da FastAPI né da nulla dell'API layer.
 """
 
 from __future__ import annotations
 
-import io
+import time
+from collections.abc import Callable, Iterable
 from typing import Any
 
 import fitz  # PyMuPDF
-import pdfplumber
-import PyPDF2
 from fastapi import HTTPException  # usata per errore formato
 
+from config import settings
 from models import DetailedDocumentAnalysis, FontInfo, ImageInfo
 
+from .graph import PropertyGraph
+from .page_cache import dumps_entry, get_page_cache, loads_entry, page_cache_key, page_fingerprint
+from .page_numbers import FOOTER_BAND_PT, page_number_candidates, page_number_position
+from .sampling import count_bounds, sampling_report, scale, stratified_sample
+
+try:
+    import numpy as np
+except ImportError:  # opzionale: senza NumPy si confrontano slice di bytes
+    np = None  # type: ignore[assignment]
+
 # ------------------------------------------------------------------ #
 # helper privati
 # ------------------------------------------------------------------ #
 CM_PER_PT: float = 0.0352778
 
+_TOC_KEYWORDS = ("indice", "table of contents", "contents", "toc", "sommario")
+_FOOTER_SLACK_PT = 24  # margine oltre la fascia footer: parole a cavallo del bordo
+_HEADER_PAGES = 3     # header/footnote euristici dalle prime N pagine
+
+# box ereditabili dal nodo /Pages (PDF 32000-1, tab. 30)
+_INHERITABLE_BOXES = ("MediaBox", "CropBox")
+# quota dello store di MuPDF liberata dopo ogni pagina con immagini o colore:
+# le immagini decodificate non restano fino alla fine del documento (picco
+# di RSS), i font e gli spazi colore riusati dalla pagina dopo di solito sì
+_STORE_SHRINK_PERCENT = 90
+# immagine decodificata oltre questa dimensione (byte): store svuotato subito,
+# ricaricare i font costa poco rispetto alla decodifica
+_LARGE_IMAGE_BYTES = 1024 * 1024
+
+Box = tuple[float, float, float, float]  # x0, y0, x1, y1 in coordinate PDF
 
-def _pick_box(page: PyPDF2._page.PageObject):  # type: ignore[attr-defined]
+
+def _raw_box(doc: fitz.Document, xref: int, key: str) -> Box | None:
+    """
+    Legge un box dal dizionario della pagina in coordinate PDF native
+    (origine in basso a sinistra), risalendo i /Parent per i box ereditabili.
     """
-    Ritorna TrimBox se presente, altrimenti CropBox, altrimenti MediaBox.
+    seen: set[int] = set()
+    while xref and xref not in seen:
+        seen.add(xref)
+        typ, val = doc.xref_get_key(xref, key)
+        if typ == "xref":  # array indiretto
+            typ, val = "array", doc.xref_object(int(val.split()[0]), compressed=True)
+        if typ == "array":
+            try:
+                x0, y0, x1, y1 = (float(v) for v in val.strip().strip("[]").split())
+            except ValueError:
+                return None
+            return min(x0, x1), min(y0, y1), max(x0, x1), max(y0, y1)
+        if key not in _INHERITABLE_BOXES:
+            return None
+        ptyp, pval = doc.xref_get_key(xref, "Parent")
+        if ptyp != "xref":
+            return None
+        xref = int(pval.split()[0])
+    return None
+
+
+def _page_boxes(doc: fitz.Document, page: fitz.Page) -> tuple[Box, Box]:
     """
-    for attr in ("trimbox", "cropbox", "mediabox"):
-        box = getattr(page, attr, None)
-        if box is not None:
-            return box
-    return page.mediabox  # fallback estremo
+    Ritorna (box di riferimento, MediaBox).
+    Il box di riferimento è TrimBox se presente, altrimenti CropBox,
+    altrimenti MediaBox.
+    """
+    media = _raw_box(doc, page.xref, "MediaBox")
+    if media is None:
+        r = page.mediabox
+        media = (r.x0, r.y0, r.x1, r.y1)
+    crop = _raw_box(doc, page.xref, "CropBox") or media
+    trim = _raw_box(doc, page.xref, "TrimBox") or crop
+    return trim, media
+
+
+def _samples_have_color(samples, n: int, tolerance: int) -> bool:
+    """
+    True se almeno un pixel ha uno scarto fra i canali R, G, B maggiore di
+    `tolerance` (0 = qualunque pixel non perfettamente grigio).
+    Un'unica operazione sull'intero buffer, niente loop Python per pixel.
+    """
+    if n < 3:
+        return False
+    if np is not None:
+        px = np.frombuffer(samples, dtype=np.uint8).reshape(-1, n)[:, :3]
+        return int((px.max(axis=1) - px.min(axis=1)).max(initial=0)) > tolerance
+
+    data = bytes(samples)
+    r, g, b = data[0::n], data[1::n], data[2::n]
+    if r == g == b:  # pagina in scala di grigi: confronto interamente in C
+        return False
+    if tolerance <= 0:
+        return True
+    return any(max(p) - min(p) > tolerance for p in zip(r, g, b, strict=False))
+
+
+def _page_has_color_pixels(page: fitz.Page, tolerance: int) -> bool:
+    """Render a bassa risoluzione e verifica se esiste un pixel non grigio."""
+    # Render molto piccolo (scala 0.1) per ridurre i byte
+    try:
+        pix = page.get_pixmap(matrix=fitz.Matrix(0.1, 0.1), colorspace=fitz.csRGB, alpha=False)
+    except TypeError:
+        # vecchie versioni non hanno colorspace: usiamo default
+        pix = page.get_pixmap(matrix=fitz.Matrix(0.1, 0.1))
+    return _samples_have_color(getattr(pix, "samples_mv", None) or pix.samples, pix.n, tolerance)
+
+
+def _image_has_color(doc: fitz.Document, xref: int, tolerance: int, memo: dict[int, bool | None]) -> bool | None:
+    """
+    L'immagine `xref` ha pixel non grigi? Stesso controllo del render
+    (`_samples_have_color`), fatto una volta per documento (memoizzato: un
+    logo ripetuto su ogni pagina si decodifica una volta sola). None se
+    l'immagine non si decodifica: decide il render.
+    """
+    if xref not in memo:
+        try:
+            pix = fitz.Pixmap(doc, xref)
+            decoded = pix.width * pix.height * pix.n
+            if pix.colorspace is None or pix.colorspace.n == 1:  # maschera o scala di grigi
+                memo[xref] = False
+            else:
+                if pix.alpha:
+                    pix = fitz.Pixmap(pix, 0)
+                if pix.colorspace.n != 3:
+                    pix = fitz.Pixmap(fitz.csRGB, pix)
+                memo[xref] = _samples_have_color(getattr(pix, "samples_mv", None) or pix.samples, pix.n, tolerance)
+            _release_decoded(decoded)
+        except Exception:
+            memo[xref] = None
+    return memo[xref]
+
+
+def _release_decoded(nbytes: int) -> None:
+    """Dopo la decodifica di un'immagine grande lo store di MuPDF si svuota (picco di RSS)."""
+    if nbytes >= _LARGE_IMAGE_BYTES:
+        fitz.TOOLS.store_shrink(100)
+
+
+def _footer_words(page: fitz.Page) -> list[tuple]:
+    """
+    Parole della sola fascia footer: la pagina viene ritagliata prima di
+    estrarre i caratteri, quindi il costo non dipende da quanto testo c'è
+    nel corpo.
+    """
+    r = page.rect
+    band = fitz.Rect(r.x0, r.y1 - FOOTER_BAND_PT - _FOOTER_SLACK_PT, r.x1, r.y1)
+    return page.get_text("words", clip=band, sort=True)
+
+
+def _image_size(doc: fitz.Document, xref: int, memo: dict[int, int | None]) -> int | None:
+    """Dimensione in byte dell'immagine `xref` (memoizzata: le immagini
+    ripetute su più pagine vengono estratte una volta sola)."""
+    if xref not in memo:
+        try:
+            base_image = doc.extract_image(xref)
+            memo[xref] = len(base_image["image"]) if base_image else None
+            if base_image:
+                _release_decoded(base_image["width"] * base_image["height"] * max(1, base_image["colorspace"]))
+        except Exception:
+            memo[xref] = None
+    return memo[xref]
 
 
 # ------------------------------------------------------------------ #
-# funzione pubblica principale
+# analisi della singola pagina
 # ------------------------------------------------------------------ #
-def extract_pdf_properties(file_content: bytes) -> dict[str, Any]:
+# aspetti dell'analisi per pagina oltre alla geometria (sempre presente)
+PAGE_ASPECTS: frozenset[str] = frozenset({"layout", "footer", "spans", "images", "color"})
+# aspetti costosi: in modalità campione solo sulle pagine del campione
+SAMPLED_ASPECTS: frozenset[str] = frozenset({"spans", "images", "color"})
+
+
+def _analyse_page(
+    doc: fitz.Document,
+    page: fitz.Page,
+    image_memo: dict[int, int | None],
+    color_memo: dict[int, bool | None],
+    *,
+    aspects: frozenset[str] = PAGE_ASPECTS,
+    color_tolerance: int = 0,
+    clock: dict[str, float] | None = None,
+) -> dict[str, Any]:
     """
-    Estrae le proprietà principali da un PDF:
-    • formato pagina e coerenza
-    • margini (TrimBox vs MediaBox)
-    • posizione numero di pagina
-    • heading/header/footer euristici
-    • analisi dettagliata (font, immagini, colori…)
+    Analizza una pagina in un unico passaggio e ritorna un risultato
+    parziale (solo tipi primitivi) che non dipende dalla posizione della
+    pagina nel documento: lo completa `_place`.
+
+    Box e formato ci sono sempre; `aspects` sceglie il resto:
+    • layout  testo, TOC, prima/ultima riga
+    • footer  candidati numero di pagina (services.extract.page_numbers)
+    • spans   paragrafi, font, testo colorato
+    • images  dimensioni delle immagini
+    • color   pagina a colori (testo colorato, un'immagine a colori o
+              render; implica spans)
+
+    `clock`, se passato, accumula i secondi spesi per ciascun aspetto.
+    """
+    tick = time.perf_counter()
+
+    def lap(aspect: str) -> None:
+        nonlocal tick
+        if clock is not None:
+            now = time.perf_counter()
+            clock[aspect] = clock.get(aspect, 0.0) + now - tick
+            tick = now
+
+    trim, _media = _page_boxes(doc, page)
+    part: dict[str, Any] = {
+        "width_cm": (trim[2] - trim[0]) * CM_PER_PT,
+        "height_cm": (trim[3] - trim[1]) * CM_PER_PT,
+    }
+    layout = "layout" in aspects
+    spans = "spans" in aspects or "color" in aspects
+    lap("geometry")
+
+    # immagini (il colore lo decide `_image_has_color`: una foto in scala
+    # di grigi non rende la pagina "a colori")
+    if "images" in aspects:
+        image_sizes: list[int] = []
+        for img in page.get_images(full=True):
+            size = _image_size(doc, img[0], image_memo)
+            if size is not None:
+                image_sizes.append(size)
+        part["image_sizes"] = image_sizes
+        lap("images")
+
+    # un solo TextPage per pagina, riusato da tutte le estrazioni di testo
+    tp = page.get_textpage(flags=fitz.TEXTFLAGS_BLOCKS) if layout or spans else None
+
+    if layout:
+        txt = page.get_text("text", textpage=tp, sort=True).lower()
+        part["toc_hit"] = any(k in txt for k in _TOC_KEYWORDS)
+        if txt:
+            lines = txt.splitlines()
+            part["first_line"] = lines[0].strip()
+            part["last_line"] = lines[-1].strip()
+        lap("layout")
+
+    if "footer" in aspects:
+        part["page_numbers"] = page_number_candidates(_footer_words(page))
+        lap("footer")
+
+    if spans:
+        # paragrafi approssimati
+        part["blocks"] = len(page.get_text("blocks", textpage=tp))
+
+        # font & testo colorato
+        fonts: dict[str, dict[float, int]] = {}
+        color_text = False
+        for block in page.get_text("dict", textpage=tp)["blocks"]:
+            for l in block.get("lines", []):
+                for s in l.get("spans", []):
+                    sizes = fonts.setdefault(s["font"], {})
+                    font_size = round(float(s["size"]), 1)
+                    sizes[font_size] = sizes.get(font_size, 0) + 1
+                    # colore RGB
+                    if s["color"] not in (0, 0x000000):
+                        color_text = True
+        part["fonts"] = fonts
+        part["color_text"] = color_text
+        lap("spans")
+
+    if "color" in aspects:
+        # render a bassa risoluzione solo se testo e immagini non hanno già
+        # deciso: un'immagine a colori basta, una grigia no (il colore può
+        # venire da tracciati o shading, che solo il render vede)
+        part["is_color"] = (
+            part["color_text"]
+            or any(_image_has_color(doc, img[0], color_tolerance, color_memo) for img in page.get_images())
+            or _page_has_color_pixels(page, color_tolerance)
+        )
+        lap("color")
+    return part
+
+
+def _place(content: dict[str, Any], idx: int, rect: fitz.Rect, *, reused: bool) -> dict[str, Any]:
+    """
+    Completa l'analisi di `_analyse_page` con ciò che dipende dalla
+    posizione (0-based) della pagina: numero di pagina (posizione e
+    confidenza, rispetto a `rect`, la pagina stessa) e header/footnote
+    euristici (solo le prime _HEADER_PAGES pagine).
     """
-    pdf_io = io.BytesIO(file_content)
-    reader = PyPDF2.PdfReader(pdf_io)
+    part = {"page": idx + 1, **content, "reused": reused}
+    candidates = part.pop("page_numbers", None)
+    if candidates is not None:
+        part["page_num_pos"], part["page_num_conf"] = page_number_position(candidates, idx + 1, rect.width, rect.height)
+    if idx >= _HEADER_PAGES:
+        part.pop("first_line", None)
+        part.pop("last_line", None)
+    return part
+
+
+def _analyse_pages(
+    doc: fitz.Document,
+    start: int,
+    stop: int,
+    *,
+    aspects: frozenset[str] = PAGE_ASPECTS,
+    clock: dict[str, float] | None = None,
+    detail: set[int] | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Risultati parziali delle pagine [start, stop) (0-based).
 
-    if not reader.pages:
+    Se servono aspetti oltre alla geometria le pagine già analizzate (stessa
+    impronta, services.extract.page_cache) vengono prese dalla cache:
+    `reused` lo segnala in ogni risultato. Con `detail` (modalità campione)
+    gli aspetti di SAMPLED_ASPECTS si calcolano solo su quelle pagine.
+    """
+    _require_pages(doc)
+    image_memo: dict[int, int | None] = {}
+    color_memo: dict[int, bool | None] = {}
+    stream_memo: dict[int, bytes] = {}
+    tolerance = settings.COLOR_TOLERANCE
+    cache = get_page_cache()
+    if "color" in aspects:
+        aspects |= {"spans"}
+    light = aspects - SAMPLED_ASPECTS
+
+    parts = []
+    for idx in range(start, min(stop, doc.page_count)):
+        page = doc[idx]
+        wanted = aspects if detail is None or idx in detail else light
+        if cache is None or not wanted:
+            content = _analyse_page(
+                doc, page, image_memo, color_memo, aspects=wanted, color_tolerance=tolerance, clock=clock,
+            )
+            parts.append(_place(content, idx, page.rect, reused=False))
+            _trim_store(wanted)
+            continue
+
+        started = time.perf_counter()
+        key = page_cache_key(page_fingerprint(doc, page, _page_boxes(doc, page), stream_memo))
+        raw = cache.get(key)
+        cached_aspects, content = loads_entry(raw) if raw is not None else (frozenset(), {})
+        if clock is not None:
+            clock["geometry"] = clock.get("geometry", 0.0) + time.perf_counter() - started
+        reused = wanted <= cached_aspects
+        if not reused:
+            # la voce si arricchisce: gli aspetti già in cache restano validi
+            cached_aspects |= wanted
+            content = _analyse_page(
+                doc, page, image_memo, color_memo, aspects=cached_aspects, color_tolerance=tolerance, clock=clock,
+            )
+            cache.put(key, dumps_entry(cached_aspects, content))
+            _trim_store(cached_aspects)
+        parts.append(_place(content, idx, page.rect, reused=reused))
+    return parts
+
+
+def _trim_store(aspects: frozenset[str]) -> None:
+    """Una volta per pagina, solo se la pagina ha decodificato immagini o fatto un render."""
+    if aspects & {"images", "color"}:
+        fitz.TOOLS.store_shrink(_STORE_SHRINK_PERCENT)
+
+
+def _require_pages(doc: fitz.Document) -> None:
+    if doc.page_count == 0:
         raise HTTPException(status_code=400, detail="PDF file has no pages")
 
-    # ---------- formato pagina & inconsistenze ---------------------
-    page_boxes: list[dict[str, float]] = []
-    inconsistent_pages: list[dict[str, float]] = []
-
-    for idx, pg in enumerate(reader.pages):
-        box = _pick_box(pg)
-        w_pt, h_pt = float(box.width), float(box.height)
-        page_boxes.append(
-            {"page": idx + 1, "width_cm": w_pt * CM_PER_PT, "height_cm": h_pt * CM_PER_PT}
-        )
 
-    ref_w, ref_h = page_boxes[0]["width_cm"], page_boxes[0]["height_cm"]
-    for pb in page_boxes[1:]:
-        if abs(pb["width_cm"] - ref_w) > 0.1 or abs(pb["height_cm"] - ref_h) > 0.1:
-            inconsistent_pages.append(pb)
-
-    # ---------- margini (pag. 1) -----------------------------------
-    first_pg = reader.pages[0]
-    trim, media = _pick_box(first_pg), first_pg.mediabox
-    margins = {
-        "top_cm": (float(media.upper_right[1]) - float(trim.upper_right[1])) * CM_PER_PT,
-        "bottom_cm": (float(trim.lower_left[1]) - float(media.lower_left[1])) * CM_PER_PT,
-        "left_cm": (float(trim.lower_left[0]) - float(media.lower_left[0])) * CM_PER_PT,
-        "right_cm": (float(media.upper_right[0]) - float(trim.upper_right[0])) * CM_PER_PT,
+# ------------------------------------------------------------------ #
+# grafo delle proprietà
+# ------------------------------------------------------------------ #
+def _first_page_margins(doc: fitz.Document) -> dict[str, float]:
+    """Margini (pag. 1) come differenza TrimBox vs MediaBox."""
+    trim, media = _page_boxes(doc, doc[0])
+    return {
+        "top_cm": (media[3] - trim[3]) * CM_PER_PT,
+        "bottom_cm": (trim[1] - media[1]) * CM_PER_PT,
+        "left_cm": (trim[0] - media[0]) * CM_PER_PT,
+        "right_cm": (media[2] - trim[2]) * CM_PER_PT,
     }
 
-    # ---------- heading / TOC euristico & numeri pagina ------------
-    headings: list[str] = []
-    headers: list[str] = []
-    footnotes: list[str] = []
-    page_num_positions: list[str] = []
-
-    with pdfplumber.open(pdf_io) as pdf:
-        h_pt = pdf.pages[0].height
-        w_pt = pdf.pages[0].width
-        bottom_th = 56  # ~2 cm
-
-        for idx, p in enumerate(pdf.pages):
-            txt = (p.extract_text() or "").lower()
-
-            if any(k in txt for k in ("indice", "table of contents", "contents", "toc", "sommario")):
-                headings.append("TOC detected")
-
-            if idx < 3 and txt:
-                lines = txt.splitlines()
-                headers.append(lines[0].strip())
-                footnotes.append(lines[-1].strip())
-
-            # rileva numero pagina
-            pos = "missing"
-            for w in p.extract_words(keep_blank_chars=False, use_text_flow=True):
-                if w["text"].strip().isdigit() and int(w["text"]) == idx + 1:
-                    if w["bottom"] < h_pt - bottom_th:  # non nel footer
-                        continue
-                    cx = (w["x0"] + w["x1"]) / 2
-                    if abs(cx - w_pt / 2) <= w_pt * 0.15:
-                        pos = "center"
-                    elif cx < w_pt * 0.25:
-                        pos = "left"
-                    elif cx > w_pt * 0.75:
-                        pos = "right"
-                    break
-            page_num_positions.append(pos)
-
-    # ---------- analisi dettagliata --------------------------------
-    detailed_analysis = extract_pdf_detailed_analysis(file_content)
 
+def _page_geometry(parts: list[dict[str, Any]]) -> dict[str, Any]:
+    """Formato di riferimento (pag. 1) e pagine di formato diverso."""
+    ref_w, ref_h = parts[0]["width_cm"], parts[0]["height_cm"]
+    inconsistent_pages = [
+        {"page": p["page"], "width_cm": p["width_cm"], "height_cm": p["height_cm"]}
+        for p in parts[1:]
+        if abs(p["width_cm"] - ref_w) > 0.1 or abs(p["height_cm"] - ref_h) > 0.1
+    ]
     return {
         "page_size": {"width_cm": ref_w, "height_cm": ref_h},
-        "margins": margins,
-        "has_toc": bool(headings),
-        "headings": headings,
-        "headers": headers,
-        "footnotes": footnotes,
-        "detailed_analysis": detailed_analysis,
-        "page_count": len(reader.pages),
-        "page_num_positions": page_num_positions,
         "inconsistent_pages": inconsistent_pages,
         "has_size_inconsistencies": bool(inconsistent_pages),
     }
 
 
-# ------------------------------------------------------------------ #
-# analisi approfondita
-# ------------------------------------------------------------------ #
-def extract_pdf_detailed_analysis(file_content: bytes) -> DetailedDocumentAnalysis:
+def _drawn(parts: list[dict[str, Any]], key: str, sample: set[int] | None) -> tuple[set[int], int]:
     """
-    Analisi PDF:
-    • raccoglie font, paragrafi, TOC, metadati
-    • rileva immagini e testo colorato
-    • calcola il numero di *pagine* che contengono elementi a colori
-      (colored_elements_count diventa pages_with_color)
+    Pagine (1-based) con `key` che fanno parte del campione e numero di
+    pagine senza `key`, da stimare. Le pagine fuori campione riprese dalla
+    cache per pagina non sono estratte a caso: contano come valori esatti e
+    solo il campione viene esteso alle pagine mancanti.
     """
+    missing = sum(key not in p for p in parts)
+    if sample is None or not missing:
+        return set(), missing
+    return {p["page"] for p in parts if key in p and p["page"] - 1 in sample}, missing
 
 
-    pdf_io = io.BytesIO(file_content)
-    pdf_doc = fitz.open(stream=pdf_io, filetype="pdf")
+def _extrapolate(total: int, drawn: int, sampled: int, missing: int) -> int:
+    """`total` osservato, di cui `drawn` sulle `sampled` pagine del campione → stima sul documento."""
+    return total - drawn + scale(drawn, sampled, sampled + missing)
 
+
+def _merge_fonts(parts: list[dict[str, Any]], sample: set[int] | None = None) -> dict[str, FontInfo]:
+    drawn, missing = _drawn(parts, "fonts", sample)
     fonts: dict[str, FontInfo] = {}
-    toc_structure: list[dict[str, str]] = []
-    paragraph_count = 0
-    image_count = 0
-    total_image_size = 0
+    in_sample: dict[tuple[str, float], int] = {}
+    for part in parts:
+        for name, sizes in part.get("fonts", {}).items():
+            fi = fonts.setdefault(name, FontInfo(sizes=[], count=0, size_counts={}))
+            for size, cnt in sizes.items():
+                fi.count += cnt
+                if size not in fi.sizes:
+                    fi.sizes.append(size)
+                fi.size_counts[size] = fi.size_counts.get(size, 0) + cnt
+                if part["page"] in drawn:
+                    in_sample[name, size] = in_sample.get((name, size), 0) + cnt
+    if missing:  # campione: conteggi stimati sul totale
+        for name, fi in fonts.items():
+            fi.size_counts = {
+                size: _extrapolate(cnt, in_sample.get((name, size), 0), len(drawn), missing)
+                for size, cnt in fi.size_counts.items()
+            }
+            fi.count = sum(fi.size_counts.values())
+    return fonts
+
+
+def _paragraph_count(parts: list[dict[str, Any]], sample: set[int] | None = None) -> int:
+    drawn, missing = _drawn(parts, "blocks", sample)
+    total = sum(p.get("blocks", 0) for p in parts)
+    return _extrapolate(total, sum(p["blocks"] for p in parts if p["page"] in drawn), len(drawn), missing)
+
+
+def _image_count(parts: list[dict[str, Any]], sample: set[int] | None = None) -> int:
+    drawn, missing = _drawn(parts, "image_sizes", sample)
+    total = sum(len(p.get("image_sizes", ())) for p in parts)
+    return _extrapolate(total, sum(len(p["image_sizes"]) for p in parts if p["page"] in drawn), len(drawn), missing)
+
+
+def _merge_images(parts: list[dict[str, Any]], sample: set[int] | None = None) -> ImageInfo | None:
+    sizes = [size for p in parts for size in p.get("image_sizes", ())]
+    if not sizes:
+        return None
+    return ImageInfo(
+        count=_image_count(parts, sample),
+        # la dimensione media non si scala: è quella delle immagini analizzate
+        avg_size_kb=round((sum(sizes) / len(sizes)) / 1024, 2),
+    )
+
+
+def _odd_size_pages(doc: fitz.Document) -> list[int]:
+    """Pagine (0-based) di formato diverso dalla prima, dai soli box."""
+    sizes = [(t[2] - t[0], t[3] - t[1]) for t in (_page_boxes(doc, page)[0] for page in doc)]
+    tol = 0.1 / CM_PER_PT
+    return [
+        i for i, (w, h) in enumerate(sizes)
+        if abs(w - sizes[0][0]) > tol or abs(h - sizes[0][1]) > tol
+    ]
+
+
+def _sampling(parts: list[dict[str, Any]], sample: list[int]) -> dict[str, Any]:
+    """
+    Campione e limiti di confidenza per pagine a colori / con immagini.
+    Contano solo le pagine del campione: quelle fuori campione prese dalla
+    cache per pagina possono avere gli stessi aspetti, ma la stima di Wilson
+    le considera già fra le non analizzate.
+    """
+    bounds = {}
+    in_sample = set(sample)
+    for name, key in (("color_pages", "is_color"), ("color_text_pages", "color_text"), ("image_pages", "image_sizes")):
+        if any(key in p for p in parts):
+            hits = [p["page"] - 1 for p in parts if p.get(key) and p["page"] - 1 in in_sample]
+            bounds[name] = count_bounds(hits, sample, len(parts))
+    report = sampling_report("page", len(parts), sample, bounds)
+    report["estimated"] = list(PDF_SAMPLED_PROPERTIES)
+    return report
+
+
+# nodi per-pagina: un solo passaggio calcola tutti quelli richiesti
+_PAGE_NODES = {"pages:geometry": None, **{f"pages:{a}": a for a in PAGE_ASPECTS}}
+
+# dipendenze dei nodi di `_pdf_graph`: tabella statica, così gli aspetti per
+# pagina di un insieme di proprietà si ricavano senza documento aperto
+_PDF_DEPS: dict[str, tuple[str, ...]] = {
+    "geometry": ("pages:geometry",),
+    "page_size": ("geometry",),
+    "inconsistent_pages": ("geometry",),
+    "has_size_inconsistencies": ("geometry",),
+    "margins": (),
+    "page_count": (),
+    "page_count_method": (),
+    "page_cache": ("pages:geometry",),
+    "headings": ("pages:layout",),
+    "has_toc": ("headings",),
+    "headers": ("pages:layout",),
+    "footnotes": ("pages:layout",),
+    "page_num_positions": ("pages:footer",),
+    "page_num_confidence": ("pages:footer",),
+    "fonts": ("pages:spans",),
+    "paragraph_count": ("pages:spans",),
+    "has_color_text": ("pages:spans",),
+    "images": ("pages:images",),
+    "image_count": ("pages:images",),
+    "color_pages": ("pages:color",),
+    "has_color_pages": ("color_pages",),
+    "metadata": (),
+    "toc_structure": (),
+    "detailed_analysis": (
+        "fonts", "images", "paragraph_count", "toc_structure", "metadata", "has_color_text", "color_pages",
+    ),
+}
+
+# `doc_props` completo di `extract_pdf_properties`, in quest'ordine
+PDF_PROPERTIES: tuple[str, ...] = (
+    "page_size",
+    "margins",
+    "has_toc",
+    "headings",
+    "headers",
+    "footnotes",
+    "detailed_analysis",
+    "page_count",
+    "page_count_method",
+    "page_num_positions",
+    "page_num_confidence",
+    "inconsistent_pages",
+    "has_size_inconsistencies",
+    "has_color_pages",
+    "has_color_text",
+    "image_count",
+    "page_cache",
+)
+
+# proprietà che in modalità campione sono stime (services.extract.sampling)
+PDF_SAMPLED_PROPERTIES: tuple[str, ...] = ("detailed_analysis", "has_color_pages", "has_color_text", "image_count")
+
+
+def _pdf_graph(doc: fitz.Document, *, sample: bool = False) -> PropertyGraph:
+    """
+    Proprietà di `doc_props` come nodi pigri sul documento aperto. Con
+    `sample` (e abbastanza pagine) gli aspetti costosi girano solo su un
+    campione stratificato e c'è il nodo `sampling`.
+    """
+    g = PropertyGraph()
+    pages = stratified_sample(doc.page_count, always=_odd_size_pages(doc)) if sample else None
+    detail = set(pages) if pages is not None else None
+    sampled: dict[str, Any] = {}
+
+    def load_pages(members: frozenset[str]) -> dict[str, Any]:
+        aspects = frozenset(a for m in members if (a := _PAGE_NODES[m]))
+        clock: dict[str, float] = {}
+        use_detail = detail if aspects & SAMPLED_ASPECTS else None
+        parts = _analyse_pages(doc, 0, doc.page_count, aspects=aspects, clock=clock, detail=use_detail)
+        if use_detail is not None:
+            sampled["report"] = _sampling(parts, pages)
+        # il tempo del passaggio unico, ripartito per aspetto
+        for member in members:
+            g.timings[member] = clock.get(_PAGE_NODES[member] or "geometry", 0.0)
+        # la geometria c'è sempre: resta disponibile anche se non richiesta
+        return dict.fromkeys(members | {"pages:geometry"}, parts)
+
+    g.batch("pages", _PAGE_NODES, load_pages)
+
+    def node(name: str, *extra: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        return g.node(name, *_PDF_DEPS[name], *extra)
 
-    color_pages: set[int] = set()
-    has_color_text = False
+    # ---------- formato pagina & inconsistenze ---------------------
+    node("geometry")(_page_geometry)
+    node("page_size")(lambda geo: geo["page_size"])
+    node("inconsistent_pages")(lambda geo: geo["inconsistent_pages"])
+    node("has_size_inconsistencies")(lambda geo: geo["has_size_inconsistencies"])
+    node("margins")(lambda: _first_page_margins(doc))
+    node("page_count")(lambda: doc.page_count)
+    node("page_count_method")(lambda: "pdf")
+
+    @node("page_cache")
+    def page_cache(parts):
+        reused = sum(p["reused"] for p in parts)
+        return {"reused": reused, "analysed": len(parts) - reused, "ratio": round(reused / len(parts), 3)}
+
+    # ---------- heading / TOC euristico & header -------------------
+    node("headings")(lambda parts: ["TOC detected" for p in parts if p["toc_hit"]])
+    node("has_toc")(bool)
+    node("headers")(lambda parts: [p["first_line"] for p in parts if "first_line" in p])
+    node("footnotes")(lambda parts: [p["last_line"] for p in parts if "last_line" in p])
+    node("page_num_positions")(lambda parts: [p["page_num_pos"] for p in parts])
+    node("page_num_confidence")(lambda parts: [p["page_num_conf"] for p in parts])
+
+    # ---------- font, immagini, colore -----------------------------
+    # in modalità campione conteggi stimati: il campione esteso alle pagine non analizzate
+    node("fonts")(lambda parts: _merge_fonts(parts, detail))
+    node("paragraph_count")(lambda parts: _paragraph_count(parts, detail))
+    node("has_color_text")(lambda parts: any(p.get("color_text") for p in parts))
+    node("images")(lambda parts: _merge_images(parts, detail))
+    node("image_count")(lambda parts: _image_count(parts, detail))
+    node("color_pages")(lambda parts: [p["page"] for p in parts if p.get("is_color")])
+    node("has_color_pages")(bool)
+
+    # ---------- metadati & TOC -------------------------------------
+    node("metadata")(lambda: {
+        k: str(v) for k, v in doc.metadata.items() if v and k not in ("format", "encryption")
+    })
+    node("toc_structure")(lambda: [
+        {"level": str(level), "text": title} for level, title, _ in doc.get_toc()
+    ])
+
+    # ---------- campione (solo in modalità campione) ----------------
+    if detail is not None:
+        # valorizzato da `load_pages`, che i batch eseguono prima dei nodi
+        g.node("sampling")(lambda: sampled.get("report"))
+
+    @node("detailed_analysis", *(("sampling",) if detail is not None else ()))
+    def detailed_analysis(fonts, images, paragraph_count, toc_structure, metadata, has_color_text, color_pages,
+                          sampling=None):
+        return DetailedDocumentAnalysis(
+            fonts=fonts,
+            images=images,
+            line_spacing={"Default": 1.2},
+            paragraph_count=paragraph_count,
+            toc_structure=toc_structure,
+            metadata=metadata,
+            has_color_pages=bool(color_pages),
+            has_color_text=has_color_text,
+            colored_elements_count=len(color_pages),  # = pagine con colore
+            color_pages=color_pages,
+            sampling=sampling,
+        )
 
-    # -------- metadati ------------------------------------------------
-    metadata = {k: str(v) for k, v in pdf_doc.metadata.items() if v and k not in ("format", "encryption")}
+    return g
 
-    # -------- scorre pagine ------------------------------------------
-    for page_num, page in enumerate(pdf_doc):
-        # paragrafi approssimati
-        paragraph_count += len(page.get_text("blocks"))
 
-        page_is_color = False  # flag locale
+def pdf_page_aspects(properties: Iterable[str]) -> frozenset[str]:
+    """Aspetti per pagina che servono a calcolare `properties` (da `_PDF_DEPS`)."""
+    aspects: set[str] = set()
+    seen: set[str] = set()
+    stack = [p for p in properties if p in _PDF_DEPS]
+    while stack:
+        name = stack.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        if aspect := _PAGE_NODES.get(name):
+            aspects.add(aspect)
+        stack.extend(_PDF_DEPS.get(name, ()))
+    return frozenset(aspects)
 
-        # immagini
-        for img in page.get_images(full=True):
-            xref = img[0]
-            try:
-                base_image = pdf_doc.extract_image(xref)
-                if base_image:
-                    image_count += 1
-                    total_image_size += len(base_image["image"])
-                    page_is_color = True
-            except Exception:
-                pass
-
-        # pixel color check (fallback a bassa risoluzione)
-        if not page_is_color:
-            # Render molto piccolo (scala 0.1) per ridurre i byte
-            try:
-                pix = page.get_pixmap(matrix=fitz.Matrix(0.1, 0.1), colorspace=fitz.csRGB)
-            except TypeError:
-                # vecchie versioni non hanno colorspace: usiamo default
-                pix = page.get_pixmap(matrix=fitz.Matrix(0.1, 0.1))
-
-            # pix.samples è un buffer di byte: RGBRGBRGB...
-            step = pix.n  # numero di canali (3 se RGB)
-            data = pix.samples  # type: ignore[arg-type]
-
-            for i in range(0, len(data), step):
-                # se è RGB, confronta i 3 canali
-                if step >= 3:
-                    r, g, b = data[i], data[i + 1], data[i + 2]
-                    if not (r == g == b):
-                        page_is_color = True
-                        break
 
-        # font & testo colorato
-        for span in page.get_text("dict")["blocks"]:
-            for l in span.get("lines", []):
-                for s in l.get("spans", []):
-                    font_name = s["font"]
-                    font_size = round(float(s["size"]), 1)
+def _compute(g: PropertyGraph, properties: Iterable[str] | None) -> dict[str, Any]:
+    names = PDF_PROPERTIES if properties is None else tuple(p for p in properties if p in g)
+    doc_props = g.compute(names)
+    doc_props["property_timings_ms"] = g.costs_ms(names)
+    if "sampling" in g and (report := g.compute(["sampling"])["sampling"]) is not None:
+        doc_props["sampling"] = report
+    return doc_props
 
-                    # aggiorna font dict
-                    fi = fonts.setdefault(font_name, FontInfo(sizes=[], count=0, size_counts={}))
-                    fi.count += 1
-                    if font_size not in fi.sizes:
-                        fi.sizes.append(font_size)
-                    fi.size_counts[font_size] = fi.size_counts.get(font_size, 0) + 1
 
-                    # colore RGB
-                    if s["color"] not in (0, 0x000000):
-                        has_color_text = True
-                        page_is_color = True
-
-        if page_is_color:
-            color_pages.add(page_num)
-
-    # -------- TOC -----------------------------------------------------
-    toc = pdf_doc.get_toc()
-    if toc:
-        for level, title, _ in toc:
-            toc_structure.append({"level": str(level), "text": title})
-
-    # -------- immagini info ------------------------------------------
-    image_info = None
-    if image_count:
-        image_info = ImageInfo(
-            count=image_count,
-            avg_size_kb=round((total_image_size / image_count) / 1024, 2),
-        )
+def _open(source: bytes | str) -> fitz.Document:
+    """Bytes in memoria oppure percorso (ogni shard apre il proprio handle)."""
+    if isinstance(source, str):
+        return fitz.open(source, filetype="pdf")
+    return fitz.open(stream=source, filetype="pdf")
+
+
+# ------------------------------------------------------------------ #
+# funzioni pubbliche
+# ------------------------------------------------------------------ #
+def extract_pdf_properties(
+    file_content: bytes | str,
+    properties: Iterable[str] | None = None,
+    *,
+    sample: bool = False,
+) -> dict[str, Any]:
+    """
+    Estrae le proprietà principali da un PDF:
+    • formato pagina e coerenza
+    • margini (TrimBox vs MediaBox)
+    • posizione numero di pagina
+    • heading/header/footer euristici
+    • analisi dettagliata (font, immagini, colori…)
+
+    `file_content` sono i byte del PDF oppure il suo percorso (letto da
+    MuPDF senza copiarlo in memoria). `properties` limita il lavoro alle
+    proprietà indicate (e a ciò da cui dipendono); i nomi che il PDF non
+    conosce vengono ignorati. `property_timings_ms` riporta il costo di
+    ogni proprietà restituita.
+
+    Con `sample` font, immagini e colore vengono stimati su un campione di
+    pagine (services.extract.sampling): `doc_props["sampling"]` riporta
+    campione e limiti di confidenza.
+    """
+    with _open(file_content) as pdf_doc:
+        _require_pages(pdf_doc)
+        return _compute(_pdf_graph(pdf_doc, sample=sample), properties)
+
 
-    return DetailedDocumentAnalysis(
-        fonts=fonts,
-        images=image_info,
-        line_spacing={"Default": 1.2},
-        paragraph_count=paragraph_count,
-        toc_structure=toc_structure,
-        metadata=metadata,
-        has_color_pages=bool(color_pages),
-        has_color_text=has_color_text,
-        colored_elements_count=len(color_pages),  # = pagine con colore
-    )
\ No newline at end of file
+def extract_pdf_detailed_analysis(file_content: bytes | str, *, sample: bool = False) -> DetailedDocumentAnalysis:
+    """
+    Analisi PDF:
+    • raccoglie font, paragrafi, TOC, metadati
+    • rileva immagini e testo colorato
+    • calcola le *pagine* che contengono elementi a colori
+      (color_pages, 1-based; colored_elements_count = quante sono)
+
+    Con `sample` l'analisi è a campione e `sampling` ne riporta i limiti.
+    """
+    with _open(file_content) as pdf_doc:
+        _require_pages(pdf_doc)
+        return _pdf_graph(pdf_doc, sample=sample).compute(["detailed_analysis"])["detailed_analysis"]
+
+
+# ------------------------------------------------------------------ #
+# analisi a shard (intervalli di pagine in processi diversi)
+# ------------------------------------------------------------------ #
+def pdf_page_count(source: bytes | str) -> int:
+    with _open(source) as pdf_doc:
+        return pdf_doc.page_count
+
+
+def analyse_pdf_page_range(
+    source: bytes | str,
+    start: int,
+    stop: int,
+    aspects: Iterable[str] = PAGE_ASPECTS,
+) -> list[dict[str, Any]]:
+    """
+    Analizza le pagine [start, stop) con un handle proprio e ritorna i
+    risultati parziali (solo tipi primitivi, quindi picklabili).
+    """
+    with _open(source) as pdf_doc:
+        return _analyse_pages(pdf_doc, start, stop, aspects=frozenset(aspects))
+
+
+def merge_pdf_page_parts(
+    source: bytes | str,
+    parts: list[dict[str, Any]],
+    properties: Iterable[str] | None = None,
+) -> dict[str, Any]:
+    """
+    Fonde i risultati di più shard nello stesso `doc_props` di
+    `extract_pdf_properties`. L'ordine è quello delle pagine, qualunque sia
+    l'ordine di arrivo degli shard; gli shard devono aver calcolato gli
+    aspetti di `pdf_page_aspects(properties)`.
+    """
+    parts = sorted(parts, key=lambda p: p["page"])
+    with _open(source) as pdf_doc:
+        _require_pages(pdf_doc)
+        g = _pdf_graph(pdf_doc)
+        for node in _PAGE_NODES:
+            g.seed(node, parts)
+        return _compute(g, properties)
@@ -0,0 +1,496 @@
+"""
+Pool di processi per l'estrazione
+=================================
+Le funzioni `extract_*_properties` sono CPU-bound: eseguite nell'event-loop
+bloccano uvicorn (anche /api/health). Qui vengono spostate in un
+`ProcessPoolExecutor` configurabile da `config.Settings`:
+
+• EXTRACT_WORKERS              numero di processi (0 = solo thread)
+• EXTRACT_MAX_TASKS_PER_CHILD  ricicla il processo dopo N job
+• EXTRACT_JOB_TIMEOUT          timeout (s) del singolo job
+• PDF_SHARD_PAGES              pagine minime per shard PDF (0 = niente shard)
+
+I risultati tornano al processo padre serializzati con `serialize.dumps_props`.
+Il documento arriva come byte oppure come percorso (utils.document_source):
+col percorso ai worker passa solo la stringa, non il contenuto.
+
+I PDF lunghi vengono divisi in intervalli di pagine analizzati in parallelo
+da worker diversi: ognuno apre il proprio handle su una copia temporanea del
+file, il padre fonde i risultati parziali in ordine di pagina.
+
+Con `on_pages` (job asincroni) il PDF viene diviso in blocchi da
+JOB_PROGRESS_PAGES pagine: a ogni blocco completato il chiamante riceve
+(pagine analizzate, pagine totali). Con `kill_on_cancel` un job annullato
+non lascia lavoro ai worker: i blocchi in coda vengono scartati e, se quelli
+in corso non finiscono entro JOB_CANCEL_GRACE secondi, i worker vengono
+terminati. Per questo un job `kill_on_cancel` gira su un executor tutto suo
+(al più EXTRACT_WORKERS processi): terminarlo non tocca gli altri job. Gli
+executor dei job sono al più JOBS_CONCURRENCY e vengono riusati dal job
+successivo (niente avvio di nuovi interpreti a ogni job); i job oltre il
+limite attendono un executor libero, e l'attesa non conta per il timeout.
+
+Un processo si interrompe solo terminando l'intero executor, e un worker
+terminato rompe tutti i job che vi girano: l'executor di un job scaduto (o
+abbandonato) non riceve più lavoro, i nuovi job vanno su uno nuovo e i suoi
+processi vengono terminati solo quando gli altri job in corso su di esso
+sono finiti.
+
+Con `sample` (analisi a campione, services.extract.sampling) il PDF non
+viene diviso in shard: il lavoro costoso riguarda poche pagine.
+
+`properties` (tupla di nomi di `doc_props`) limita l'estrazione a quelle
+proprietà e a ciò da cui dipendono (services.extract.graph); gli shard PDF
+analizzano solo gli aspetti per pagina che servono.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+from collections.abc import AsyncIterator, Callable, Iterable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import asynccontextmanager
+from typing import Any
+
+from fastapi import HTTPException
+
+from config import settings
+from utils.logging import get_logger
+
+from .serialize import dumps_props, loads_props
+
+log = get_logger("document_validator")
+
+
+class ExtractionTimeoutError(TimeoutError):
+    """Il job di estrazione ha superato EXTRACT_JOB_TIMEOUT."""
+
+
+# (pagine analizzate, pagine totali)
+PagesCallback = Callable[[int, int], None]
+
+
+# ------------------------------------------------------------------ #
+# lato worker
+# ------------------------------------------------------------------ #
+# (contenuto, proprietà richieste o None = tutte, sample=…)
+Extractor = Callable[..., dict[str, Any]]
+
+
+def _extractors() -> dict[str, Extractor]:
+    # import locali: il modulo viene importato anche nei processi "spawn"
+    from .docx import extract_docx_properties
+    from .odt import extract_odt_properties
+    from .pdf import extract_pdf_properties
+
+    return {
+        "pdf": extract_pdf_properties,
+        "docx": extract_docx_properties,
+        "odt": extract_odt_properties,
+    }
+
+
+def _tagged(fn: Callable[..., Any], *args: Any) -> tuple[str, Any]:
+    """
+    Esegue `fn` nel worker e ritorna ("ok", risultato) oppure
+    (tipo errore, dettaglio): le eccezioni non viaggiano via pickle
+    (HTTPException non è picklable).
+    """
+    try:
+        return "ok", fn(*args)
+    except HTTPException as e:
+        return f"http:{e.status_code}", str(e.detail).encode("utf-8")
+    except ValueError as e:
+        return "value", str(e).encode("utf-8")
+    except Exception as e:  # noqa: BLE001
+        return "error", f"{type(e).__name__}: {e}".encode()
+
+
+def _extract_serialized(
+    fmt: str, file_content: bytes | str, properties: tuple[str, ...] | None, sample: bool
+) -> bytes:
+    return dumps_props(_extractors()[fmt](file_content, properties, sample=sample))
+
+
+def _run_extractor(
+    fmt: str, file_content: bytes | str, properties: tuple[str, ...] | None = None, sample: bool = False
+) -> tuple[str, Any]:
+    """Entry-point eseguito nel worker: props serializzate."""
+    return _tagged(_extract_serialized, fmt, file_content, properties, sample)
+
+
+def _run_pdf_shard(path: str, start: int, stop: int, aspects: frozenset[str]) -> tuple[str, Any]:
+    """Entry-point eseguito nel worker: risultati parziali di un intervallo di pagine."""
+    from .pdf import analyse_pdf_page_range
+
+    return _tagged(analyse_pdf_page_range, path, start, stop, aspects)
+
+
+def _payload(outcome: tuple[str, Any]) -> Any:
+    kind, data = outcome
+    if kind == "ok":
+        return data
+    detail = data.decode("utf-8")
+    if kind.startswith("http:"):
+        raise HTTPException(status_code=int(kind[5:]), detail=detail)
+    if kind == "value":
+        raise ValueError(detail)
+    raise RuntimeError(detail)
+
+
+def _unpack(outcome: tuple[str, Any]) -> dict[str, Any]:
+    return loads_props(_payload(outcome))
+
+
+def plan_shards(page_count: int, workers: int, min_pages: int) -> list[tuple[int, int]]:
+    """
+    Intervalli [start, stop) bilanciati: al più uno per worker e mai meno di
+    `min_pages` pagine ciascuno.
+    """
+    n = min(workers, page_count // min_pages) if min_pages > 0 else 1
+    if n <= 1:
+        return [(0, page_count)]
+    bounds = [page_count * i // n for i in range(n + 1)]
+    return list(zip(bounds, bounds[1:], strict=False))
+
+
+def plan_chunks(page_count: int, chunk_pages: int) -> list[tuple[int, int]]:
+    """Intervalli [start, stop) di `chunk_pages` pagine (l'ultimo più corto)."""
+    step = max(1, chunk_pages)
+    return [(start, min(start + step, page_count)) for start in range(0, page_count, step)]
+
+
+# ------------------------------------------------------------------ #
+# lato padre
+# ------------------------------------------------------------------ #
+class ExtractionPool:
+    """Wrapper async attorno a un `ProcessPoolExecutor` riciclabile."""
+
+    def __init__(
+        self,
+        workers: int,
+        *,
+        max_tasks_per_child: int | None = None,
+        timeout: float | None = None,
+        jobs: int = 1,
+    ) -> None:
+        self.workers = workers
+        self.max_tasks_per_child = max_tasks_per_child
+        self.timeout = timeout
+        self.jobs = max(1, jobs)
+        self._executor: ProcessPoolExecutor | None = None
+        # executor dei job `kill_on_cancel` liberi, pronti per il prossimo job
+        self._idle: list[ProcessPoolExecutor] = []
+        # semaforo dei job `kill_on_cancel`, legato all'event-loop che lo usa
+        self._slots: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
+        # future non ancora concluse, per executor
+        self._inflight: dict[ProcessPoolExecutor, set[Future]] = {}
+        # executor ritirati → future da non attendere prima di terminarli
+        self._doomed: dict[ProcessPoolExecutor, set[Future]] = {}
+
+    # -------------------------------------------------------------
+    def _new_executor(self, workers: int) -> ProcessPoolExecutor:
+        kwargs: dict[str, Any] = {
+            "max_workers": workers,
+            # "spawn": niente fork di un processo con thread uvicorn attivi
+            "mp_context": multiprocessing.get_context("spawn"),
+        }
+        if self.max_tasks_per_child and sys.version_info >= (3, 11):
+            kwargs["max_tasks_per_child"] = self.max_tasks_per_child
+        return ProcessPoolExecutor(**kwargs)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Executor condiviso dai job che non vanno mai interrotti."""
+        if self._executor is None:
+            self._executor = self._new_executor(self.workers)
+        return self._executor
+
+    def _executor_for(self, kill_on_cancel: bool) -> ProcessPoolExecutor:
+        """Job interrompibile: executor proprio, uno libero se c'è (i processi partono su richiesta)."""
+        if not kill_on_cancel:
+            return self._get_executor()
+        return self._idle.pop() if self._idle else self._new_executor(self.workers)
+
+    def _job_slots(self) -> asyncio.Semaphore:
+        """Al più `jobs` job `kill_on_cancel` (e quindi executor) alla volta."""
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots[0] is not loop:
+            self._slots = (loop, asyncio.Semaphore(self.jobs))
+        return self._slots[1]
+
+    def _release(self, executor: ProcessPoolExecutor) -> None:
+        """Fine di un job interrompibile: l'executor, se ancora sano, passa al prossimo job."""
+        if executor in self._doomed or self._inflight.pop(executor, None) is None:
+            return  # ritirato o rotto: i suoi processi sono già stati terminati
+        self._idle.append(executor)
+
+    def _submit(self, executor: ProcessPoolExecutor, calls: list[tuple[Any, ...]]) -> list[Future]:
+        """Sottomette `calls` (funzione, argomenti…) tenendo traccia delle future in corso."""
+        inflight = self._inflight.setdefault(executor, set())
+        futures = [executor.submit(*call) for call in calls]
+        for f in futures:
+            inflight.add(f)
+            f.add_done_callback(inflight.discard)
+        return futures
+
+    def _retire(self, executor: ProcessPoolExecutor | None, doomed: Iterable[Future]) -> None:
+        """
+        `doomed` non finiranno (timeout, job abbandonato): `executor` non
+        riceve più lavoro e i suoi processi vengono terminati appena le altre
+        future in corso su di esso sono concluse.
+        """
+        doomed = [f for f in doomed if not f.done()]
+        if executor is None or not doomed:
+            return
+        if self._executor is executor:
+            self._executor = None
+        reaping = executor in self._doomed
+        self._doomed.setdefault(executor, set()).update(doomed)
+        if reaping:
+            return
+        if not self._inflight.get(executor, set()) - self._doomed[executor]:
+            self._kill(executor)
+            return
+        log.info("extraction_executor_retired", waiting=len(self._inflight[executor] - self._doomed[executor]))
+        threading.Thread(target=self._reap, args=(executor,), name="extract-reaper", daemon=True).start()
+
+    def _reap(self, executor: ProcessPoolExecutor) -> None:
+        while others := self._inflight.get(executor, set()) - self._doomed.get(executor, set()):
+            # il timeout rilegge `_doomed`: altri job possono scadere nel frattempo
+            concurrent.futures.wait(others, timeout=1.0, return_when=concurrent.futures.FIRST_COMPLETED)
+        self._kill(executor)
+
+    def _kill(self, executor: ProcessPoolExecutor) -> None:
+        """Termina i worker di `executor` (anche quelli bloccati)."""
+        # l'API pubblica non consente di interrompere un job in corso
+        for proc in list((getattr(executor, "_processes", None) or {}).values()):
+            proc.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+        self._inflight.pop(executor, None)
+        self._doomed.pop(executor, None)
+
+    def _discard(self, executor: ProcessPoolExecutor | None) -> None:
+        """
+        Executor rotto (worker morto): il prossimo job ne crea uno nuovo.
+        No-op se nel frattempo è già stato sostituito: non tocca quello nuovo.
+        """
+        if executor is None:
+            return
+        if self._executor is executor:
+            self._executor = None
+        self._inflight.pop(executor, None)
+        self._doomed.pop(executor, None)
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # -------------------------------------------------------------
+    async def _abandon(self, executor: ProcessPoolExecutor | None, futures: list[Future]) -> None:
+        """
+        Job annullato: scarta i task ancora in coda; quelli già in esecuzione
+        hanno JOB_CANCEL_GRACE secondi per finire, poi i worker vengono
+        terminati (un processo non si interrompe in altro modo).
+        """
+        running = [f for f in futures if not f.cancel() and not f.done()]
+        if not running:
+            return
+        _, pending = await asyncio.to_thread(
+            concurrent.futures.wait, running, settings.JOB_CANCEL_GRACE
+        )
+        if pending:
+            log.warning("extraction_cancel_kill", running=len(pending))
+            self._retire(executor, pending)
+
+    @staticmethod
+    def _worth_sharding(properties: tuple[str, ...] | None) -> bool:
+        """Solo geometria e metadati (nessun aspetto per pagina): un worker basta."""
+        from .pdf import pdf_page_aspects
+
+        return properties is None or bool(pdf_page_aspects(properties))
+
+    async def _page_count(self, file_content: bytes | str) -> int | None:
+        from .pdf import pdf_page_count
+
+        try:
+            return await asyncio.to_thread(pdf_page_count, file_content)
+        except Exception:  # noqa: BLE001 – l'errore lo riporta il job normale
+            return None
+
+    async def _pdf_shards(self, file_content: bytes | str, on_pages: PagesCallback | None) -> list[tuple[int, int]]:
+        if on_pages is not None:
+            page_count = await self._page_count(file_content)
+            return plan_chunks(page_count, settings.JOB_PROGRESS_PAGES) if page_count else []
+        if self.workers <= 1 or settings.PDF_SHARD_PAGES <= 0:
+            return []
+        page_count = await self._page_count(file_content)
+        if page_count is None:
+            return []
+        shards = plan_shards(page_count, self.workers, settings.PDF_SHARD_PAGES)
+        return shards if len(shards) > 1 else []
+
+    async def _gather_shards(
+        self,
+        path: str,
+        futures: list[Future],
+        total: int,
+        on_pages: PagesCallback | None,
+        properties: tuple[str, ...] | None,
+    ) -> dict[str, Any]:
+        from .pdf import merge_pdf_page_parts
+
+        if on_pages is not None:
+            on_pages(0, total)
+        parts: list[dict[str, Any]] = []
+        for done in asyncio.as_completed([asyncio.wrap_future(f) for f in futures]):
+            parts.extend(_payload(await done))
+            if on_pages is not None:
+                on_pages(len(parts), total)
+        return await asyncio.to_thread(merge_pdf_page_parts, path, parts, properties)
+
+    async def run(
+        self,
+        fmt: str,
+        file_content: bytes | str,
+        *,
+        on_pages: PagesCallback | None = None,
+        kill_on_cancel: bool = False,
+        properties: Iterable[str] | None = None,
+        sample: bool = False,
+    ) -> dict[str, Any]:
+        """
+        Esegue l'estrattore per `fmt` in un worker e ritorna `doc_props`.
+        `on_pages` riceve l'avanzamento dei PDF; con `kill_on_cancel`
+        l'annullamento interrompe anche il lavoro già in corso nei worker.
+        `properties` limita le proprietà calcolate (None = tutte); `sample`
+        chiede l'analisi a campione.
+        """
+        properties = tuple(properties) if properties is not None else None
+        if kill_on_cancel and self.workers > 0:
+            async with self._job_slots():
+                return await self._run(fmt, file_content, on_pages, kill_on_cancel, properties, sample)
+        return await self._run(fmt, file_content, on_pages, kill_on_cancel, properties, sample)
+
+    async def _run(
+        self,
+        fmt: str,
+        file_content: bytes | str,
+        on_pages: PagesCallback | None,
+        kill_on_cancel: bool,
+        properties: tuple[str, ...] | None,
+        sample: bool,
+    ) -> dict[str, Any]:
+        executor: ProcessPoolExecutor | None = None
+        futures: list[Future] = []
+        try:
+            if self.workers <= 0:
+                # niente processi: almeno fuori dall'event-loop
+                fn = _extractors()[fmt]
+                doc_props = await asyncio.wait_for(
+                    asyncio.to_thread(fn, file_content, properties, sample=sample), self.timeout
+                )
+                if on_pages is not None and fmt == "pdf":
+                    pages = doc_props.get("page_count") or 0
+                    on_pages(pages, pages)
+                return doc_props
+
+            on_pages = on_pages if fmt == "pdf" else None
+            if (
+                fmt == "pdf"
+                and not sample
+                and self._worth_sharding(properties)
+                and (shards := await self._pdf_shards(file_content, on_pages))
+            ):
+                from .pdf import PAGE_ASPECTS, pdf_page_aspects
+
+                log.info("pdf_sharded_extraction", shards=len(shards))
+                aspects = PAGE_ASPECTS if properties is None else pdf_page_aspects(properties)
+                async with _shared_path(file_content) as path:
+                    # executor preso subito prima di sottomettere: mai uno già ritirato
+                    executor = self._executor_for(kill_on_cancel)
+                    futures = self._submit(
+                        executor, [(_run_pdf_shard, path, start, stop, aspects) for start, stop in shards]
+                    )
+                    return await asyncio.wait_for(
+                        self._gather_shards(path, futures, shards[-1][1], on_pages, properties),
+                        self.timeout,
+                    )
+
+            executor = self._executor_for(kill_on_cancel)
+            futures = self._submit(executor, [(_run_extractor, fmt, file_content, properties, sample)])
+            outcome = await asyncio.wait_for(asyncio.wrap_future(futures[0]), self.timeout)
+        except asyncio.CancelledError:
+            if kill_on_cancel:
+                await self._abandon(executor, futures)
+            else:
+                for f in futures:
+                    f.cancel()
+            raise
+        except asyncio.TimeoutError:
+            log.warning("extraction_timeout", file_format=fmt, timeout=self.timeout)
+            self._retire(executor, futures)
+            raise ExtractionTimeoutError(f"Estrazione {fmt} oltre {self.timeout}s")
+        except BrokenProcessPool:
+            # un worker è morto (OOM, segfault nella libreria C…)
+            log.error("extraction_pool_broken", file_format=fmt)
+            self._discard(executor)
+            raise RuntimeError("Worker di estrazione terminato inaspettatamente")
+        finally:
+            if kill_on_cancel and executor is not None:
+                self._release(executor)
+        return _unpack(outcome)
+
+    def shutdown(self) -> None:
+        for executor in list(self._doomed):
+            self._kill(executor)
+        for executor in self._idle:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._idle.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._inflight.clear()
+
+
+@asynccontextmanager
+async def _shared_path(file_content: bytes | str) -> AsyncIterator[str]:
+    """I worker aprono il file per percorso: byte in memoria → copia temporanea."""
+    if isinstance(file_content, str):
+        yield file_content
+        return
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            await asyncio.to_thread(fh.write, file_content)
+        yield path
+    finally:
+        os.unlink(path)
+
+
+# ------------------------------------------------------------------ #
+# istanza di processo (lazy)
+# ------------------------------------------------------------------ #
+_pool: ExtractionPool | None = None
+
+
+def get_extraction_pool() -> ExtractionPool:
+    global _pool
+    if _pool is None:
+        _pool = ExtractionPool(
+            settings.EXTRACT_WORKERS,
+            max_tasks_per_child=settings.EXTRACT_MAX_TASKS_PER_CHILD,
+            timeout=settings.EXTRACT_JOB_TIMEOUT,
+            jobs=settings.JOBS_CONCURRENCY,
+        )
+    return _pool
+
+
+def shutdown_extraction_pool() -> None:
+    """Da registrare sullo shutdown dell'app FastAPI."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
@@ -0,0 +1,188 @@
+"""
+Analisi a campione
+==================
+Per decidere la conformità di un documento di migliaia di pagine non servono
+il conteggio esatto dei font di ogni span né il controllo colore di ogni
+pagina. In modalità campione (`sample=True` degli estrattori) le analisi
+costose girano solo su un campione stratificato di pagine (di blocchi di
+paragrafi per il DOCX):
+
+• le prime e le ultime SAMPLE_EDGE_PAGES
+• SAMPLE_MIDDLE_PAGES pagine nel mezzo, una a caso per strato
+• ogni pagina di formato diverso dalla prima
+
+Sotto SAMPLE_MIN_PAGES pagine l'analisi resta completa. Il campione è
+deterministico (stesso documento → stesse pagine), quindi il risultato si
+può mettere in cache.
+
+Il DOCX si legge in un solo passaggio e il numero di blocchi si conosce solo
+alla fine: `StreamSample` sceglie il campione mentre i blocchi arrivano,
+con strati che si allargano man mano (fra SAMPLE_MIDDLE_PAGES e il doppio
+nel mezzo).
+
+`doc_props["sampling"]` riporta il campione e, per ciò che è stimato,
+limiti di confidenza: le pagine del campione sono note esattamente, per le
+altre vale il limite superiore di Wilson sulla frazione osservata nel mezzo.
+Le proprietà in `estimated` possono sottostimare: se una regola che le
+legge è KO la validazione ripete l'analisi completa (services.validation).
+
+IMPORTANTE: non dipende da FastAPI né da nulla dell'API layer.
+"""
+
+from __future__ import annotations
+
+import math
+import random
+from collections.abc import Iterable
+from typing import Any, Generic, TypeVar
+
+from config import settings
+
+_Z = 1.96  # confidenza 95%
+
+T = TypeVar("T")
+
+
+def stratified_sample(
+    total: int,
+    *,
+    always: Iterable[int] = (),
+    edge: int | None = None,
+    middle: int | None = None,
+) -> list[int] | None:
+    """
+    Indici (0-based, ordinati) delle unità da analizzare su `total`, None se
+    il documento è troppo piccolo per campionare. `always` (es. pagine di
+    formato diverso) entra sempre nel campione.
+    """
+    edge = settings.SAMPLE_EDGE_PAGES if edge is None else edge
+    middle = settings.SAMPLE_MIDDLE_PAGES if middle is None else middle
+    if total < max(settings.SAMPLE_MIN_PAGES, 2 * edge + middle + 1):
+        return None
+
+    chosen = set(range(edge)) | set(range(total - edge, total)) | set(always)
+    lo, hi = edge, total - edge
+    rng = random.Random(total)  # deterministico
+    for i in range(middle):
+        start = lo + (hi - lo) * i // middle
+        stop = lo + (hi - lo) * (i + 1) // middle
+        chosen.add(rng.randrange(start, stop))
+    return sorted(chosen)
+
+
+class StreamSample(Generic[T]):
+    """
+    Campione stratificato su unità che arrivano in ordine senza sapere
+    quante saranno. Stesse regole di `stratified_sample`: le prime e le
+    ultime `edge`, un'unità a caso per strato nel mezzo, niente campione
+    sotto SAMPLE_MIN_PAGES. Gli strati partono larghi un'unità; quando sono
+    2 × `middle` si fondono a coppie (resta a caso una delle due scelte) e
+    la larghezza raddoppia. Dentro lo strato in corso la scelta è un
+    reservoir di un'unità.
+
+    Il contenuto di ogni unità (`add`) resta in memoria solo finché può
+    ancora finire nel campione: `finish` ritorna il campione e il contenuto
+    delle sole unità scelte (di tutte, se il campione è None).
+    """
+
+    def __init__(self, *, edge: int | None = None, middle: int | None = None) -> None:
+        self.edge = settings.SAMPLE_EDGE_PAGES if edge is None else edge
+        self.middle = max(1, settings.SAMPLE_MIDDLE_PAGES if middle is None else middle)
+        self.min_total = max(settings.SAMPLE_MIN_PAGES, 2 * self.edge + self.middle + 1)
+        self.total = 0
+        self._rng = random.Random(0)  # deterministico
+        self._width = 1
+        self._strata: set[int] = set()   # scelte degli strati completi
+        self._pick: int | None = None    # scelta dello strato in corso
+        self._seen = 0                   # unità viste nello strato in corso
+        self._held: dict[int, T] = {}
+
+    def _needed(self, i: int) -> bool:
+        return (
+            self.total < self.min_total
+            or i < self.edge
+            or i >= self.total - self.edge
+            or i == self._pick
+            or i in self._strata
+        )
+
+    def _drop(self, *units: int | None) -> None:
+        for i in units:
+            if i is not None and not self._needed(i):
+                self._held.pop(i, None)
+
+    def add(self, content: T) -> int:
+        """Registra la prossima unità con il suo contenuto; ne ritorna l'indice."""
+        i = self.total
+        self.total += 1
+        self._held[i] = content
+        if i >= self.edge:
+            self._seen += 1
+            if self._rng.randrange(self._seen) == 0:
+                self._pick, replaced = i, self._pick
+                self._drop(replaced)
+            if self._seen == self._width:
+                assert self._pick is not None
+                self._strata.add(self._pick)
+                self._pick, self._seen = None, 0
+                if len(self._strata) == 2 * self.middle:
+                    ordered = sorted(self._strata)
+                    kept = {pair[self._rng.randrange(2)] for pair in zip(ordered[::2], ordered[1::2], strict=True)}
+                    self._strata, dropped = kept, set(ordered) - kept
+                    self._width *= 2
+                    self._drop(*dropped)
+        self._drop(i - self.edge)  # esce dalle ultime `edge`
+        if self.total == self.min_total:
+            self._drop(*list(self._held))
+        return i
+
+    def finish(self) -> tuple[list[int] | None, dict[int, T]]:
+        """(campione o None, contenuto per indice): ordinati per indice."""
+        held = dict(sorted(self._held.items()))
+        return (list(held) if self.total >= self.min_total else None), held
+
+
+def wilson_upper(hits: int, n: int, z: float = _Z) -> float:
+    """Limite superiore dell'intervallo di Wilson per la proporzione hits/n."""
+    if n == 0:
+        return 1.0
+    p = hits / n
+    denom = 1 + z * z / n
+    centre = p + z * z / (2 * n)
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n))
+    return min(1.0, (centre + margin) / denom)
+
+
+def count_bounds(hits: Iterable[int], sample: list[int], total: int, edge: int | None = None) -> dict[str, int]:
+    """
+    Limiti per il numero di unità (pagine) con una caratteristica: `hits`
+    sono gli indici trovati nel campione. Le unità del campione sono note;
+    per quelle del mezzo non analizzate si usa il limite di Wilson sulla
+    frazione osservata fra le unità del mezzo analizzate.
+    """
+    edge = settings.SAMPLE_EDGE_PAGES if edge is None else edge
+    hits = set(hits)
+    middle = [i for i in sample if edge <= i < total - edge]
+    unsampled = (total - 2 * edge) - len(middle)
+    middle_hits = sum(1 for i in middle if i in hits)
+    return {
+        "observed": len(hits),
+        "low": len(hits),
+        "high": len(hits) + math.ceil(wilson_upper(middle_hits, len(middle)) * unsampled),
+    }
+
+
+def scale(count: int, sampled: int, total: int) -> int:
+    """Stima del totale per un conteggio osservato su `sampled` unità di `total`."""
+    return round(count * total / sampled) if sampled else count
+
+
+def sampling_report(unit: str, total: int, sample: list[int], bounds: dict[str, dict[str, int]]) -> dict[str, Any]:
+    """`doc_props["sampling"]`; l'estrattore aggiunge `estimated`."""
+    return {
+        "unit": unit,
+        "total": total,
+        "sampled": len(sample),
+        "confidence": 0.95,
+        "bounds": bounds,
+    }
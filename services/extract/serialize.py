@@ -0,0 +1,46 @@
+"""
+Serializzazione compatta di `doc_props`
+=======================================
+Formato usato per far attraversare ai risultati di estrazione un confine
+di processo (o per salvarli su disco): JSON UTF-8 senza spazi, con
+`detailed_analysis` ridotto a dict (come gli altri modelli pydantic, es.
+`fonts` e `images` se richiesti singolarmente al grafo). Evita di fare pickle di alberi
+pydantic interi.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from pydantic import BaseModel
+
+from models import DetailedDocumentAnalysis
+
+_SEPARATORS = (",", ":")
+
+
+def _model_to_json(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    raise TypeError(f"{type(value).__name__} non serializzabile")
+
+
+def dumps_props(doc_props: dict[str, Any]) -> bytes:
+    """`doc_props` → byte JSON compatti."""
+    payload = dict(doc_props)
+    da = payload.get("detailed_analysis")
+    if isinstance(da, DetailedDocumentAnalysis):
+        payload["detailed_analysis"] = da.model_dump(mode="json")
+    return json.dumps(
+        payload, ensure_ascii=False, separators=_SEPARATORS, default=_model_to_json
+    ).encode("utf-8")
+
+
+def loads_props(data: bytes) -> dict[str, Any]:
+    """Inverso di `dumps_props`: ricostruisce anche `DetailedDocumentAnalysis`."""
+    doc_props: dict[str, Any] = json.loads(data)
+    da = doc_props.get("detailed_analysis")
+    if da is not None:
+        doc_props["detailed_analysis"] = DetailedDocumentAnalysis.model_validate(da)
+    return doc_props
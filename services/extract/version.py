@@ -0,0 +1,9 @@
+"""
+Versione dell'output degli estrattori.
+
+Va incrementata a ogni modifica che cambia il contenuto di `doc_props`:
+fa parte della chiave della cache dei risultati, quindi invalida le voci
+prodotte dalle versioni precedenti.
+"""
+
+EXTRACTOR_VERSION = "9"
@@ -0,0 +1,5 @@
+"""Public API per il sotto-package reports."""
+
+from .renderer import RenderedReport, ReportRenderer, get_report_renderer  # noqa: F401
+
+__all__ = ["RenderedReport", "ReportRenderer", "get_report_renderer"]
@@ -0,0 +1,422 @@
+"""
+Renderer dei report PDF
+=======================
+Stili, palette, logo e stili tabella vengono preparati una volta sola (allo
+startup) invece che a ogni report. I PDF prodotti restano in una cache LRU
+per (validation_id, ReportFormat): /api/zendesk-ticket riusa il PDF appena
+scaricato da /api/validation-reports/{id} senza rifare il layout.
+
+L'appendice "Raw extract" è un unico blocco preformattato, serializzato in
+modo incrementale e troncato a REPORT_RAW_JSON_MAX_BYTES / _MAX_PAGES: tempo
+e memoria non crescono con `raw_props`. Con `embed_raw_json` il JSON completo
+viene invece allegato al PDF come file incorporato.
+"""
+
+from __future__ import annotations
+
+import datetime
+import hashlib
+import io
+import json
+import pathlib
+from collections import OrderedDict
+from threading import Lock
+from typing import NamedTuple
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import cm
+from reportlab.platypus import (
+    HRFlowable,
+    Image,
+    PageBreak,
+    Paragraph,
+    Preformatted,
+    SimpleDocTemplate,
+    Spacer,
+    Table,
+    TableStyle,
+)
+
+from config import settings
+from models import DocumentSpec, ReportFormat, ValidationResult
+
+# ── palette aziendale ─────────────────────────────────────────────
+GREEN   = colors.HexColor("#198754")
+RED     = colors.HexColor("#d32f2f")
+ACCENT  = colors.HexColor("#0d6efd")     # blu Bootstrap
+BG_HEAD = colors.HexColor("#f2f4f6")     # grigio molto chiaro
+
+# ── logo opzionale (PNG trasparente 200×60) ───────────────────────
+LOGO_PATH = pathlib.Path(__file__).resolve().parents[2] / "static" / "logo.png"
+
+# ── appendice JSON: Courier 7/8 pt nel frame A4 con margini di 2 cm ──
+RAW_JSON_NAME = "raw_props.json"
+_MONO_LINES_PER_PAGE = int((A4[1] - 4 * cm) // 8)
+_MONO_CHARS_PER_LINE = int((A4[0] - 4 * cm) // (7 * 0.6))  # Courier: 0.6 em
+
+
+def hex_(c: colors.Color) -> str:
+    """ReportLab Color → HEX string '#RRGGBB'."""
+    return f"#{c.hexval()[2:]}"        # '0xRRGGBB' → '#RRGGBB'
+
+
+def raw_json_excerpt(raw_props: dict, max_bytes: int, max_lines: int, width: int = _MONO_CHARS_PER_LINE) -> str:
+    """
+    Primi `max_bytes` / `max_lines` del JSON indentato di `raw_props`.
+    La serializzazione è incrementale (`iterencode`) e si ferma al limite:
+    il resto del dict non viene mai convertito in stringa.
+    """
+    lines: list[str] = []
+    size = 0
+    current = ""
+    truncated = False
+    for chunk in json.JSONEncoder(indent=2, ensure_ascii=False, default=str).iterencode(raw_props):
+        *done, current = (current + chunk).split("\n")
+        for line in done:
+            if len(line) > width:
+                line = line[: width - 1] + "…"
+            size += len(line.encode("utf-8")) + 1
+            if size > max_bytes or len(lines) >= max_lines:
+                truncated = True
+                break
+            lines.append(line)
+        if truncated:
+            break
+    else:
+        lines.append(current)
+    if truncated:
+        lines.append(f"… troncato dopo {len(lines)} righe: il JSON completo è allegabile con embed_raw_json")
+    return "\n".join(lines)
+
+
+class RenderedReport(NamedTuple):
+    pdf: bytes
+    etag: str    # hash del contenuto, già tra virgolette come vuole l'header
+
+
+def format_key(report_format: ReportFormat) -> str:
+    """Chiave stabile di un ReportFormat (tutti i campi, in ordine)."""
+    return report_format.model_dump_json()
+
+
+class ReportRenderer:
+    """Layout del report "client-friendly" con risorse pre-costruite."""
+
+    def __init__(self, logo_path: pathlib.Path = LOGO_PATH, cache_max_bytes: int = 0) -> None:
+        self.styles = getSampleStyleSheet()
+        self.styles.add(
+            ParagraphStyle(
+                "TitleXL",
+                parent=self.styles["Title"],
+                fontSize=24,
+                textColor=ACCENT,
+                alignment=TA_CENTER,
+                spaceAfter=6,
+            )
+        )
+        self.styles.add(
+            ParagraphStyle(
+                "Small",
+                parent=self.styles["Normal"],
+                fontSize=9,
+                leading=11,
+            )
+        )
+        self.styles.add(
+            ParagraphStyle(
+                "Mono",
+                parent=self.styles["Code"],
+                fontName="Courier",
+                fontSize=7,
+                leading=8,
+            )
+        )
+        self.logo: bytes | None = logo_path.read_bytes() if logo_path.exists() else None
+
+        self.summary_style = TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), BG_HEAD),
+            ("BACKGROUND", (0, 2), (-1, 2), BG_HEAD),
+            ("FONTNAME", (0, 0), (0, -1), "Helvetica-Bold"),
+            ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+            ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.grey),
+            ("BOX", (0, 0), (-1, -1), 0.25, colors.grey),
+        ])
+        self.checks_style = TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), BG_HEAD),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("ALIGN", (1, 1), (-1, -1), "CENTER"),
+            ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+            ("BOX", (0, 0), (-1, -1), 0.25, colors.grey),
+        ])
+        self.fonts_style = TableStyle([
+            ("BACKGROUND", (0, 0), (-1, 0), BG_HEAD),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+            ("INNERGRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+            ("BOX", (0, 0), (-1, -1), 0.25, colors.grey),
+            ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, BG_HEAD]),
+            ("VALIGN", (0, 1), (-1, -1), "TOP"),
+        ])
+        # esiti ✓ / ✗ già pronti: sono sempre gli stessi due
+        self.check_marks = {
+            ok: f"<font color='{hex_(GREEN if ok else RED)}'>{'✓' if ok else '✗'}</font>"
+            for ok in (True, False)
+        }
+
+        self.cache_max_bytes = cache_max_bytes
+        self._cache: OrderedDict[str, dict[str, RenderedReport]] = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = Lock()
+
+    # -------------------------------------------------------------
+    # cache per (validation_id, ReportFormat)
+    # -------------------------------------------------------------
+    def invalidate(self, validation_id: str) -> None:
+        """Scarta i PDF di `validation_id` (tutti i formati)."""
+        with self._lock:
+            formats = self._cache.pop(validation_id, None)
+            if formats:
+                self._cache_bytes -= sum(len(r.pdf) for r in formats.values())
+
+    def cached(self, validation_id: str, report_format: ReportFormat) -> RenderedReport | None:
+        with self._lock:
+            formats = self._cache.get(validation_id)
+            if formats is None:
+                return None
+            self._cache.move_to_end(validation_id)
+            return formats.get(format_key(report_format))
+
+    def _store(self, validation_id: str, report_format: ReportFormat, report: RenderedReport) -> None:
+        if len(report.pdf) > self.cache_max_bytes:
+            return
+        with self._lock:
+            formats = self._cache.setdefault(validation_id, {})
+            old = formats.get(format_key(report_format))
+            formats[format_key(report_format)] = report
+            self._cache_bytes += len(report.pdf) - (len(old.pdf) if old else 0)
+            self._cache.move_to_end(validation_id)
+            while self._cache_bytes > self.cache_max_bytes and self._cache:
+                _, evicted = self._cache.popitem(last=False)
+                self._cache_bytes -= sum(len(r.pdf) for r in evicted.values())
+
+    def report(
+        self,
+        validation_result: ValidationResult,
+        spec: DocumentSpec,
+        report_format: ReportFormat,
+    ) -> RenderedReport:
+        """PDF + ETag, riusando quello già prodotto per lo stesso id e formato."""
+        validation_id = validation_result.id or ""
+        report = self.cached(validation_id, report_format) if validation_id else None
+        if report is None:
+            pdf = self.render(validation_result, spec, report_format)
+            report = RenderedReport(pdf, f'"{hashlib.sha256(pdf).hexdigest()[:32]}"')
+            if validation_id:
+                self._store(validation_id, report_format, report)
+        return report
+
+    def render_cached(
+        self,
+        validation_result: ValidationResult,
+        spec: DocumentSpec,
+        report_format: ReportFormat,
+    ) -> bytes:
+        """Come `render`, ma riusa il PDF già prodotto per lo stesso id e formato."""
+        return self.report(validation_result, spec, report_format).pdf
+
+    # -------------------------------------------------------------
+    # layout
+    # -------------------------------------------------------------
+    def render(
+        self,
+        validation_result: ValidationResult,
+        spec: DocumentSpec,
+        report_format: ReportFormat,
+    ) -> bytes:
+        styles = self.styles
+
+        # ── buffer in memoria ─────────────────────────────────────
+        buff = io.BytesIO()
+        doc  = SimpleDocTemplate(
+            buff,
+            pagesize=A4,
+            rightMargin=2 * cm,
+            leftMargin=2 * cm,
+            topMargin=2 * cm,
+            bottomMargin=2 * cm,
+        )
+
+        elements = []
+
+        # ───────────────────── 1) COPERTINA ───────────────────────
+        if self.logo is not None:
+            elements.append(
+                Image(io.BytesIO(self.logo), width=6 * cm, height=2 * cm, hAlign="CENTER")
+            )
+            elements.append(Spacer(1, 0.4 * cm))
+
+        elements.append(
+            Paragraph("Document Validation Report", styles["TitleXL"])
+        )
+        elements.append(
+            Paragraph(
+                datetime.datetime.utcnow().strftime("%d %B %Y, %H:%M UTC"),
+                styles["Small"],
+            )
+        )
+        elements.append(Spacer(1, 1.2 * cm))
+
+        # riquadro riassuntivo
+        status_txt  = "CONFORME" if validation_result.is_valid else "NON CONFORME"
+        status_col  = GREEN if validation_result.is_valid else RED
+
+        status_cell = Paragraph(
+            f"<b><font color='{hex_(status_col)}'>{status_txt}</font></b>",
+            styles["Normal"],
+        )
+
+        summary_tbl = Table(
+            [
+                ["Documento", validation_result.document_name],
+                ["Risultato", status_cell],          # ← usa Paragraph
+                ["Specifica", spec.name],
+            ],
+            colWidths=[4 * cm, 11 * cm],
+            hAlign="LEFT",
+            style=self.summary_style,
+        )
+
+        elements.append(summary_tbl)
+        elements.append(Spacer(1, 1 * cm))
+
+        # ───────────────────── 2) TABELLA VALIDAZIONE ────────────────
+        elements.append(Paragraph("Dettaglio verifiche", styles["Heading2"]))
+        elements.append(Spacer(1, 0.2 * cm))
+
+        check_rows = [["Verifica", "Esito"]]
+        for check, ok in validation_result.validations.items():
+            pretty = "Num. pagina (footer)" if check == "page_numbers_position" else check.replace("_", " ").capitalize()
+            esito  = Paragraph(self.check_marks[bool(ok)], styles["Normal"])
+            check_rows.append([pretty, esito])      # ← usa Paragraph
+        for check in validation_result.skipped_rules:  # fail-fast: non valutate
+            pretty = "Num. pagina (footer)" if check == "page_numbers_position" else check.replace("_", " ").capitalize()
+            check_rows.append([pretty, Paragraph("n.v.", styles["Small"])])
+
+        val_table = Table(
+            check_rows,
+            colWidths=[10 * cm, 2 * cm],
+            hAlign="LEFT",
+            style=self.checks_style,
+        )
+        elements.append(val_table)
+
+        elements.append(Spacer(1, 0.8 * cm))
+        elements.append(HRFlowable(width="100%", color=colors.grey))
+        elements.append(Spacer(1, 0.8 * cm))
+
+        # ───────────────────── 3) DISTRIBUZIONE FONT ───────────────
+        if report_format.include_charts and validation_result.detailed_analysis:
+            da = validation_result.detailed_analysis
+            if da.fonts:
+                elements.append(Paragraph("Distribuzione font", styles["Heading2"]))
+                elements.append(Spacer(1, 0.2 * cm))
+
+                # intestazione
+                font_rows = [["Font", "Size pt → occorrenze", "Totale"]]
+
+                # ordina i font per utilizzo discendente
+                for name, info in sorted(
+                    da.fonts.items(), key=lambda it: it[1].count, reverse=True
+                ):
+                    # ordina le singole dimensioni per occorrenze discendenti e vai a capo
+                    size_parts = sorted(
+                        info.size_counts.items(), key=lambda p: p[1], reverse=True
+                    )
+                    size_lines = "<br/>".join(f"{s} → {c}" for s, c in size_parts)
+
+                    # usa Paragraph per supportare <br/>
+                    size_para = Paragraph(size_lines, styles["Small"])
+                    font_rows.append([name, size_para, str(info.count)])
+
+                font_tbl = Table(
+                    font_rows,
+                    colWidths=[5 * cm, 7 * cm, 3 * cm],
+                    style=self.fonts_style,
+                )
+                elements.append(font_tbl)
+                elements.append(Spacer(1, 0.5 * cm))
+
+        # ───────────────────── 4) RACCOMANDAZIONI  ────────────────
+        if report_format.include_recommendations and not validation_result.is_valid:
+            elements.append(Paragraph("Raccomandazioni", styles["Heading2"]))
+            elements.append(Spacer(1, 0.2 * cm))
+
+            bullets = []
+            if not validation_result.validations.get("page_size", True):
+                bullets.append(
+                    f"Adeguare la dimensione pagina a "
+                    f"{spec.page_width_cm} × {spec.page_height_cm} cm."
+                )
+            if not validation_result.validations.get("margins", True):
+                bullets.append(
+                    "Verificare i margini per rispettare i valori specificati."
+                )
+            if not validation_result.validations.get("has_toc", True) and spec.requires_toc:
+                bullets.append("Inserire un indice automatico (TOC).")
+
+            for b in bullets:
+                elements.append(Paragraph("• " + b, styles["Normal"]))
+                elements.append(Spacer(1, 0.1 * cm))
+
+        # ───────────────────── 5) JSON GREZZO (opzionale) ────────────
+        embed = report_format.embed_raw_json and bool(validation_result.raw_props)
+        if report_format.include_detailed_analysis and validation_result.raw_props:
+            elements.append(PageBreak())
+            elements.append(Paragraph("Raw extract (debug)", styles["Heading2"]))
+            elements.append(Spacer(1, 0.2 * cm))
+
+            if embed:
+                elements.append(
+                    Paragraph(f"Il JSON completo è allegato al PDF come <i>{RAW_JSON_NAME}</i>.", styles["Normal"])
+                )
+            else:
+                excerpt = raw_json_excerpt(
+                    validation_result.raw_props,
+                    max_bytes=settings.REPORT_RAW_JSON_MAX_BYTES,
+                    max_lines=settings.REPORT_RAW_JSON_MAX_PAGES * _MONO_LINES_PER_PAGE,
+                )
+                # un solo flowable, spezzato sulle pagine da ReportLab
+                elements.append(Preformatted(excerpt, styles["Mono"]))
+
+        # ───────────────────── COSTRUISCI PDF ──────────────────────────
+        doc.build(elements)
+        pdf = buff.getvalue()
+        return _embed_raw_json(pdf, validation_result.raw_props) if embed else pdf
+
+
+def _embed_raw_json(pdf: bytes, raw_props: dict) -> bytes:
+    """Allega `raw_props` (JSON compatto) come file incorporato nel PDF."""
+    import fitz  # PyMuPDF: ReportLab non scrive EmbeddedFiles
+
+    data = json.dumps(raw_props, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    with fitz.open(stream=pdf, filetype="pdf") as doc:
+        doc.embfile_add(RAW_JSON_NAME, data, filename=RAW_JSON_NAME, desc="raw_props (doc_props estratte)")
+        return doc.tobytes(garbage=1, deflate=True)
+
+
+# ------------------------------------------------------------------ #
+# istanza di processo
+# ------------------------------------------------------------------ #
+_renderer: ReportRenderer | None = None
+_renderer_lock = Lock()
+
+
+def get_report_renderer() -> ReportRenderer:
+    """Renderer condiviso; costruito allo startup (o al primo uso)."""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = ReportRenderer(cache_max_bytes=settings.REPORT_CACHE_MAX_BYTES)
+        return _renderer
@@ -1,5 +1,5 @@
 """Public API per il sotto-package validation."""
 
-from .core import validate_document  # noqa: F401
+from .core import required_properties, sampled_failures, validate_document  # noqa: F401
 
-__all__ = ["validate_document"]
+__all__ = ["validate_document", "required_properties", "sampled_failures"]
@@ -5,6 +5,12 @@ Combina le singole regole definite in rules.py e restituisce:
     "validations": {nome_regola: bool, ...},
     "is_valid": bool
 }
+più "skipped_rules": [nome_regola, ...] in modalità fail-fast e
+"rule_costs_ms" quando gli estrattori riportano `property_timings_ms`.
+
+Con doc_props a campione (services.extract.sampling) `sampled_failures`
+dice quali regole KO hanno letto stime: il chiamante ripete l'estrazione
+completa prima di confermare l'esito.
 """
 
 from __future__ import annotations
@@ -35,29 +41,89 @@ _RULES: dict[str, RuleFunc] = {
     "page_numbers_position":  rules.page_numbers_position,
 }
 
+# proprietà di doc_props lette da ciascuna regola (vedi rules.requires)
+RULE_DEPENDENCIES: dict[str, frozenset[str]] = {
+    name: getattr(fn, "requires", frozenset()) for name, fn in _RULES.items()
+}
+
+
+def active_dependencies(spec: DocumentSpec, services: dict[str, bool] | None = None) -> dict[str, frozenset[str]]:
+    """Come RULE_DEPENDENCIES, ma vuote per le regole che con questa spec non controllano nulla."""
+    services = services or {}
+    return {
+        name: RULE_DEPENDENCIES[name] if fn.active(spec, services) else frozenset()  # type: ignore[attr-defined]
+        for name, fn in _RULES.items()
+    }
+
+
+def required_properties(spec: DocumentSpec, services: dict[str, bool] | None = None) -> list[str]:
+    """Proprietà di doc_props da estrarre per validare `spec` (ordine stabile)."""
+    needed: dict[str, None] = {"page_size": None}  # validate_document la esige sempre
+    for deps in active_dependencies(spec, services).values():
+        needed.update(dict.fromkeys(sorted(deps)))
+    return list(needed)
+
+
+def sampled_failures(validation: dict[str, Any], doc_props: dict[str, Any]) -> list[str]:
+    """Regole KO che dipendono da proprietà stimate a campione."""
+    sampling = doc_props.get("sampling")
+    if not sampling:
+        return []
+    estimated = set(sampling.get("estimated", ()))
+    return [
+        name for name, ok in validation["validations"].items()
+        if not ok and RULE_DEPENDENCIES[name] & estimated
+    ]
+
+
 def validate_document(
     doc_props: dict[str, Any],
     spec: DocumentSpec,
     services: dict[str, bool] | None = None,
+    *,
+    fail_fast: bool = False,
+    complete: bool = True,
 ) -> dict[str, Any]:
     """
     Esegue tutte le regole in _RULES.
     Ritorna dict con esito di ogni regola + boolean complessivo.
+
+    Con `fail_fast` si ferma al primo KO: le regole non valutate finiscono
+    in "skipped_rules". `complete=False` indica doc_props parziali (solo
+    le proprietà economiche): le regole le cui dipendenze mancano vengono
+    saltate invece che date per KO.
     """
     if not doc_props or "page_size" not in doc_props:
         raise HTTPException(status_code=400, detail="doc_props non validi")
 
     services = services or {}
+    dependencies = active_dependencies(spec, services)
 
     validations: dict[str, bool] = {}
+    skipped: list[str] = []
+    failed = False
     for name, fn in _RULES.items():
+        if (fail_fast and failed) or (not complete and not dependencies[name] <= doc_props.keys()):
+            skipped.append(name)
+            continue
         try:
             validations[name] = fn(doc_props, spec, services)  # type: ignore[arg-type]
         except Exception:
             # qualsiasi errore interno viene considerato KO
             validations[name] = False
+        failed = failed or not validations[name]
 
-    return {
+    result: dict[str, Any] = {
         "validations": validations,
-        "is_valid": all(validations.values()),
+        "is_valid": all(validations.values()) and not skipped,
     }
+    if fail_fast or not complete:
+        result["skipped_rules"] = skipped
+    timings = doc_props.get("property_timings_ms")
+    if timings:
+        # costo di ogni regola = somma dei costi delle proprietà che legge
+        result["rule_costs_ms"] = {
+            name: round(sum(timings.get(p, 0.0) for p in dependencies[name]), 3)
+            for name in validations
+        }
+    return result
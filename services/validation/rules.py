@@ -4,19 +4,48 @@ Ogni funzione riceve `doc_props`, `spec`, più eventualmente `services`
 e restituisce True (OK) o False (KO).
 
 Le funzioni sono pure → facili da testare singolarmente.
+
+`@requires` dichiara le chiavi di `doc_props` lette da ogni regola: la
+validazione fail-fast valuta una regola solo quando quelle proprietà sono
+già state estratte, e chiede agli estrattori solo quelle delle regole
+attive (`when`: la regola con questa spec/services controlla davvero
+qualcosa; altrimenti è OK senza leggere `doc_props`).
 """
 
 from __future__ import annotations
 
-from typing import Any
+from collections.abc import Callable
+from typing import Any, TypeVar
 
 from models import DocumentSpec
 
+_F = TypeVar("_F", bound=Callable[..., bool])
+# (spec, services) -> la regola va valutata?
+Predicate = Callable[[DocumentSpec, dict[str, bool]], bool]
+
+
+def requires(*props: str, when: Predicate | None = None) -> Callable[[_F], _F]:
+    """Annota la regola con le proprietà di `doc_props` da cui dipende."""
+    def mark(fn: _F) -> _F:
+        fn.requires = frozenset(props)  # type: ignore[attr-defined]
+        fn.active = when or (lambda spec, services: True)  # type: ignore[attr-defined]
+        return fn
+    return mark
+
+
+def _no_layout_service(spec: DocumentSpec, services: dict[str, bool]) -> bool:
+    return not services.get("layout_service")
+
+
 # --------------------------- helpers ------------------------------- #
 _TOL_PAGE_CM = 0.6   # tolleranza dimensioni pagina
 _TOL_MARGIN_CM = 0.5 # tolleranza margini
+# page_count dichiarato da Word/LibreOffice (app.xml): il layout con cui è
+# stato calcolato può differire di qualche pagina da quello di riferimento
+_TOL_DECLARED_PAGES = 0.02
 
 
+@requires("page_size", when=_no_layout_service)
 def page_size(doc: dict[str, Any], spec: DocumentSpec, services: dict[str, bool]) -> bool:
     if services.get("layout_service"):
         return True
@@ -27,10 +56,12 @@ def page_size(doc: dict[str, Any], spec: DocumentSpec, services: dict[str, bool]
     )
 
 
+@requires("has_size_inconsistencies")
 def format_consistency(doc: dict[str, Any], *_args) -> bool:
     return not doc.get("has_size_inconsistencies", False)
 
 
+@requires("margins", when=_no_layout_service)
 def margins(doc: dict[str, Any], spec: DocumentSpec, services: dict[str, bool]) -> bool:
     if services.get("layout_service"):
         return True
@@ -43,36 +74,44 @@ def margins(doc: dict[str, Any], spec: DocumentSpec, services: dict[str, bool])
     )
 
 
+@requires("has_toc", when=lambda spec, _s: spec.requires_toc)
 def has_toc(doc: dict[str, Any], spec: DocumentSpec, *_a) -> bool:
     return not spec.requires_toc or doc["has_toc"]
 
 
+@requires("has_color_pages", "has_color_text", when=lambda spec, _s: spec.no_color_pages)
 def no_color_pages(doc: dict[str, Any], spec: DocumentSpec, *_a) -> bool:
-    da = doc.get("detailed_analysis")
     if not spec.no_color_pages:
         return True
-    return not (da and (da.has_color_pages or da.has_color_text))
+    return not (doc.get("has_color_pages") or doc.get("has_color_text"))
 
 
+@requires("image_count", when=lambda spec, _s: spec.no_images)
 def no_images(doc: dict[str, Any], spec: DocumentSpec, *_a) -> bool:
-    da = doc.get("detailed_analysis")
     if not spec.no_images:
         return True
-    return not (da and da.images and da.images.count)
+    return not doc.get("image_count")
 
 
+@requires("headers", when=lambda spec, _s: spec.requires_header)
 def has_header(doc: dict[str, Any], spec: DocumentSpec, *_a) -> bool:
     return not spec.requires_header or bool(doc.get("headers"))
 
 
+@requires("footnotes", when=lambda spec, _s: spec.requires_footnotes)
 def has_footnotes(doc: dict[str, Any], spec: DocumentSpec, *_a) -> bool:
     return not spec.requires_footnotes or bool(doc.get("footnotes"))
 
 
+@requires("page_count", "page_count_method", when=lambda spec, _s: spec.min_page_count > 0)
 def min_page_count(doc: dict[str, Any], spec: DocumentSpec, *_a) -> bool:
-    return doc.get("page_count", 0) >= spec.min_page_count
+    count = doc.get("page_count", 0)
+    if doc.get("page_count_method") == "app_xml":
+        return count + max(1, round(count * _TOL_DECLARED_PAGES)) >= spec.min_page_count
+    return count >= spec.min_page_count
 
 
+@requires("page_num_positions")
 def page_numbers_position(doc: dict[str, Any], *_a) -> bool:
     pos = doc.get("page_num_positions", [])
     if not pos:
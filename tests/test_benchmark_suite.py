@@ -0,0 +1,19 @@
+# tests/test_benchmark_suite.py
+"""Strumenti della suite di benchmark che non richiedono i parser."""
+import pytest
+
+from benchmarks.suite import compare, measure
+
+
+def test_measure_reports_time_and_rss_peak():
+    r = measure(lambda: b"x" * (8 * 2**20), repeat=2)  # pagine scritte: residenti
+    assert r["best_s"] <= r["median_s"]
+    assert r["peak_rss_mb"] >= 7
+
+
+def test_compare_matches_cases_by_name():
+    baseline = {"pdf-10/extract": {"best_s": 0.2}, "odt-10/extract": {"best_s": 0.1}}
+    current = {"pdf-10/extract": {"best_s": 0.3}, "docx-10/extract": {"best_s": 0.1}}
+    [(case, ref, now, ratio)] = compare(current, baseline)
+    assert (case, ref, now) == ("pdf-10/extract", 0.2, 0.3)
+    assert ratio == pytest.approx(1.5)
@@ -0,0 +1,38 @@
+# tests/test_compression.py
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("fastapi")
+
+from fastapi import FastAPI, Response
+from fastapi.testclient import TestClient
+
+from utils.compression import SelectiveGZipMiddleware
+
+app = FastAPI()
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=100)
+
+
+@app.get("/text")
+def text():
+    return Response("a" * 5000, media_type="text/plain")
+
+
+@app.get("/pdf")
+def pdf():
+    return Response(b"%PDF-1.7" + b"\0" * 5000, media_type="application/pdf")
+
+
+client = TestClient(app)
+
+
+def test_text_is_gzipped():
+    res = client.get("/text", headers={"Accept-Encoding": "gzip"})
+    assert res.headers["content-encoding"] == "gzip"
+    assert res.text == "a" * 5000
+
+
+def test_pdf_passes_through_untouched():
+    res = client.get("/pdf", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in res.headers
+    assert res.headers["content-length"] == str(5008)
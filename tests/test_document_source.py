@@ -0,0 +1,45 @@
+# tests/test_document_source.py
+"""DocumentSource: file temporaneo, vista mmap senza copie, pulizia."""
+import hashlib
+import io
+import os
+
+from utils.document_source import DocumentSource
+
+
+def test_from_bytes_buffer_and_close():
+    data = b"%PDF-1.7\n" + b"x" * 5000
+    source = DocumentSource.from_bytes(data, "PDF")
+    assert source.path.endswith(".pdf")
+    assert source.size == len(data)
+    with source.buffer() as view:
+        assert view[:8] == b"%PDF-1.7"
+        assert view.readonly
+    assert source.sha256() == hashlib.sha256(data).hexdigest()
+    assert source.read_bytes() == data
+    source.close()
+    assert not os.path.exists(source.path)
+    source.close()  # idempotente
+
+
+def test_from_fileobj_and_empty_file():
+    with DocumentSource.from_fileobj(io.BytesIO(b"abc"), "docx") as source:
+        assert source.read_bytes() == b"abc"
+    with DocumentSource.from_bytes(b"", "odt") as empty:
+        with empty.buffer() as view:
+            assert len(view) == 0
+        assert empty.sha256() == hashlib.sha256(b"").hexdigest()
+
+
+def test_adopt_moves_file_and_borrowed_source_is_kept(tmp_path):
+    produced = tmp_path / "output.pdf"
+    produced.write_bytes(b"pdf")
+    with DocumentSource.adopt(str(produced), "pdf") as source:
+        assert not produced.exists()
+        assert source.read_bytes() == b"pdf"
+    assert not os.path.exists(source.path)
+
+    kept = tmp_path / "manoscritto.pdf"
+    kept.write_bytes(b"pdf")
+    DocumentSource(str(kept), "pdf").close()  # non posseduto: resta
+    assert kept.exists()
@@ -0,0 +1,171 @@
+# tests/test_docx_extraction_parity.py
+"""
+Parità tra il giro in streaming su paragrafi e run (docx_stream) e quello
+sul modello a oggetti di python-docx (congelato in benchmarks.legacy).
+I font differiscono di proposito: lo streaming li risolve lungo `basedOn`,
+docDefaults e tema, python-docx legge solo lo stile del paragrafo.
+"""
+import io
+
+import pytest
+
+docx = pytest.importorskip("docx")
+pytest.importorskip("fitz")  # benchmarks.corpus
+
+from docx.enum.style import WD_STYLE_TYPE
+from docx.shared import Pt, RGBColor
+
+from benchmarks.corpus import make_docx
+from benchmarks.legacy import legacy_extract_docx_detailed_analysis
+from services.extract.docx import extract_docx_detailed_analysis, extract_docx_properties
+
+
+def _styled_docx() -> bytes:
+    """Stili con font propri, interlinea, tab e a capo, tabelle, colore nero."""
+    doc = docx.Document()
+    doc.styles["Normal"].font.name = "Garamond"
+    doc.styles["Normal"].font.size = Pt(12)
+    quote = doc.styles.add_style("Citazione", WD_STYLE_TYPE.PARAGRAPH)
+    quote.font.name = "Courier New"
+    quote.font.size = Pt(9.5)
+
+    doc.add_heading("Premessa", level=1)
+    par = doc.add_paragraph("Testo ")
+    par.paragraph_format.line_spacing = 1.5
+    par.add_run("nero").font.color.rgb = RGBColor(0, 0, 0)
+    par.add_run("\tcon tab e\na capo").font.size = Pt(10)
+    red = par.add_run(" rosso")
+    red.font.color.rgb = RGBColor(0xCC, 0, 0)
+    red.font.name = "Arial"
+
+    cited = doc.add_paragraph("Citazione in corpo minore", style="Citazione")
+    cited.paragraph_format.line_spacing = 2.0
+    doc.add_paragraph("Seconda citazione", style="Citazione").paragraph_format.line_spacing = 1.0
+
+    table = doc.add_table(rows=1, cols=2)
+    table.cell(0, 0).text = "cella esclusa come in doc.paragraphs"
+    doc.add_heading("Capitolo secondo", level=2)
+    doc.add_page_break()
+    doc.add_heading("Titolo", level=0)
+
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+CASES = {
+    "plain": lambda: make_docx(6),
+    "fonts_color_images": lambda: make_docx(8, fonts=("Arial", "Georgia"), color_text_every=3, image_every=2),
+    "styled": _styled_docx,
+}
+
+
+@pytest.mark.parametrize("make", CASES.values(), ids=CASES.keys())
+def test_streaming_pass_matches_python_docx(make):
+    data = make()
+    streamed = extract_docx_detailed_analysis(data).model_dump(exclude={"fonts"})
+    assert streamed == legacy_extract_docx_detailed_analysis(data).model_dump(exclude={"fonts"})
+
+
+def test_streaming_pass_reads_styles_and_spacing():
+    da = extract_docx_detailed_analysis(_styled_docx())
+    assert da.fonts["Courier New"].size_counts == {9.5: 2}
+    assert da.fonts["Garamond"].size_counts == {12.0: 3, 10.0: 1}  # Normal, run a 10 pt
+    # i titoli ereditano da Normal ma dichiarano il font "major" del tema
+    assert da.fonts["Calibri"].size_counts == {14.0: 1, 13.0: 1, 26.0: 1}
+    assert da.line_spacing["Citazione"] == 1.5  # (2.0 + 1.0) / 2
+    assert da.colored_elements_count == 1       # il nero esplicito non conta
+    assert [t["level"] for t in da.toc_structure] == ["1", "2"]
+
+
+def test_headings_come_from_the_streaming_pass(tmp_path):
+    path = tmp_path / "libro.docx"
+    path.write_bytes(make_docx(3))
+    props = extract_docx_properties(str(path), ["headings", "has_toc"])
+    assert props["headings"] == ["Capitolo 1", "Capitolo 2", "Capitolo 3"]
+    assert props["has_toc"] is True
+
+
+def _inherited_docx() -> bytes:
+    """Catene `basedOn` di paragrafo e di carattere, docDefaults con tema."""
+    doc = docx.Document()  # docDefaults: asciiTheme="minorHAnsi", 11 pt
+    base = doc.styles.add_style("Base", WD_STYLE_TYPE.PARAGRAPH)
+    base.font.name = "Georgia"
+    base.font.size = Pt(9)
+    body = doc.styles.add_style("Corpo", WD_STYLE_TYPE.PARAGRAPH)
+    body.base_style = base
+    body.font.size = Pt(13)
+    small = doc.styles.add_style("Piccolo", WD_STYLE_TYPE.CHARACTER)
+    small.font.size = Pt(7)
+    mono = doc.styles.add_style("Codice", WD_STYLE_TYPE.CHARACTER)
+    mono.base_style = small
+    mono.font.name = "Consolas"
+
+    par = doc.add_paragraph(style="Corpo")
+    par.add_run("ereditato")
+    par.add_run("codice").style = mono
+    direct = par.add_run("diretto")
+    direct.style = mono
+    direct.font.size = Pt(8)
+    doc.add_paragraph().add_run("senza stile")
+
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+def test_fonts_are_resolved_through_styles_defaults_and_theme():
+    fonts = extract_docx_detailed_analysis(_inherited_docx()).fonts
+    assert fonts["Georgia"].size_counts == {13.0: 1}          # Corpo → Base
+    assert fonts["Consolas"].size_counts == {7.0: 1, 8.0: 1}  # Codice → Piccolo, poi diretto
+    assert fonts["Cambria"].size_counts == {11.0: 1}          # docDefaults + tema "minor"
+
+
+def test_sampled_pass_reads_the_document_once_and_bounds_colored_blocks(monkeypatch):
+    from config import settings
+    from services.extract import docx_stream
+    from services.extract.docx import _paragraph_pass
+
+    monkeypatch.setattr(settings, "SAMPLE_MIN_PAGES", 40)
+    monkeypatch.setattr(settings, "SAMPLE_EDGE_PAGES", 2)
+    monkeypatch.setattr(settings, "SAMPLE_MIDDLE_PAGES", 10)
+    data = make_docx(200, paragraphs_per_page=8, color_text_every=5)
+    full = _paragraph_pass(data)
+
+    opened = []
+    real = docx_stream.DocxPackage.paragraph_elements
+    monkeypatch.setattr(
+        docx_stream.DocxPackage, "paragraph_elements", lambda self: opened.append(1) or real(self)
+    )
+    sampled = _paragraph_pass(data, sample=True)
+    assert opened == [1]  # un solo giro su word/document.xml
+
+    report = sampled["sampling"]
+    assert sampled["paragraph_count"] == full["paragraph_count"]
+    assert sampled["toc_structure"] == full["toc_structure"]
+    assert report["total"] == -(-full["paragraph_count"] // 20) and report["sampled"] < report["total"]
+
+    with docx_stream.DocxPackage(io.BytesIO(data)) as package:
+        styles = package.styles()
+        colored = {
+            i // 20
+            for i, par in enumerate(package.iter_paragraphs(styles))
+            if any(r.color and r.color != "000000" for r in par.runs or ())
+        }
+    bounds = report["bounds"]["color_text_blocks"]
+    assert 0 < bounds["low"] <= len(colored) <= bounds["high"]
+
+
+def test_line_spacing_of_an_unnamed_style_falls_back_to_its_id():
+    from docx.oxml.ns import qn
+
+    from services.extract.docx import _paragraph_pass
+
+    doc = docx.Document()
+    unnamed = doc.styles.add_style("Senzanome", WD_STYLE_TYPE.PARAGRAPH)
+    unnamed.element.remove(unnamed.element.find(qn("w:name")))
+    par = doc.add_paragraph("Testo", style=unnamed)
+    par.paragraph_format.line_spacing = 1.5
+    buf = io.BytesIO()
+    doc.save(buf)
+    assert _paragraph_pass(buf.getvalue())["line_spacing"] == {"Senzanome": 1.5}
@@ -0,0 +1,180 @@
+# tests/test_extraction_pool.py
+"""
+Pool di estrazione: un job scaduto non deve rompere gli altri job che
+girano sullo stesso executor, né l'executor creato dopo di lui.
+"""
+import asyncio
+import time
+from concurrent.futures import Future
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("pydantic_settings")
+
+from services.extract.pool import ExtractionPool, ExtractionTimeoutError
+
+
+class _Proc:
+    def __init__(self):
+        self.killed = False
+
+    def kill(self):
+        self.killed = True
+
+
+class _Executor:
+    """Executor finto: le future le conclude il test."""
+
+    def __init__(self):
+        self._processes = {1: _Proc(), 2: _Proc()}
+        self.procs = list(self._processes.values())
+        self.shut = False
+
+    def submit(self, fn, *args):
+        return Future()
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.shut = True
+        self._processes = None
+
+    @property
+    def killed(self):
+        return all(p.killed for p in self.procs)
+
+
+def _wait_for(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    return cond()
+
+
+def test_timeout_kills_executor_only_after_other_jobs_finish():
+    pool = ExtractionPool(2)
+    executor = pool._executor = _Executor()
+    [stuck] = pool._submit(executor, [("stuck",)])
+    [other] = pool._submit(executor, [("other",)])
+
+    pool._retire(executor, [stuck])
+    assert pool._executor is None           # i nuovi job vanno su un executor nuovo
+    time.sleep(0.2)
+    assert not executor.killed               # l'altro job è ancora in corso
+
+    other.set_result(("ok", b""))
+    assert _wait_for(lambda: executor.killed)
+    assert executor.shut and not pool._inflight
+
+
+def test_stale_executor_is_not_recycled_twice():
+    pool = ExtractionPool(2)
+    old = pool._executor = _Executor()
+    [stuck] = pool._submit(old, [("stuck",)])
+    pool._retire(old, [stuck])
+    assert old.killed
+
+    new = pool._executor = _Executor()
+    pool._discard(old)                       # BrokenProcessPool del vecchio executor
+    pool._retire(old, [stuck])               # …o un secondo timeout su di esso
+    assert pool._executor is new and not new.killed and not new.shut
+
+
+def test_timeout_does_not_break_concurrent_jobs(monkeypatch):
+    pytest.importorskip("fitz")
+    from benchmarks.corpus import make_pdf
+    from config import settings
+
+    monkeypatch.setattr(settings, "PDF_SHARD_PAGES", 0)
+    small, medium, big = make_pdf(3), make_pdf(40), make_pdf(400)
+    pool = ExtractionPool(2)
+
+    async def scenario():
+        await asyncio.gather(pool.run("pdf", small), pool.run("pdf", small))  # worker avviati
+        pool.timeout = 4.0
+        slow = asyncio.create_task(pool.run("pdf", big))
+        await asyncio.sleep(3.3)
+        ok = await pool.run("pdf", medium)      # ancora in corso quando `slow` scade
+        with pytest.raises(ExtractionTimeoutError):
+            await slow
+        pool.timeout = None
+        return ok, await pool.run("pdf", small)
+
+    try:
+        ok, after = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert (ok["page_count"], after["page_count"]) == (40, 3)
+
+
+def test_cancelled_job_does_not_kill_shared_workers(monkeypatch):
+    pytest.importorskip("fitz")
+    from benchmarks.corpus import make_pdf
+    from config import settings
+
+    monkeypatch.setattr(settings, "PDF_SHARD_PAGES", 0)
+    monkeypatch.setattr(settings, "JOB_CANCEL_GRACE", 0.1)
+    small, medium, big = make_pdf(3), make_pdf(40), make_pdf(200)
+    pool = ExtractionPool(2)
+
+    async def scenario():
+        await asyncio.gather(pool.run("pdf", small), pool.run("pdf", small))  # worker avviati
+        shared = pool._executor
+        job = asyncio.create_task(pool.run("pdf", big, kill_on_cancel=True, on_pages=lambda done, total: None))
+        other = asyncio.create_task(pool.run("pdf", medium))
+        await asyncio.sleep(0.5)
+        job.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await job
+        return await other, pool._executor is shared
+
+    try:
+        other, kept = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert other["page_count"] == 40
+    assert kept                          # i worker condivisi restano in servizio
+    assert list(pool._inflight) == []  # executor del job chiuso
+
+
+def test_concurrent_jobs_stay_within_jobs_times_workers(monkeypatch):
+    pytest.importorskip("fitz")
+    import multiprocessing
+
+    from benchmarks.corpus import make_pdf
+    from config import settings
+
+    monkeypatch.setattr(settings, "JOB_PROGRESS_PAGES", 10)
+    pdf = make_pdf(60)
+    pool = ExtractionPool(2, jobs=2)
+    created = []
+    new_executor = pool._new_executor
+
+    def counted(workers):
+        created.append(new_executor(workers))
+        return created[-1]
+
+    monkeypatch.setattr(pool, "_new_executor", counted)
+
+    async def scenario():
+        peak = 0
+
+        async def sample():
+            nonlocal peak
+            while True:
+                peak = max(peak, len(multiprocessing.active_children()))
+                await asyncio.sleep(0.02)
+
+        sampler = asyncio.create_task(sample())
+        results = await asyncio.gather(
+            *(pool.run("pdf", pdf, kill_on_cancel=True, on_pages=lambda done, total: None) for _ in range(5))
+        )
+        sampler.cancel()
+        return results, peak
+
+    try:
+        results, peak = asyncio.run(scenario())
+    finally:
+        pool.shutdown()
+    assert [r["page_count"] for r in results] == [60] * 5
+    assert 0 < peak <= 2 * 2                   # JOBS_CONCURRENCY × EXTRACT_WORKERS
+    assert len(created) <= 2                # executor riusati dai job successivi
@@ -0,0 +1,108 @@
+# tests/test_jobs.py
+"""Ciclo di vita dei job asincroni: avanzamento, esito, errori, annullamento."""
+import asyncio
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("pydantic_settings")
+
+from fastapi import HTTPException
+
+from services.extract.pool import plan_chunks
+from utils import jobs
+from utils.jobs import cancel_job, get_job, start_job, watch_job
+
+
+def test_plan_chunks_covers_all_pages():
+    assert plan_chunks(60, 25) == [(0, 25), (25, 50), (50, 60)]
+    assert plan_chunks(10, 25) == [(0, 10)]
+    assert plan_chunks(0, 25) == []
+
+
+def test_job_reports_progress_and_result():
+    async def work(on_progress):
+        on_progress("extract", 0, 50)
+        await asyncio.sleep(0)
+        on_progress("extract", 50, 50)
+        on_progress("validate", None, None)
+        return "result-1"
+
+    async def scenario():
+        job = start_job("doc.pdf", work)
+        assert job.status == "queued"
+        seen = [j async for j in watch_job(job.id) if j is not None]
+        return seen
+
+    seen = asyncio.run(scenario())
+    final = seen[-1]
+    assert final.status == "done"
+    assert final.result_id == "result-1"
+    assert final.stage == "validate"
+    assert (final.pages_done, final.pages_total) == (50, 50)
+
+
+def test_job_failure_keeps_http_status():
+    async def work(on_progress):
+        raise HTTPException(status_code=400, detail="PDF file has no pages")
+
+    async def scenario():
+        job = start_job("vuoto.pdf", work)
+        await asyncio.sleep(0.05)
+        return get_job(job.id)
+
+    job = asyncio.run(scenario())
+    assert job.status == "failed"
+    assert (job.status_code, job.error) == (400, "PDF file has no pages")
+
+
+def test_cancel_stops_running_job():
+    async def scenario():
+        running = asyncio.Event()
+
+        async def work(on_progress):
+            on_progress("convert", None, None)
+            running.set()
+            await asyncio.sleep(60)
+            return "mai"
+
+        job = start_job("lungo.doc", work)
+        await running.wait()
+        assert cancel_job(job.id).status == "running"
+        await asyncio.sleep(0.05)
+        return get_job(job.id)
+
+    job = asyncio.run(scenario())
+    assert job.status == "cancelled"
+    assert job.stage == "convert"
+    assert job.result_id is None
+
+
+def test_unknown_job():
+    assert get_job("non-esiste") is None
+    assert cancel_job("non-esiste") is None
+
+
+def test_watchers_leave_no_events_behind():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def work(on_progress):
+            await release.wait()
+            return "result-1"
+
+        assert [j async for j in watch_job("non-esiste")] == []
+        job = start_job("doc.pdf", work)
+        stream = watch_job(job.id)
+        assert (await stream.__anext__()).status in ("queued", "running")
+        left = len(jobs._waiters[job.id])
+        await stream.aclose()                     # client SSE disconnesso
+        release.set()
+        seen = [j async for j in watch_job(job.id) if j is not None]
+        done = [j async for j in watch_job(job.id)]   # job già concluso
+        return left, seen[-1].status, [j.status for j in done]
+
+    left, final, done = asyncio.run(scenario())
+    assert left == 1
+    assert final == "done" and done == ["done"]
+    assert jobs._waiters == {}
@@ -0,0 +1,144 @@
+# tests/test_lo_pool.py
+"""
+Pool LibreOffice con istanze finte al posto di `soffice`: backpressure della
+coda, riciclo dopo un timeout, scadenza unica coda + chiamata, health-check.
+"""
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+import utils.lo_pool as lo_pool
+from utils.lo_pool import LibreOfficePool, PoolSaturatedError
+
+
+class _FakeInstance:
+    """Stessa interfaccia di `_Instance`; `page_count` dura `busy` secondi."""
+
+    created: list["_FakeInstance"] = []
+
+    def __init__(self, index, port, root):
+        self.index = index
+        self.conversions = 0
+        self.restarts = 0
+        self.alive = True
+        self.busy = 0.0
+        self.release = threading.Event()
+        _FakeInstance.created.append(self)
+
+    def start(self):
+        self.alive = True
+
+    def stop(self):
+        self.alive = False
+        self.release.set()  # come kill di soffice: la chiamata UNO in corso finisce
+
+    def restart(self):
+        self.restarts += 1
+        self.stop()
+        self.release = threading.Event()
+        self.start()
+
+    def healthy(self):
+        return self.alive
+
+    def needs_recycle(self, max_conversions, max_rss_mb):
+        return False
+
+    def rss_mb(self):
+        return None
+
+    def page_count(self, src_path):
+        self.release.wait(self.busy)
+        self.conversions += 1
+        return 7
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    _FakeInstance.created = []
+    monkeypatch.setattr(lo_pool, "_Instance", _FakeInstance)
+    return _FakeInstance.created
+
+
+SOURCE = SimpleNamespace(path="/tmp/doc.docx")
+
+
+def _run(scenario):
+    async def wrapped(pool):
+        try:
+            return await scenario(pool)
+        finally:
+            await pool.shutdown()
+
+    return wrapped
+
+
+def test_queue_beyond_max_queue_is_rejected(fake):
+    @_run
+    async def scenario(pool):
+        await pool.start()
+        fake[0].busy = 5.0
+        first = asyncio.create_task(pool.page_count(SOURCE))
+        await asyncio.sleep(0.05)
+        queued = asyncio.create_task(pool.page_count(SOURCE))
+        await asyncio.sleep(0.05)
+        assert pool.stats() == {"size": 1, "idle": 0, "waiting": 1}
+        with pytest.raises(PoolSaturatedError):
+            await pool.page_count(SOURCE)
+        fake[0].busy = 0.0
+        fake[0].release.set()
+        return await first, await queued
+
+    assert asyncio.run(scenario(LibreOfficePool(1, max_queue=1))) == (7, 7)
+
+
+def test_timeout_restarts_instance_and_returns_it_to_the_pool(fake):
+    @_run
+    async def scenario(pool):
+        await pool.start()
+        fake[0].busy = 5.0
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.page_count(SOURCE, timeout=0.1)
+        fake[0].busy = 0.0
+        return await pool.page_count(SOURCE, timeout=1.0), pool.stats()["idle"]
+
+    assert asyncio.run(scenario(LibreOfficePool(1))) == (7, 1)
+    assert fake[0].restarts == 1
+
+
+def test_timeout_covers_queue_wait_and_call_together(fake):
+    @_run
+    async def scenario(pool):
+        await pool.start()
+        fake[0].busy = 0.3
+        first = asyncio.create_task(pool.page_count(SOURCE))
+        await asyncio.sleep(0.01)
+        t0 = time.monotonic()
+        # 0.3 s in coda + 0.3 s di chiamata: oltre la scadenza di 0.5 s
+        with pytest.raises(asyncio.TimeoutError):
+            await pool.page_count(SOURCE, timeout=0.5)
+        elapsed = time.monotonic() - t0
+        await first
+        return elapsed
+
+    assert asyncio.run(scenario(LibreOfficePool(1))) < 0.8
+
+
+def test_health_loop_restarts_dead_idle_instances(fake, monkeypatch):
+    monkeypatch.setattr(lo_pool, "_HEALTH_INTERVAL", 0.02)
+
+    @_run
+    async def scenario(pool):
+        await pool.start()
+        fake[1].alive = False
+        await asyncio.sleep(0.2)
+        return [i.restarts for i in fake], [i.alive for i in fake]
+
+    restarts, alive = asyncio.run(scenario(LibreOfficePool(2)))
+    assert restarts[0] == 0 and restarts[1] >= 1
+    assert alive == [True, True]
@@ -0,0 +1,34 @@
+# tests/test_local_store.py
+import time
+
+import pytest
+
+pytest.importorskip("pydantic_settings")
+
+from utils.local_store import MemoryBackend, SQLiteBackend
+
+
+@pytest.mark.parametrize("make", [
+    lambda tmp: MemoryBackend(max_bytes=10),
+    lambda tmp: SQLiteBackend(str(tmp / "store.sqlite3"), max_bytes=10),
+])
+def test_backend_evicts_lru_over_budget(tmp_path, make):
+    store = make(tmp_path)
+    store.set("a", b"aaaa", 60)
+    time.sleep(0.01)
+    store.set("b", b"bbbb", 60)
+    time.sleep(0.01)
+    assert store.get("a") == b"aaaa"       # "a" diventa la più recente
+    time.sleep(0.01)
+
+    store.set("c", b"cccc", 60)            # 12 byte > 10 → esce "b"
+    assert store.get("b") is None
+    assert store.get("a") == b"aaaa"
+    assert store.get("c") == b"cccc"
+
+
+def test_memory_backend_expires_entries():
+    store = MemoryBackend(max_bytes=100)
+    store.set("k", b"v", 0)
+    assert store.get("k") is None
+    assert store.size_bytes == 0
@@ -0,0 +1,30 @@
+# tests/test_page_numbers.py
+"""Candidati numero di pagina nella fascia footer: arabi, romani, etichette."""
+import pytest
+
+pytest.importorskip("fastapi")
+
+from services.extract.page_numbers import page_number_candidates, page_number_position, roman_value
+
+
+def _word(x0, text, line=0):
+    return (x0, 770.0, x0 + 10, 790.0, text, 0, line, 0)
+
+
+def test_roman_value():
+    assert [roman_value(t) for t in ("i", "IV", "xiv", "mcmxc")] == [1, 4, 14, 1990]
+    assert roman_value("iiii") is None and roman_value("") is None
+
+
+def test_candidates_and_position():
+    labelled = page_number_candidates([_word(235, "Pag."), _word(250, "7")])
+    assert page_number_position(labelled, 7, 480, 800) == ("center", 1.0)
+
+    decorated = page_number_candidates([_word(400, "-"), _word(415, "12/300"), _word(430, "-")])
+    assert page_number_position(decorated, 12, 480, 800) == ("right", 0.9)
+    assert page_number_position(decorated, 13, 480, 800) == ("missing", 0.5)  # numerazione sfalsata
+
+    assert page_number_position(page_number_candidates([_word(20, "iv")]), 4, 480, 800) == ("left", 0.7)
+    # "mi" è un numero romano valido, ma non isolato sulla riga
+    assert page_number_candidates([_word(20, "mi"), _word(40, "piace")]) == []
+    assert page_number_position([], 3, 480, 800) == ("missing", 1.0)
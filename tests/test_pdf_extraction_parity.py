@@ -0,0 +1,236 @@
+# tests/test_pdf_extraction_parity.py
+"""
+Parità tra il motore PDF single-pass e la vecchia pipeline
+PyPDF2 + pdfplumber + PyMuPDF (congelata in benchmarks.legacy).
+"""
+import pytest
+
+fitz = pytest.importorskip("fitz")
+pytest.importorskip("pdfplumber")
+pytest.importorskip("PyPDF2")
+
+from benchmarks.corpus import make_pdf
+from benchmarks.legacy import legacy_extract_pdf_properties
+from services.extract import page_cache
+from services.extract.pdf import (
+    analyse_pdf_page_range,
+    extract_pdf_detailed_analysis,
+    extract_pdf_properties,
+    merge_pdf_page_parts,
+    pdf_page_aspects,
+)
+from services.extract.pool import plan_shards
+from utils.result_cache import ResultCache
+
+CASES = {
+    "plain": {"pages": 6},
+    "trim_left_numbers": {"pages": 5, "trim_margin_cm": 0.5, "page_numbers": "left"},
+    "right_numbers_no_toc": {"pages": 4, "page_numbers": "right", "toc_page": None},
+    "color_and_images": {"pages": 8, "color_text_every": 3, "image_every": 2},
+    "mixed_sizes": {"pages": 5, "odd_size_pages": (2, 4), "page_numbers": "none"},
+}
+
+
+@pytest.mark.parametrize("kwargs", CASES.values(), ids=CASES.keys())
+def test_single_pass_matches_legacy(kwargs):
+    pdf = make_pdf(**kwargs)
+    new = extract_pdf_properties(pdf)
+    old = legacy_extract_pdf_properties(pdf)
+
+    for key in (
+        "page_count",
+        "has_toc",
+        "headings",
+        "headers",
+        "footnotes",
+        "page_num_positions",
+        "has_size_inconsistencies",
+    ):
+        assert new[key] == old[key], key
+
+    assert new["page_size"] == pytest.approx(old["page_size"])
+    assert new["margins"] == pytest.approx(old["margins"], abs=1e-6)
+    assert [p["page"] for p in new["inconsistent_pages"]] == [
+        p["page"] for p in old["inconsistent_pages"]
+    ]
+
+    da_new, da_old = new["detailed_analysis"], old["detailed_analysis"]
+    assert da_new.model_dump(exclude={"color_pages"}) == da_old.model_dump(exclude={"color_pages"})
+    assert len(da_new.color_pages) == da_new.colored_elements_count
+
+
+def test_detailed_analysis_entrypoint_matches_full_extraction():
+    pdf = make_pdf(pages=4, color_text_every=2, image_every=3)
+    assert (
+        extract_pdf_detailed_analysis(pdf).model_dump()
+        == extract_pdf_properties(pdf)["detailed_analysis"].model_dump()
+    )
+
+
+def test_color_pages_lists_colored_pages_and_ignores_near_grey_images():
+    pdf = make_pdf(pages=6, color_text_every=3, image_every=2, image_rgb=(128, 131, 126))
+    da = extract_pdf_detailed_analysis(pdf)
+    assert da.color_pages == [3, 6]          # solo il testo rosso
+    assert da.images is not None and da.images.count == 3
+
+
+def test_color_images_decide_without_rendering(monkeypatch):
+    from config import settings
+    from services.extract import pdf as pdf_engine
+
+    monkeypatch.setattr(settings, "PAGE_CACHE_MAX_BYTES", 0)
+    monkeypatch.setattr(page_cache, "_cache", None)  # ogni pagina analizzata davvero
+    rendered = []
+    real = pdf_engine._page_has_color_pixels
+    monkeypatch.setattr(pdf_engine, "_page_has_color_pixels", lambda page, tol: rendered.append(page.number) or real(page, tol))
+    color = make_pdf(pages=6, image_every=2)  # immagine rossa sulle pagine pari
+    assert extract_pdf_detailed_analysis(color).color_pages == [2, 4, 6]
+    assert rendered == [0, 2, 4]            # solo le pagine senza immagini
+
+    rendered.clear()
+    grey = make_pdf(pages=6, image_every=2, image_rgb=(128, 128, 128))
+    assert extract_pdf_detailed_analysis(grey).color_pages == []
+    assert rendered == list(range(6))       # un'immagine grigia non esclude tracciati a colori
+
+
+def test_sharded_analysis_merges_to_single_pass_output():
+    pdf = make_pdf(pages=9, color_text_every=4, image_every=3, odd_size_pages=(5,))
+    shards = plan_shards(9, workers=3, min_pages=2)
+    assert shards == [(0, 3), (3, 6), (6, 9)]
+
+    # shard restituiti in ordine sparso: la fusione riordina per pagina
+    parts = [p for start, stop in reversed(shards) for p in analyse_pdf_page_range(pdf, start, stop)]
+    merged, single = merge_pdf_page_parts(pdf, parts), extract_pdf_properties(pdf)
+
+    assert merged["detailed_analysis"].model_dump() == single["detailed_analysis"].model_dump()
+    for props in (merged, single):
+        props.pop("detailed_analysis"), props.pop("property_timings_ms"), props.pop("page_cache")
+    assert merged == single
+
+
+def test_lazy_subset_matches_full_extraction_and_skips_page_aspects():
+    pdf = make_pdf(pages=6, color_text_every=3, image_every=2, odd_size_pages=(4,))
+    wanted = ("page_size", "margins", "has_size_inconsistencies", "image_count")
+    assert pdf_page_aspects(wanted) == {"images"}
+
+    lazy, full = extract_pdf_properties(pdf, wanted), extract_pdf_properties(pdf)
+    assert set(lazy) == {*wanted, "property_timings_ms"}
+    assert set(lazy["property_timings_ms"]) == set(wanted)
+    for key in wanted:
+        assert lazy[key] == full[key], key
+
+
+def test_revision_reanalyses_only_changed_pages(monkeypatch):
+    monkeypatch.setattr(page_cache, "_cache", ResultCache("pdf_pages", 16 * 2**20))
+    first = make_pdf(pages=6, image_every=2)
+    revision = make_pdf(pages=6, image_every=2, color_text_every=3)  # cambiano le pagine 3 e 6
+
+    assert extract_pdf_properties(first)["page_cache"] == {"reused": 0, "analysed": 6, "ratio": 0.0}
+    incremental = extract_pdf_properties(revision)
+    assert incremental["page_cache"] == {"reused": 4, "analysed": 2, "ratio": 0.667}
+
+    monkeypatch.setattr(page_cache, "_cache", ResultCache("pdf_pages", 16 * 2**20))
+    fresh = extract_pdf_properties(revision)
+    assert incremental["detailed_analysis"].model_dump() == fresh["detailed_analysis"].model_dump()
+    for props in (incremental, fresh):
+        props.pop("detailed_analysis"), props.pop("property_timings_ms"), props.pop("page_cache")
+    assert incremental == fresh
+
+
+def _shaded_pdf(rgb: str) -> bytes:
+    """Pagina che disegna un form XObject `/Sh0 sh`: cambia solo lo shading."""
+    doc = fitz.open()
+    page = doc.new_page()
+    shading, form, contents = doc.get_new_xref(), doc.get_new_xref(), doc.get_new_xref()
+    doc.update_object(
+        shading,
+        f"<< /ShadingType 2 /ColorSpace /DeviceRGB /Coords [0 0 600 0] /Extend [true true]"
+        f" /Function << /FunctionType 2 /Domain [0 1] /C0 [{rgb}] /C1 [{rgb}] /N 1 >> >>",
+    )
+    doc.update_object(
+        form,
+        f"<< /Type /XObject /Subtype /Form /BBox [0 0 612 792] /Resources << /Shading << /Sh0 {shading} 0 R >> >> >>",
+    )
+    doc.update_stream(form, b"/Sh0 sh")
+    doc.update_object(contents, "<< >>")
+    doc.update_stream(contents, b"q /Fm0 Do Q")
+    doc.xref_set_key(page.xref, "Resources", f"<< /XObject << /Fm0 {form} 0 R >> >>")
+    doc.xref_set_key(page.xref, "Contents", f"{contents} 0 R")
+    return doc.tobytes()
+
+
+def test_resource_only_change_is_not_a_cache_hit(monkeypatch):
+    monkeypatch.setattr(page_cache, "_cache", ResultCache("pdf_pages", 16 * 2**20))
+    grey, red = _shaded_pdf("0.5 0.5 0.5"), _shaded_pdf("1 0 0")
+
+    assert extract_pdf_properties(grey)["has_color_pages"] is False
+    revision = extract_pdf_properties(red)
+    assert revision["page_cache"]["reused"] == 0
+    assert revision["has_color_pages"] is True
+
+
+def _full_word_scan(pdf: bytes) -> list[str]:
+    """Rilevamento precedente: tutte le parole della pagina, solo cifre arabe."""
+    out = []
+    with fitz.open(stream=pdf, filetype="pdf") as doc:
+        ref = doc[0].rect
+        for idx, page in enumerate(doc):
+            pos = "missing"
+            for w in page.get_text("words"):
+                if w[4].strip().isdigit() and int(w[4]) == idx + 1:
+                    if w[3] < ref.height - 56:
+                        continue
+                    cx = (w[0] + w[2]) / 2
+                    if abs(cx - ref.width / 2) <= ref.width * 0.15:
+                        pos = "center"
+                    elif cx < ref.width * 0.25:
+                        pos = "left"
+                    elif cx > ref.width * 0.75:
+                        pos = "right"
+                    break
+            out.append(pos)
+    return out
+
+
+@pytest.mark.parametrize("kwargs", CASES.values(), ids=CASES.keys())
+def test_footer_detector_matches_full_word_scan(kwargs):
+    pdf = make_pdf(**kwargs)
+    assert pdf_page_aspects(["page_num_positions"]) == {"footer"}
+    props = extract_pdf_properties(pdf, ["page_num_positions", "page_num_confidence"])
+    assert props["page_num_positions"] == _full_word_scan(pdf)
+    assert len(props["page_num_confidence"]) == kwargs["pages"]
+
+
+@pytest.mark.parametrize(("style", "confidence"), [("arabic", 0.9), ("roman", 0.7), ("label", 1.0)])
+def test_footer_detector_recognises_roman_and_labelled_numbers(style, confidence):
+    pdf = make_pdf(pages=12, page_number_style=style, page_numbers="right")
+    props = extract_pdf_properties(pdf, ["page_num_positions", "page_num_confidence"])
+    assert props["page_num_positions"] == ["right"] * 12
+    assert props["page_num_confidence"] == [confidence] * 12
+
+
+def test_page_numbers_use_each_page_own_size():
+    pdf = make_pdf(pages=4, odd_size_pages=(1,))  # pag. 1 A4, le altre 17×24: footer più in alto
+    props = extract_pdf_properties(pdf, ["page_num_positions", "page_num_confidence"])
+    assert props["page_num_positions"] == ["center"] * 4
+    assert props["page_num_confidence"] == [0.9] * 4
+
+
+def test_sampled_analysis_keeps_exact_geometry_and_bounds_estimates(monkeypatch):
+    from config import settings
+
+    monkeypatch.setattr(settings, "SAMPLE_MIN_PAGES", 20)
+    monkeypatch.setattr(settings, "SAMPLE_EDGE_PAGES", 2)
+    monkeypatch.setattr(settings, "SAMPLE_MIDDLE_PAGES", 6)
+    pdf = make_pdf(pages=30, color_text_every=3, odd_size_pages=(15,))
+    full = extract_pdf_properties(pdf)
+    sampled = extract_pdf_properties(pdf, sample=True)
+
+    for key in ("page_count", "page_size", "margins", "page_num_positions", "inconsistent_pages"):
+        assert sampled[key] == full[key], key
+    report = sampled["sampling"]
+    assert report["total"] == 30 and report["sampled"] < 30
+    true_count = len(full["detailed_analysis"].color_pages)
+    bounds = report["bounds"]["color_pages"]
+    assert bounds["low"] <= true_count <= bounds["high"]
+    assert "sampling" not in full
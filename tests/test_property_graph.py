@@ -0,0 +1,55 @@
+# tests/test_property_graph.py
+"""Grafo di proprietà pigre: solo la chiusura richiesta, una volta sola."""
+import pytest
+
+pytest.importorskip("fastapi")  # import del package services.extract
+
+from services.extract.graph import PropertyGraph
+
+
+def _graph(calls):
+    g = PropertyGraph()
+
+    def load(members):
+        calls.append(("pages", members))
+        return {m: m.upper() for m in members}
+
+    g.batch("pages", ("pages:text", "pages:color"), load)
+    g.node("raw")(lambda: calls.append("raw") or 2)
+    g.node("double", "raw")(lambda raw: calls.append("double") or raw * 2)
+    g.node("text", "pages:text")(lambda t: t.lower())
+    g.node("summary", "double", "text")(lambda d, t: f"{t}:{d}")
+    return g
+
+
+def test_computes_only_the_requested_closure():
+    calls = []
+    g = _graph(calls)
+
+    assert g.compute(["double"]) == {"double": 4}
+    assert calls == ["raw", "double"]
+
+    assert g.compute(["summary", "double"]) == {"summary": "pages:text:4", "double": 4}
+    # il batch carica solo il membro richiesto; raw/double non si ricalcolano
+    assert calls == ["raw", "double", ("pages", frozenset({"pages:text"}))]
+
+
+def test_costs_include_dependencies_and_unknown_names_fail():
+    g = _graph([])
+    g.compute(["summary"])
+    costs = g.costs_ms(["double", "summary"])
+    assert costs["summary"] >= costs["double"] >= 0
+    with pytest.raises(KeyError):
+        g.compute(["nope"])
+
+
+def test_pdf_dependency_table_matches_the_graph():
+    fitz = pytest.importorskip("fitz")
+    from services.extract.pdf import _PAGE_NODES, _PDF_DEPS, _pdf_graph
+
+    doc = fitz.open()
+    doc.new_page()
+    g = _pdf_graph(doc)
+    registered = {n for n in _PDF_DEPS if n in g} | {n for n in _PAGE_NODES if n in g}
+    assert registered == set(_PDF_DEPS) | set(_PAGE_NODES)
+    assert all(dep in g for deps in _PDF_DEPS.values() for dep in deps)
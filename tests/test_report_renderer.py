@@ -0,0 +1,24 @@
+# tests/test_report_renderer.py
+import json
+
+import pytest
+
+pytest.importorskip("reportlab")
+pytest.importorskip("pydantic_settings")
+
+from services.reports.renderer import raw_json_excerpt
+
+
+def test_raw_json_excerpt_is_complete_when_small():
+    raw = {"page_count": 3, "fonts": {"Times": [10.0, 12.0]}}
+    assert raw_json_excerpt(raw, max_bytes=10_000, max_lines=100) == json.dumps(raw, indent=2)
+
+
+def test_raw_json_excerpt_is_bounded_for_huge_props():
+    raw = {"pages": [{"n": i, "text": "x" * 500} for i in range(100_000)]}
+    excerpt = raw_json_excerpt(raw, max_bytes=20_000, max_lines=5_000, width=80)
+
+    lines = excerpt.splitlines()
+    assert len(excerpt.encode()) < 20_000 + 200   # + riga di troncamento
+    assert all(len(line) <= 80 for line in lines[:-1])
+    assert lines[-1].startswith("… troncato")
@@ -0,0 +1,48 @@
+# tests/test_result_cache.py
+import pytest
+
+pytest.importorskip("prometheus_client")
+
+from utils.result_cache import ResultCache
+
+
+def test_memory_tier_evicts_lru_by_bytes():
+    cache = ResultCache("test_lru", max_bytes=10)
+    cache.put("a", b"aaaa")
+    cache.put("b", b"bbbb")
+    assert cache.get("a") == b"aaaa"       # "a" diventa la più recente
+
+    cache.put("c", b"cccc")                # 12 byte > 10 → esce "b"
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.memory_bytes == 8
+
+
+def test_disk_tier_survives_new_instance(tmp_path):
+    ResultCache("test_disk", max_bytes=100, disk_dir=tmp_path).put("k", b"payload")
+
+    fresh = ResultCache("test_disk", max_bytes=100, disk_dir=tmp_path)
+    assert fresh.get("k") == b"payload"
+    assert len(fresh) == 1                 # promossa nel tier in memoria
+
+
+def test_props_key_depends_on_color_tolerance(monkeypatch):
+    pytest.importorskip("fastapi")
+    from config import settings
+    from services.extract.cached import props_cache_key
+
+    before = props_cache_key("abc", "pdf")
+    monkeypatch.setattr(settings, "COLOR_TOLERANCE", settings.COLOR_TOLERANCE + 1)
+    assert props_cache_key("abc", "pdf") != before
+
+
+@pytest.mark.parametrize("name", ["SAMPLE_EDGE_PAGES", "SAMPLE_MIDDLE_PAGES", "SAMPLE_MIN_PAGES"])
+def test_sampled_props_key_depends_on_sample_settings(monkeypatch, name):
+    pytest.importorskip("fastapi")
+    from config import settings
+    from services.extract.cached import props_cache_key
+
+    full, before = props_cache_key("abc", "pdf"), props_cache_key("abc", "pdf", sample=True)
+    monkeypatch.setattr(settings, name, getattr(settings, name) + 1)
+    assert props_cache_key("abc", "pdf", sample=True) != before
+    assert props_cache_key("abc", "pdf") == full
@@ -0,0 +1,100 @@
+# tests/test_sampling.py
+"""Campione stratificato e limiti di confidenza della modalità campione."""
+import pytest
+
+pytest.importorskip("fastapi")
+
+from services.extract.sampling import (
+    StreamSample,
+    count_bounds,
+    scale,
+    stratified_sample,
+    wilson_upper,
+)
+
+
+def test_stratified_sample_is_deterministic_and_keeps_edges():
+    sample = stratified_sample(1000, always=(500, 501), edge=10, middle=50)
+    assert sample == stratified_sample(1000, always=(500, 501), edge=10, middle=50)
+    assert sample == sorted(set(sample))
+    assert set(range(10)) | set(range(990, 1000)) | {500, 501} <= set(sample)
+    assert len([i for i in sample if 10 <= i < 990 and i not in (500, 501)]) <= 50
+
+
+def test_short_documents_are_not_sampled():
+    assert stratified_sample(50, edge=10, middle=50) is None
+
+
+def _stream(total, **kwargs):
+    stream = StreamSample(**kwargs)
+    for i in range(total):
+        stream.add(f"blocco {i}")
+    return stream.finish()
+
+
+def test_stream_sample_keeps_edges_and_only_the_chosen_content(monkeypatch):
+    from config import settings
+
+    monkeypatch.setattr(settings, "SAMPLE_MIN_PAGES", 100)
+    sample, held = _stream(1000, edge=10, middle=20)
+    assert (sample, held) == _stream(1000, edge=10, middle=20)  # deterministico
+    assert list(held) == sample and all(held[i] == f"blocco {i}" for i in sample)
+    assert set(range(10)) | set(range(990, 1000)) <= set(sample)
+    middle = [i for i in sample if 10 <= i < 990]
+    assert 20 <= len(middle) <= 40
+    assert {(i - 10) * 10 // 980 for i in middle} == set(range(10))  # in ogni decimo del mezzo
+
+
+def test_stream_sample_below_min_pages_keeps_everything(monkeypatch):
+    from config import settings
+
+    monkeypatch.setattr(settings, "SAMPLE_MIN_PAGES", 100)
+    sample, held = _stream(99, edge=10, middle=20)
+    assert sample is None and list(held) == list(range(99))
+
+
+def test_bounds_contain_observed_and_widen_with_unsampled_pages():
+    assert wilson_upper(0, 0) == 1.0
+    assert 0.0 < wilson_upper(0, 50) < 0.1
+    sample = list(range(10)) + list(range(990, 1000)) + list(range(100, 900, 16))
+    bounds = count_bounds({3, 200}, sample, 1000, edge=10)
+    assert bounds["observed"] == bounds["low"] == 2
+    assert bounds["high"] > 2
+    assert scale(5, 10, 100) == 50 and scale(5, 0, 100) == 5
+
+
+def test_pdf_bounds_ignore_cached_pages_outside_the_sample():
+    pytest.importorskip("fitz")
+    from services.extract.pdf import _sampling
+
+    sample = list(range(10)) + list(range(990, 1000)) + list(range(100, 900, 16))
+    # pagine fuori campione a colori, dalla cache per pagina: non vanno contate
+    parts = [{"page": i + 1, "is_color": i in (3, 200, 201, 202)} for i in range(1000)]
+    report = _sampling(parts, sample)
+    bounds = count_bounds({3}, sample, 1000)
+    assert report["bounds"]["color_pages"] == bounds
+
+
+def test_pdf_estimates_scale_the_sample_and_add_cached_pages_exactly():
+    pytest.importorskip("fitz")
+    from services.extract.pdf import _image_count, _merge_fonts, _merge_images, _paragraph_count
+
+    sample = set(range(10)) | set(range(990, 1000)) | set(range(100, 900, 16))
+    cached = set(range(200, 300)) - sample          # fuori campione, dalla cache per pagina
+    parts = []
+    for i in range(1000):
+        part: dict = {"page": i + 1}
+        if i in sample:
+            part.update(blocks=2, fonts={"Tiro": {10.0: 4}}, image_sizes=[1024])
+        elif i in cached:
+            part.update(blocks=10, fonts={"Tiro": {10.0: 1}}, image_sizes=[])
+        parts.append(part)
+    missing = 1000 - len(sample) - len(cached)
+
+    assert _paragraph_count(parts, sample) == 10 * len(cached) + scale(2 * len(sample), len(sample), 1000 - len(cached))
+    assert _image_count(parts, sample) == scale(len(sample), len(sample), len(sample) + missing)
+    assert _merge_images(parts, sample).count == _image_count(parts, sample)
+    fonts = _merge_fonts(parts, sample)["Tiro"]
+    assert fonts.size_counts == {10.0: len(cached) + scale(4 * len(sample), len(sample), 1000 - len(cached))}
+    # analisi completa: niente stime
+    assert _paragraph_count([p for p in parts if "blocks" in p], sample) == 2 * len(sample) + 10 * len(cached)
@@ -0,0 +1,46 @@
+# tests/test_tracing.py
+"""Tempi per fase: fasce di pagine, tracce annidate, header Server-Timing."""
+import pytest
+
+pytest.importorskip("prometheus_client")
+pytest.importorskip("starlette")
+pytest.importorskip("pydantic_settings")
+
+from utils.metrics import VALIDATION_STAGE_SECONDS
+from utils.tracing import annotate, page_bucket, span, tracing
+
+
+def test_page_bucket():
+    assert page_bucket(None) == "unknown"
+    assert page_bucket(1) == "1-10"
+    assert page_bucket(11) == "11-50"
+    assert page_bucket(1000) == "201-1000"
+    assert page_bucket(1001) == ">1000"
+
+
+def test_nested_traces_feed_parent_timing_and_histograms():
+    sample = VALIDATION_STAGE_SECONDS.labels(stage="extract", file_format="docx", pages="11-50")
+    before = sample._sum.get()
+
+    with tracing() as request:
+        with span("upload"):
+            pass
+        with tracing("result-1", file_format="docx") as doc:
+            with span("extract"):
+                pass
+            annotate(pages=42)
+        with span("extract"):  # fuori da qualunque documento
+            pass
+
+    assert doc.pages == 42 and doc.file_format == "docx"
+    assert set(request.totals()) == {"upload", "extract"}
+    assert request.totals()["extract"] >= doc.stages["extract"]
+    assert request.server_timing().startswith("extract;dur=")
+    assert "upload;dur=" in request.server_timing()
+    assert sample._sum.get() >= before
+
+
+def test_span_outside_trace_is_a_no_op():
+    with span("validate"):
+        value = 1
+    assert value == 1
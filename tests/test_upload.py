@@ -0,0 +1,34 @@
+# tests/test_upload.py
+import io
+import zipfile
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from utils.upload import sniff_format
+
+
+def _zip(members: dict[str, bytes]) -> io.BytesIO:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in members.items():
+            zf.writestr(name, data)
+    buf.seek(0)
+    return buf
+
+
+@pytest.mark.parametrize("members, expected", [
+    ({"word/document.xml": b"<w:document/>"}, "docx"),
+    ({"mimetype": b"application/vnd.oasis.opendocument.text"}, "odt"),
+    ({"mimetype": b"application/vnd.oasis.opendocument.spreadsheet"}, None),
+])
+def test_sniff_zip_based_formats(members, expected):
+    buf = _zip(members)
+    assert sniff_format(buf.getvalue()[:1024], buf) == expected
+
+
+def test_sniff_ignores_extension_and_reads_magic_bytes():
+    assert sniff_format(b"%PDF-1.7\n...") == "pdf"
+    assert sniff_format(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\0" * 8) == "doc"
+    assert sniff_format(b"MZ\x90\x00 not a document") is None
@@ -31,3 +31,86 @@ def test_validate_page_size_ok():
     assert result["is_valid"] is True
     assert result["validations"]["page_size"] is True
     assert result["validations"]["page_numbers_position"] is True
+
+
+def test_min_page_count_tolerates_declared_count():
+    """Il conteggio dichiarato in app.xml ha una tolleranza, quello reale no."""
+    from services.validation import rules
+
+    spec = DocumentSpec(
+        name="Spec test",
+        page_width_cm=17.0,
+        page_height_cm=24.0,
+        top_margin_cm=0,
+        bottom_margin_cm=0,
+        left_margin_cm=0,
+        right_margin_cm=0,
+        min_page_count=40,
+    )
+
+    assert rules.min_page_count({"page_count": 39, "page_count_method": "app_xml"}, spec) is True
+    assert rules.min_page_count({"page_count": 39, "page_count_method": "pdf_render"}, spec) is False
+    assert rules.min_page_count({"page_count": 30, "page_count_method": "app_xml"}, spec) is False
+
+
+def _spec(**kw):
+    return DocumentSpec(
+        name="Spec test",
+        page_width_cm=17.0,
+        page_height_cm=24.0,
+        top_margin_cm=0,
+        bottom_margin_cm=0,
+        left_margin_cm=0,
+        right_margin_cm=0,
+        **kw,
+    )
+
+
+def test_fail_fast_stops_at_first_failure():
+    """Il formato sbagliato decide l'esito: le regole successive non girano."""
+    probe = {
+        "page_size": {"width_cm": 21.0, "height_cm": 29.7},
+        "margins":   {"top_cm": 0, "bottom_cm": 0, "left_cm": 0, "right_cm": 0},
+        "has_size_inconsistencies": False,
+        "page_count": 120,
+        "page_count_method": "pdf",
+    }
+
+    result = validate_document(probe, _spec(), fail_fast=True, complete=False)
+
+    assert result["is_valid"] is False
+    assert result["validations"] == {"page_size": False}
+    assert "no_color_pages" in result["skipped_rules"]
+    assert len(result["validations"]) + len(result["skipped_rules"]) == 10
+
+
+def test_partial_props_leave_dependent_rules_pending():
+    """Sul solo probe, le regole che leggono proprietà non estratte restano in sospeso."""
+    from services.validation.core import active_dependencies
+
+    probe = {
+        "page_size": {"width_cm": 17.0, "height_cm": 24.0},
+        "margins":   {"top_cm": 0, "bottom_cm": 0, "left_cm": 0, "right_cm": 0},
+        "has_size_inconsistencies": False,
+    }
+
+    result = validate_document(probe, _spec(), fail_fast=True, complete=False)
+
+    assert all(result["validations"].values())
+    assert result["is_valid"] is False  # non ancora dimostrato
+    assert set(result["skipped_rules"]) == {
+        name for name, deps in active_dependencies(_spec()).items() if not deps <= probe.keys()
+    }
+
+
+def test_required_properties_follow_active_rules():
+    """Solo le proprietà lette dalle regole che la spec attiva davvero."""
+    from services.validation import required_properties
+
+    plain = set(required_properties(_spec()))
+    assert {"page_size", "margins", "page_num_positions"} <= plain
+    assert not plain & {"has_toc", "image_count", "has_color_pages", "headers"}
+
+    strict = set(required_properties(_spec(no_images=True, no_color_pages=True, min_page_count=40)))
+    assert {"image_count", "has_color_pages", "has_color_text", "page_count"} <= strict
+    assert "margins" not in required_properties(_spec(), {"layout_service": True})
@@ -0,0 +1,108 @@
+# tests/test_zendesk.py
+"""Client Zendesk contro uno stub HTTP locale (nessuna rete esterna)."""
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("httpx")
+pytest.importorskip("pydantic_settings")
+
+import utils.zendesk as zendesk
+from utils.zendesk import ZendeskClient, ZendeskError, enqueue_ticket, get_ticket_job
+
+
+class _Stub(BaseHTTPRequestHandler):
+    # per path: lista di (status, headers, body) restituiti in sequenza
+    script: dict[str, list[tuple[int, dict, dict]]] = {}
+    seen: list[tuple[str, dict]] = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        path = self.path.split("?")[0]
+        self.seen.append((path, dict(self.headers)))
+        status, headers, body = self.script[path].pop(0)
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        for k, v in {**headers, "Content-Type": "application/json", "Content-Length": str(len(payload))}.items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *_):
+        pass
+
+
+@pytest.fixture
+def stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    _Stub.seen = []
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+def _create(base_url, **kwargs):
+    async def go():
+        client = ZendeskClient(base_url, "agent@example.com", "tok", backoff_base=0.01, **kwargs)
+        try:
+            return await client.create_ticket("Oggetto", "Testo", b"%PDF-1.7", "r.pdf", "cliente@example.com")
+        finally:
+            await client.aclose()
+    return asyncio.run(go())
+
+
+def test_retries_429_and_5xx_then_succeeds(stub):
+    _Stub.script = {
+        "/uploads.json": [(429, {"Retry-After": "0"}, {}), (200, {}, {"upload": {"token": "t1"}})],
+        "/tickets.json": [(503, {}, {}), (201, {}, {"ticket": {"id": 42}})],
+    }
+    assert _create(stub) == 42
+
+    tickets = [h for path, h in _Stub.seen if path == "/tickets.json"]
+    assert len(tickets) == 2
+    # lo stesso Idempotency-Key su ogni tentativo: niente ticket duplicati
+    assert tickets[0]["Idempotency-Key"] == tickets[1]["Idempotency-Key"]
+
+
+def test_client_errors_are_not_retried(stub):
+    _Stub.script = {"/uploads.json": [(422, {}, {"error": "bad"})]}
+    with pytest.raises(ZendeskError) as exc:
+        _create(stub)
+    assert exc.value.status_code == 422
+    assert len(_Stub.seen) == 1
+
+
+def test_gives_up_after_max_retries(stub):
+    _Stub.script = {"/uploads.json": [(500, {}, {})] * 3}
+    with pytest.raises(ZendeskError):
+        _create(stub, max_retries=2)
+    assert len(_Stub.seen) == 3
+
+
+def _job(base_url, monkeypatch, *, wait=True):
+    async def go():
+        monkeypatch.setattr(zendesk, "_client", ZendeskClient(base_url, "agent@example.com", "tok"))
+        job_id = enqueue_ticket("Oggetto", "Testo", b"%PDF-1.7", "r.pdf", "cliente@example.com")
+        task = next(iter(zendesk._tasks))
+        if not wait:
+            await asyncio.sleep(0)  # il job è partito ed è in attesa di Zendesk
+            task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await zendesk._client.aclose()
+        return get_ticket_job(job_id)
+    return asyncio.run(go())
+
+
+def test_unexpected_body_fails_the_job(stub, monkeypatch):
+    _Stub.script = {"/uploads.json": [(200, {}, {"unexpected": True})]}
+    job = _job(stub, monkeypatch)
+    assert job["status"] == "failed"
+    assert "KeyError" in job["error"]
+
+
+def test_cancelled_job_is_not_left_queued(stub, monkeypatch):
+    _Stub.script = {"/uploads.json": [(200, {}, {"upload": {"token": "t1"}})]}
+    assert _job(stub, monkeypatch, wait=False) == {"status": "cancelled"}
@@ -1,45 +1,76 @@
 """
 Wrapper async per la conversione via LibreOffice.
 
-Usa asyncio.to_thread per spostare la system-call in un thread separato,
-lasciando libero l'event-loop di FastAPI.
+Se il pool di istanze persistenti (utils.lo_pool) è attivo la conversione
+viene affidata a lui; altrimenti usa asyncio.to_thread per spostare la
+system-call `soffice` in un thread separato, lasciando libero l'event-loop
+di FastAPI. Sorgente e PDF restano su file (utils.document_source).
+In entrambi i casi una conversione annullata (o scaduta) uccide
+il processo `soffice` che la stava eseguendo.
 """
 
 from __future__ import annotations
 
 import asyncio
+import subprocess
 from typing import Final
 
-from utils.conversion import convert_to_pdf_via_lo
+from utils.conversion import convert_source_to_pdf
+from utils.document_source import DocumentSource
+from utils.lo_pool import get_lo_pool
 
 # Timeout max (secondi) – lo stesso che usiamo nel wrapper sync
 _DEFAULT_TO_THREAD_TIMEOUT: Final[int] = 90
 
 
 async def convert_to_pdf_via_lo_async(
-    src_bytes: bytes,
-    ext: str,
+    source: DocumentSource,
     *,
     timeout: int | None = _DEFAULT_TO_THREAD_TIMEOUT,
-) -> bytes:
+) -> DocumentSource:
     """
-    Versione asincrona di `convert_to_pdf_via_lo`.
+    Versione asincrona di `convert_source_to_pdf`.
 
     Parameters
     ----------
-    src_bytes : bytes
-        Contenuto del file originale.
-    ext : str
-        Estensione (doc, docx, odt).
+    source : DocumentSource
+        File originale (doc, docx, odt), letto dal suo percorso.
     timeout : int | None
-        Massimo tempo di attesa della conversione.
+        Massimo tempo di attesa della conversione (coda del pool inclusa).
 
     Returns
     -------
-    bytes
-        Il PDF risultante.
+    DocumentSource
+        Il PDF risultante, su file: lo chiude il chiamante.
     """
-    return await asyncio.wait_for(
-        asyncio.to_thread(convert_to_pdf_via_lo, src_bytes, ext),
-        timeout=timeout,
-    )
+    pool = get_lo_pool()
+    if pool is not None:
+        return await pool.convert(source, timeout=timeout)
+
+    procs: list[subprocess.Popen] = []
+    try:
+        return await asyncio.wait_for(
+            asyncio.to_thread(convert_source_to_pdf, source, procs.append),
+            timeout=timeout,
+        )
+    except (asyncio.CancelledError, asyncio.TimeoutError):
+        # il thread non si può interrompere: si interrompe soffice
+        for proc in procs:
+            proc.kill()
+        raise
+
+
+async def count_pages_via_lo_async(
+    source: DocumentSource,
+    *,
+    timeout: int | None = _DEFAULT_TO_THREAD_TIMEOUT,
+) -> int | None:
+    """
+    Numero di pagine calcolato dal solo layout di LibreOffice, senza export
+    PDF. Richiede il pool di istanze persistenti: senza pool ritorna None
+    (il chiamante ripiega sulla conversione completa).
+    """
+    pool = get_lo_pool()
+    if pool is None:
+        return None
+    return await pool.page_count(source, timeout=timeout)
@@ -0,0 +1,122 @@
+"""
+Compressione gzip selettiva
+===========================
+Come `GZipMiddleware` di Starlette, ma la decisione si prende sugli header
+della risposta: PDF, immagini, archivi e altri contenuti già compressi (o
+con Content-Encoding già impostato) passano invariati, senza bruciare CPU
+per un guadagno nullo. Anche gli stream SSE passano invariati: gzip li
+tratterrebbe nel buffer.
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+
+from starlette.datastructures import Headers, MutableHeaders
+
+# prefissi di Content-Type da non comprimere
+BINARY_CONTENT_TYPES: tuple[str, ...] = (
+    "application/pdf",
+    "application/zip",
+    "application/gzip",
+    "application/octet-stream",
+    "application/vnd.openxmlformats-officedocument",
+    "application/vnd.oasis.opendocument",
+    "application/msword",
+    "image/",
+    "audio/",
+    "video/",
+    "font/",
+    "text/event-stream",
+)
+
+
+class SelectiveGZipMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 500,
+        compresslevel: int = 6,
+        excluded_types: tuple[str, ...] = BINARY_CONTENT_TYPES,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.excluded_types = excluded_types
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http" and "gzip" in Headers(scope=scope).get("accept-encoding", ""):
+            responder = _GZipResponder(send, self.minimum_size, self.compresslevel, self.excluded_types)
+            await self.app(scope, receive, responder.send)
+            return
+        await self.app(scope, receive, send)
+
+
+class _GZipResponder:
+    def __init__(self, send, minimum_size: int, compresslevel: int, excluded_types: tuple[str, ...]) -> None:
+        self._send = send
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.excluded_types = excluded_types
+        self.start_message: dict | None = None
+        self.passthrough = False
+        self.buffer = io.BytesIO()
+        self.gzip_file: gzip.GzipFile | None = None
+
+    async def send(self, message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            self.passthrough = "content-encoding" in headers or content_type.startswith(self.excluded_types)
+            if self.passthrough:
+                await self._send(message)
+            else:
+                self.start_message = message  # gli header dipendono dal primo body
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.start_message is not None:
+            start, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            if not more_body and len(body) < self.minimum_size:
+                await self._send(start)
+                await self._send(message)
+                self.passthrough = True
+                return
+
+            self.gzip_file = gzip.GzipFile(mode="wb", fileobj=self.buffer, compresslevel=self.compresslevel)
+            headers["Content-Encoding"] = "gzip"
+            headers.add_vary_header("Accept-Encoding")
+            if not more_body:
+                body = self._compress(body, final=True)
+                headers["Content-Length"] = str(len(body))
+                await self._send(start)
+                await self._send({"type": "http.response.body", "body": body})
+                return
+            del headers["Content-Length"]
+            await self._send(start)
+
+        await self._send({
+            "type": "http.response.body",
+            "body": self._compress(body, final=not more_body),
+            "more_body": more_body,
+        })
+
+    def _compress(self, body: bytes, *, final: bool) -> bytes:
+        assert self.gzip_file is not None
+        self.gzip_file.write(body)
+        if final:
+            self.gzip_file.close()
+        else:
+            self.gzip_file.flush()
+        data = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return data
@@ -3,45 +3,67 @@ import io
 import pathlib
 import subprocess
 import tempfile
+import threading
+from collections.abc import Callable
 
 import PyPDF2
 
+from utils.document_source import DocumentSource
+
+# Un profilo LibreOffice per thread: due `soffice` concorrenti sullo stesso
+# profilo si passano la richiesta e uno dei due esce senza convertire.
+_PROFILE_ROOT = pathlib.Path(tempfile.gettempdir()) / "docval-lo-profiles"
+
 
 # ------------------------------------------------------------------ #
-def convert_to_pdf_via_lo(src_bytes: bytes, ext: str) -> bytes:
+def convert_source_to_pdf(
+    source: DocumentSource,
+    on_start: Callable[[subprocess.Popen], None] | None = None,
+) -> DocumentSource:
     """
-    Converte un file (doc, docx, odt) in PDF usando LibreOffice.
-    Restituisce i byte del PDF.
-    
+    Converte un file (doc, docx, odt) in PDF usando LibreOffice, leggendolo
+    dal suo percorso. Restituisce il PDF come nuovo `DocumentSource` (da
+    chiudere a cura del chiamante): nessuno dei due passa dalla memoria.
+
+    `on_start` riceve il processo `soffice` appena avviato: chi abbandona
+    la conversione (es. job annullato) può ucciderlo.
+
     Raises:
         FileNotFoundError: Se LibreOffice non è installato o non è nel PATH
-        subprocess.CalledProcessError: Se la conversione fallisce
+        RuntimeError: Se la conversione fallisce o va in timeout
     """
     try:
         with tempfile.TemporaryDirectory() as tmp:
-            src_path = pathlib.Path(tmp) / f"input.{ext.lower()}"
-            pdf_path = pathlib.Path(tmp) / "input.pdf"
-            src_path.write_bytes(src_bytes)
+            pdf_path = pathlib.Path(tmp) / f"{pathlib.Path(source.path).stem}.pdf"
 
             # LibreOffice deve essere nel PATH
-            result = subprocess.run(
+            proc = subprocess.Popen(
                 [
                     "soffice", "--headless",
+                    f"-env:UserInstallation={(_PROFILE_ROOT / str(threading.get_ident())).as_uri()}",
                     "--convert-to", "pdf",
-                    str(src_path),
-                    "--outdir", str(src_path.parent)
+                    source.path,
+                    "--outdir", tmp
                 ],
-                check=True,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
                 text=True,
-                timeout=30  # timeout di 30 secondi
             )
+            if on_start is not None:
+                on_start(proc)
+            try:
+                _, stderr = proc.communicate(timeout=30)  # timeout di 30 secondi
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.communicate()
+                raise
+            if proc.returncode:
+                raise subprocess.CalledProcessError(proc.returncode, proc.args, stderr=stderr)
             
             if not pdf_path.exists():
-                raise RuntimeError(f"LibreOffice non è riuscito a creare il PDF. Stderr: {result.stderr}")
+                raise RuntimeError(f"LibreOffice non è riuscito a creare il PDF. Stderr: {stderr}")
                 
-            return pdf_path.read_bytes()
+            return DocumentSource.adopt(str(pdf_path), "pdf")
             
     except FileNotFoundError:
         raise FileNotFoundError(
@@ -52,13 +74,23 @@ def convert_to_pdf_via_lo(src_bytes: bytes, ext: str) -> bytes:
     except subprocess.CalledProcessError as e:
         raise RuntimeError(f"Errore durante la conversione LibreOffice: {e.stderr}")
 
+
+def convert_to_pdf_via_lo(
+    src_bytes: bytes,
+    ext: str,
+    on_start: Callable[[subprocess.Popen], None] | None = None,
+) -> bytes:
+    """Come `convert_source_to_pdf`, ma da byte in memoria a byte in memoria."""
+    with DocumentSource.from_bytes(src_bytes, ext) as source, convert_source_to_pdf(source, on_start) as pdf:
+        return pdf.read_bytes()
+
 # ------------------------------------------------------------------ #
-def extract_pdf_page_count(pdf_bytes: bytes) -> int:
+def extract_pdf_page_count(pdf: bytes | str) -> int:
     """
-    Ritorna il numero di pagine di un PDF (byte in memoria).
+    Ritorna il numero di pagine di un PDF (byte in memoria o percorso).
     
     Args:
-        pdf_bytes: I byte del file PDF
+        pdf: I byte del file PDF, oppure il suo percorso
         
     Returns:
         int: Numero di pagine del PDF
@@ -67,6 +99,6 @@ def extract_pdf_page_count(pdf_bytes: bytes) -> int:
         ValueError: Se il file non è un PDF valido
     """
     try:
-        return len(PyPDF2.PdfReader(io.BytesIO(pdf_bytes)).pages)
+        return len(PyPDF2.PdfReader(pdf if isinstance(pdf, str) else io.BytesIO(pdf)).pages)
     except Exception as e:
         raise ValueError(f"File PDF non valido o corrotto: {str(e)}")
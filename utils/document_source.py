@@ -0,0 +1,131 @@
+"""
+Sorgente di un documento su file
+================================
+Gli upload arrivano in uno SpooledTemporaryFile; prima di questo modulo
+venivano letti in un unico `bytes`, passati per valore fino agli estrattori
+(e copiati di nuovo nel pickle verso i worker, in ogni `io.BytesIO`, nel
+file temporaneo per LibreOffice), con il PDF convertito tenuto in memoria
+accanto all'originale.
+
+`DocumentSource` tiene invece il documento in un file temporaneo con
+l'estensione giusta:
+
+• gli estrattori (anche nei processi worker) e LibreOffice lo aprono per
+  percorso: PyMuPDF e zipfile leggono solo ciò che serve
+• `buffer()` espone il contenuto come memoryview su un mmap in sola lettura
+  (controlli sui byte) senza copiarlo nell'heap; `sha256()` legge invece a
+  blocchi, perché le pagine del mmap resterebbero nell'RSS del processo
+• il PDF prodotto da LibreOffice è a sua volta un `DocumentSource`
+
+Il processo che crea la sorgente la chiude (`close()` o `with`): il file
+temporaneo viene cancellato.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import mmap
+import os
+import shutil
+import tempfile
+from collections.abc import Iterator
+from typing import IO, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing_extensions import Self
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class DocumentSource:
+    """Documento su disco, aperto per percorso o come buffer in sola lettura."""
+
+    def __init__(self, path: str, ext: str, *, owned: bool = False) -> None:
+        self.path = path
+        self.ext = ext.lower()
+        self.owned = owned  # file temporaneo da cancellare in `close()`
+
+    # -------------------------------------------------------------
+    # costruzione
+    # -------------------------------------------------------------
+    @staticmethod
+    def _temp_path(ext: str, dir: str | None = None) -> tuple[int, str]:
+        return tempfile.mkstemp(suffix=f".{ext.lower()}", prefix="docval-", dir=dir)
+
+    @classmethod
+    def from_bytes(cls, data: bytes, ext: str) -> DocumentSource:
+        fd, path = cls._temp_path(ext)
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(data)
+        return cls(path, ext, owned=True)
+
+    @classmethod
+    def from_fileobj(cls, fileobj: IO[bytes], ext: str) -> DocumentSource:
+        """Copia a blocchi (mai interamente in memoria) da un file già aperto."""
+        fd, path = cls._temp_path(ext)
+        fileobj.seek(0)
+        with os.fdopen(fd, "wb") as fh:
+            shutil.copyfileobj(fileobj, fh, _CHUNK_SIZE)
+        return cls(path, ext, owned=True)
+
+    @classmethod
+    def adopt(cls, path: str, ext: str) -> DocumentSource:
+        """
+        Prende possesso di un file prodotto altrove (es. il PDF di
+        LibreOffice in una cartella temporanea) spostandolo accanto agli
+        altri: un rename, non una copia, se sono sullo stesso filesystem.
+        """
+        fd, target = cls._temp_path(ext)
+        os.close(fd)
+        shutil.move(path, target)
+        return cls(target, ext, owned=True)
+
+    # -------------------------------------------------------------
+    # accesso
+    # -------------------------------------------------------------
+    @property
+    def size(self) -> int:
+        return os.path.getsize(self.path)
+
+    @contextlib.contextmanager
+    def buffer(self) -> Iterator[memoryview]:
+        """Contenuto come memoryview su mmap (sola lettura), senza copie."""
+        with open(self.path, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                yield memoryview(b"")  # mmap non accetta file vuoti
+                return
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    yield view
+                finally:
+                    view.release()
+
+    def sha256(self) -> str:
+        digest = hashlib.sha256()
+        with open(self.path, "rb") as fh:
+            while chunk := fh.read(_CHUNK_SIZE):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def read_bytes(self) -> bytes:
+        """Copia completa in memoria: solo per chi non sa leggere da file."""
+        with open(self.path, "rb") as fh:
+            return fh.read()
+
+    # -------------------------------------------------------------
+    def close(self) -> None:
+        if self.owned:
+            self.owned = False
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def __repr__(self) -> str:
+        return f"DocumentSource({self.path!r}, {self.ext!r})"
@@ -0,0 +1,182 @@
+"""
+Job di validazione asincroni
+============================
+Un PDF di centinaia di pagine, magari dopo la conversione LibreOffice, può
+superare il timeout dell'ingress: `start_job` avvia il lavoro in background
+e ritorna subito un `JobStatus` con l'id.
+
+• lo stato (fase, pagine analizzate / totali, esito) vive nello store
+  (utils.local_store), quindi è visibile a tutti i worker che condividono
+  il backend
+• `watch_job` segue gli aggiornamenti (stream SSE dell'API)
+• `cancel_job` annulla il task; se il job gira in un altro worker lascia nello
+  store una richiesta di annullamento, che il worker proprietario controlla
+  ogni JOB_POLL_INTERVAL secondi. L'annullamento arriva fino a `soffice` e
+  ai worker di estrazione (utils.async_conversion, services.extract.pool).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from collections.abc import AsyncIterator, Awaitable, Callable
+from datetime import datetime
+
+from fastapi import HTTPException
+
+from config import settings
+from models import JobStatus
+from utils.local_store import get_backend
+from utils.logging import get_logger
+
+log = get_logger("document_validator")
+
+TERMINAL_STATUSES = frozenset({"done", "failed", "cancelled"})
+
+# (fase, pagine analizzate, pagine totali)
+ProgressCallback = Callable[[str, int | None, int | None], None]
+# riceve il callback di avanzamento, ritorna l'id dell'esito salvato
+JobWork = Callable[[ProgressCallback], Awaitable[str]]
+
+_tasks: dict[str, asyncio.Task] = {}
+# un evento per osservatore (watch_job), rimosso quando l'osservatore esce
+_waiters: dict[str, set[asyncio.Event]] = {}
+
+
+# ------------------------------------------------------------------ #
+# stato nello store
+# ------------------------------------------------------------------ #
+def _save(job: JobStatus) -> None:
+    job.updated_at = datetime.utcnow()
+    get_backend().set(f"job:{job.id}", job.model_dump_json().encode(), settings.STORE_TTL_SECONDS)
+    for event in _waiters.get(job.id, ()):
+        event.set()
+
+
+def get_job(job_id: str) -> JobStatus | None:
+    """Stato corrente del job, None se l'id non esiste o è scaduto."""
+    raw = get_backend().get(f"job:{job_id}")
+    return JobStatus.model_validate_json(raw) if raw is not None else None
+
+
+def _progress(job: JobStatus) -> ProgressCallback:
+    def update(stage: str, done: int | None = None, total: int | None = None) -> None:
+        job.stage = stage
+        if total is not None:
+            job.pages_done, job.pages_total = done, total
+        _save(job)
+
+    return update
+
+
+# ------------------------------------------------------------------ #
+# esecuzione
+# ------------------------------------------------------------------ #
+async def _watch_cancel(job_id: str, task: asyncio.Task) -> None:
+    """Annullamento chiesto da un altro worker (backend condiviso)."""
+    key = f"job_cancel:{job_id}"
+    while True:
+        await asyncio.sleep(settings.JOB_POLL_INTERVAL)
+        if get_backend().get(key) is not None:
+            task.cancel()
+            return
+
+
+async def _run(job: JobStatus, work: JobWork) -> None:
+    job.status = "running"
+    _save(job)
+    watcher = asyncio.create_task(_watch_cancel(job.id, asyncio.current_task()))
+    try:
+        job.result_id = await work(_progress(job))
+    except asyncio.CancelledError:
+        job.status = "cancelled"
+        log.info("job_cancelled", job_id=job.id, stage=job.stage)
+    except HTTPException as he:
+        job.status, job.error, job.status_code = "failed", str(he.detail), he.status_code
+    except Exception as ex:  # noqa: BLE001
+        log.error("job_failed", job_id=job.id, error=str(ex))
+        job.status, job.error, job.status_code = "failed", "Errore interno", 500
+    else:
+        job.status = "done"
+        log.info("job_done", job_id=job.id, result_id=job.result_id)
+    finally:
+        watcher.cancel()
+        get_backend().delete(f"job_cancel:{job.id}")
+        _save(job)
+
+
+def _finished(job_id: str, task: asyncio.Task) -> None:
+    _tasks.pop(job_id, None)
+    if task.cancelled():
+        # annullato prima ancora di partire: `_run` non ha scritto nulla
+        job = get_job(job_id)
+        if job is not None and job.status not in TERMINAL_STATUSES:
+            job.status = "cancelled"
+            _save(job)
+
+
+def start_job(document_name: str, work: JobWork) -> JobStatus:
+    """Pianifica `work` nell'event-loop corrente e ritorna lo stato iniziale."""
+    job = JobStatus(document_name=document_name)
+    _save(job)
+    task = asyncio.get_running_loop().create_task(_run(job, work))
+    _tasks[job.id] = task
+    task.add_done_callback(lambda t: _finished(job.id, t))
+    return job.model_copy()
+
+
+def cancel_job(job_id: str) -> JobStatus | None:
+    """
+    Chiede l'annullamento e ritorna lo stato corrente (None se il job non
+    esiste): il passaggio a "cancelled" avviene appena il lavoro si ferma.
+    """
+    job = get_job(job_id)
+    if job is None or job.status in TERMINAL_STATUSES:
+        return job
+    task = _tasks.get(job_id)
+    if task is not None:
+        task.cancel()
+    else:
+        get_backend().set(f"job_cancel:{job_id}", b"1", settings.STORE_TTL_SECONDS)
+    return job
+
+
+async def watch_job(job_id: str) -> AsyncIterator[JobStatus | None]:
+    """
+    Lo stato del job a ogni cambiamento, fino a uno stato finale; None dopo
+    JOB_POLL_INTERVAL secondi senza novità (il chiamante può mandare un
+    keep-alive). Gli aggiornamenti del processo corrente arrivano subito,
+    quelli degli altri worker al controllo periodico.
+    """
+    last: JobStatus | None = None
+    changed = asyncio.Event()
+    _waiters.setdefault(job_id, set()).add(changed)
+    try:
+        while True:
+            changed.clear()
+            job = get_job(job_id)
+            if job is None:
+                return
+            if job != last:
+                last = job
+                yield job
+                if job.status in TERMINAL_STATUSES:
+                    return
+            else:
+                yield None
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(changed.wait(), settings.JOB_POLL_INTERVAL)
+    finally:
+        waiters = _waiters.get(job_id, set())
+        waiters.discard(changed)
+        if not waiters:
+            _waiters.pop(job_id, None)
+
+
+async def shutdown_jobs(grace: float = 5.0) -> None:
+    """Da registrare sullo shutdown: annulla i job in corso (stato "cancelled")."""
+    tasks = list(_tasks.values())
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        await asyncio.wait(tasks, timeout=grace)
@@ -0,0 +1,392 @@
+"""
+utils.lo_pool
+=============
+Pool di istanze LibreOffice headless *persistenti*, pilotate via UNO su
+socket locale, al posto di un `soffice` avviato a ogni conversione.
+
+• ogni istanza ha il proprio profilo (`-env:UserInstallation`), quindi
+  conversioni concorrenti non si pestano i piedi
+• health-check all'uscita dalla coda e periodico sulle istanze inattive
+• riciclo dopo LO_POOL_MAX_CONVERSIONS conversioni o oltre LO_POOL_MAX_RSS_MB
+• coda con backpressure: oltre LO_POOL_MAX_QUEUE richieste in attesa
+  → PoolSaturatedError (l'API risponde 503)
+
+Richiede il binding Python `uno` (pacchetto `python3-uno` / quello fornito
+da LibreOffice). Se non è importabile `get_lo_pool()` ritorna None e si
+torna al vecchio percorso "un processo per conversione".
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import os
+import pathlib
+import shutil
+import signal
+import socket
+import subprocess
+import tempfile
+import time
+from collections.abc import AsyncIterator, Callable
+from typing import Any, TypeVar
+
+from config import settings
+from utils.document_source import DocumentSource
+from utils.logging import get_logger
+
+try:
+    import uno  # type: ignore[import-not-found]
+    from com.sun.star.beans import PropertyValue  # type: ignore[import-not-found]
+except ImportError:
+    uno = None  # type: ignore[assignment]
+    PropertyValue = None  # type: ignore[assignment,misc]
+
+log = get_logger("document_validator")
+
+_STARTUP_TIMEOUT = 30.0      # s per l'avvio di un'istanza
+_HEALTH_INTERVAL = 60.0      # s tra due health-check delle istanze inattive
+
+_T = TypeVar("_T")
+
+
+class LibreOfficePoolError(RuntimeError):
+    """Errore generico del pool LibreOffice."""
+
+
+class PoolSaturatedError(LibreOfficePoolError):
+    """Troppe conversioni in attesa: la richiesta viene rifiutata."""
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _process_tree(pid: int) -> list[int]:
+    """pid + discendenti (soffice è uno script che lancia soffice.bin)."""
+    pids, i = [pid], 0
+    while i < len(pids):
+        for task in pathlib.Path(f"/proc/{pids[i]}/task").glob("*/children"):
+            with contextlib.suppress(OSError):
+                pids.extend(int(c) for c in task.read_text().split())
+        i += 1
+    return pids
+
+
+def _prop(name: str, value: Any) -> Any:
+    p = PropertyValue()
+    p.Name, p.Value = name, value
+    return p
+
+
+# ------------------------------------------------------------------ #
+# singola istanza soffice
+# ------------------------------------------------------------------ #
+class _Instance:
+    def __init__(self, index: int, port: int | None, root: pathlib.Path) -> None:
+        self.index = index
+        self.fixed_port = port
+        self.port = 0
+        self.profile = root / f"profile_{index}"
+        self.proc: subprocess.Popen[bytes] | None = None
+        self.desktop: Any = None
+        self.conversions = 0
+
+    # ---- ciclo di vita (bloccante: chiamare da thread) ------------
+    def start(self) -> None:
+        self.port = self.fixed_port or _free_port()
+        self.proc = subprocess.Popen(
+            [
+                "soffice",
+                "--headless", "--invisible", "--nologo", "--nodefault",
+                "--norestore", "--nolockcheck",
+                f"-env:UserInstallation={self.profile.as_uri()}",
+                f"--accept=socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,  # process group: stop() uccide anche soffice.bin
+        )
+        local_ctx = uno.getComponentContext()
+        resolver = local_ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_ctx
+        )
+        url = f"uno:socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext"
+        deadline = time.monotonic() + _STARTUP_TIMEOUT
+        while True:
+            try:
+                ctx = resolver.resolve(url)
+                break
+            except Exception:
+                if self.proc.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise LibreOfficePoolError(f"Avvio istanza LibreOffice #{self.index} fallito")
+                time.sleep(0.25)
+        self.desktop = ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+        self.conversions = 0
+        log.info("lo_instance_started", index=self.index, port=self.port, pid=self.proc.pid)
+
+    def stop(self) -> None:
+        self.desktop = None
+        if self.proc is not None:
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(self.proc.pid, signal.SIGKILL)
+            self.proc.wait(timeout=10)
+        self.proc = None
+
+    def restart(self) -> None:
+        self.stop()
+        self.start()
+
+    # ---- stato ----------------------------------------------------
+    def rss_mb(self) -> float | None:
+        """Memoria residente dell'albero di processi (solo Linux, da /proc)."""
+        if self.proc is None or not pathlib.Path("/proc").is_dir():
+            return None
+        kb = 0
+        for pid in _process_tree(self.proc.pid):
+            with contextlib.suppress(OSError):
+                for line in pathlib.Path(f"/proc/{pid}/status").read_text().splitlines():
+                    if line.startswith("VmRSS:"):
+                        kb += int(line.split()[1])
+        return kb / 1024
+
+    def healthy(self) -> bool:
+        if self.proc is None or self.proc.poll() is not None or self.desktop is None:
+            return False
+        try:
+            self.desktop.getFrames()  # round-trip sul bridge UNO
+            return True
+        except Exception:
+            return False
+
+    def needs_recycle(self, max_conversions: int, max_rss_mb: float) -> bool:
+        if max_conversions and self.conversions >= max_conversions:
+            return True
+        rss = self.rss_mb()
+        return bool(max_rss_mb and rss is not None and rss > max_rss_mb)
+
+    # ---- operazioni sul documento ---------------------------------
+    def _load(self, src_path: pathlib.Path) -> Any:
+        doc = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(str(src_path)),
+            "_blank",
+            0,
+            (_prop("Hidden", True), _prop("ReadOnly", True)),
+        )
+        if doc is None:
+            raise LibreOfficePoolError("LibreOffice non è riuscito ad aprire il documento.")
+        return doc
+
+    def convert(self, src_path: pathlib.Path, pdf_path: pathlib.Path) -> None:
+        doc = self._load(src_path)
+        try:
+            doc.storeToURL(
+                uno.systemPathToFileUrl(str(pdf_path)),
+                (_prop("FilterName", "writer_pdf_Export"),),
+            )
+        finally:
+            doc.close(True)
+        self.conversions += 1
+
+    def page_count(self, src_path: pathlib.Path) -> int:
+        """Pagine secondo il layout di Writer, senza renderizzare il PDF."""
+        doc = self._load(src_path)
+        try:
+            return int(doc.getCurrentController().getPropertyValue("PageCount"))
+        finally:
+            doc.close(True)
+            self.conversions += 1
+
+
+# ------------------------------------------------------------------ #
+# pool
+# ------------------------------------------------------------------ #
+class LibreOfficePool:
+    def __init__(
+        self,
+        size: int,
+        *,
+        base_port: int = 0,
+        max_conversions: int = 200,
+        max_rss_mb: float = 1024,
+        max_queue: int = 16,
+    ) -> None:
+        self.size = size
+        self.base_port = base_port
+        self.max_conversions = max_conversions
+        self.max_rss_mb = max_rss_mb
+        self.max_queue = max_queue
+        self._root = pathlib.Path(tempfile.mkdtemp(prefix="docval-lo-"))
+        self._instances: list[_Instance] = []
+        self._idle: asyncio.Queue[_Instance] | None = None
+        self._waiting = 0
+        self._start_lock = asyncio.Lock()
+        self._health_task: asyncio.Task[None] | None = None
+
+    # -------------------------------------------------------------
+    async def start(self) -> None:
+        await self._ensure_started()
+
+    async def _ensure_started(self) -> asyncio.Queue[_Instance]:
+        async with self._start_lock:
+            if self._idle is None:
+                self._instances = [
+                    _Instance(i, self.base_port + i if self.base_port else None, self._root)
+                    for i in range(self.size)
+                ]
+                try:
+                    await asyncio.gather(*(asyncio.to_thread(i.start) for i in self._instances))
+                except Exception:
+                    await asyncio.gather(*(asyncio.to_thread(i.stop) for i in self._instances))
+                    raise
+                idle: asyncio.Queue[_Instance] = asyncio.Queue()
+                for inst in self._instances:
+                    idle.put_nowait(inst)
+                self._idle = idle
+                self._health_task = asyncio.create_task(self._health_loop())
+            return self._idle
+
+    async def _health_loop(self) -> None:
+        """Controlla periodicamente le istanze inattive e riavvia quelle morte."""
+        while True:
+            await asyncio.sleep(_HEALTH_INTERVAL)
+            assert self._idle is not None
+            for _ in range(self._idle.qsize()):
+                inst = self._idle.get_nowait()
+                try:
+                    if not await asyncio.to_thread(inst.healthy):
+                        log.warning("lo_instance_unhealthy", index=inst.index)
+                        await asyncio.to_thread(inst.restart)
+                except LibreOfficePoolError as e:
+                    log.error("lo_instance_restart_failed", index=inst.index, error=str(e))
+                finally:
+                    self._idle.put_nowait(inst)
+
+    # -------------------------------------------------------------
+    @staticmethod
+    def _deadline(timeout: float | None) -> float | None:
+        """Scadenza unica (tempo del loop) per attesa in coda + chiamata."""
+        return None if timeout is None else asyncio.get_running_loop().time() + timeout
+
+    @staticmethod
+    def _remaining(deadline: float | None) -> float | None:
+        if deadline is None:
+            return None
+        return max(0.0, deadline - asyncio.get_running_loop().time())
+
+    @contextlib.asynccontextmanager
+    async def _checkout(self, deadline: float | None) -> AsyncIterator[_Instance]:
+        """Prende in prestito un'istanza sana (attende in coda se occupate)."""
+        idle = await self._ensure_started()
+        if self._waiting >= self.max_queue:
+            raise PoolSaturatedError("Troppe conversioni in coda, riprova più tardi.")
+
+        self._waiting += 1
+        try:
+            inst = await asyncio.wait_for(idle.get(), self._remaining(deadline))
+        finally:
+            self._waiting -= 1
+
+        try:
+            if not await asyncio.to_thread(inst.healthy):
+                log.warning("lo_instance_unhealthy", index=inst.index)
+                await asyncio.to_thread(inst.restart)
+            yield inst
+            if inst.needs_recycle(self.max_conversions, self.max_rss_mb):
+                log.info("lo_instance_recycle", index=inst.index, conversions=inst.conversions, rss_mb=inst.rss_mb())
+                await asyncio.to_thread(inst.restart)
+        finally:
+            idle.put_nowait(inst)
+
+    async def _call(self, inst: _Instance, fn: Callable[..., _T], *args: Any, deadline: float | None) -> _T:
+        timeout = self._remaining(deadline)
+        if timeout == 0:
+            raise asyncio.TimeoutError  # scaduto in coda: la chiamata non parte nemmeno
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(fn, *args), timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            # l'unico modo di interrompere una chiamata UNO è uccidere soffice;
+            # vale anche per l'annullamento: l'istanza torna libera solo a
+            # chiamata davvero finita
+            await asyncio.shield(asyncio.to_thread(inst.restart))
+            raise
+
+    async def convert(self, source: DocumentSource, *, timeout: float | None = None) -> DocumentSource:
+        """
+        Converte in PDF su un'istanza libera; il PDF resta su file.
+        `timeout` copre attesa in coda e conversione insieme.
+        """
+        deadline = self._deadline(timeout)
+        async with self._checkout(deadline) as inst:
+            with tempfile.TemporaryDirectory(dir=self._root) as tmp:
+                pdf_path = pathlib.Path(tmp) / "output.pdf"
+                await self._call(inst, inst.convert, pathlib.Path(source.path), pdf_path, deadline=deadline)
+                if not pdf_path.exists():
+                    raise LibreOfficePoolError("LibreOffice non è riuscito a creare il PDF.")
+                return DocumentSource.adopt(str(pdf_path), "pdf")
+
+    async def page_count(self, source: DocumentSource, *, timeout: float | None = None) -> int:
+        """Numero di pagine dal solo layout (niente export PDF)."""
+        deadline = self._deadline(timeout)
+        async with self._checkout(deadline) as inst:
+            return await self._call(inst, inst.page_count, pathlib.Path(source.path), deadline=deadline)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": self.size,
+            "idle": self._idle.qsize() if self._idle else 0,
+            "waiting": self._waiting,
+        }
+
+    async def shutdown(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._health_task
+        await asyncio.gather(*(asyncio.to_thread(i.stop) for i in self._instances))
+        shutil.rmtree(self._root, ignore_errors=True)
+
+
+# ------------------------------------------------------------------ #
+# istanza di processo (lazy)
+# ------------------------------------------------------------------ #
+_pool: LibreOfficePool | None = None
+
+
+def get_lo_pool() -> LibreOfficePool | None:
+    """Pool condiviso, o None se disabilitato (LO_POOL_SIZE=0) o senza `uno`."""
+    global _pool
+    if _pool is None and settings.LO_POOL_SIZE > 0:
+        if uno is None:
+            return None
+        _pool = LibreOfficePool(
+            settings.LO_POOL_SIZE,
+            base_port=settings.LO_POOL_BASE_PORT,
+            max_conversions=settings.LO_POOL_MAX_CONVERSIONS,
+            max_rss_mb=settings.LO_POOL_MAX_RSS_MB,
+            max_queue=settings.LO_POOL_MAX_QUEUE,
+        )
+        log.info("lo_pool_enabled", size=settings.LO_POOL_SIZE, pid=os.getpid())
+    return _pool
+
+
+async def start_lo_pool() -> None:
+    """Avvia le istanze in anticipo (startup dell'app), se il pool è attivo."""
+    pool = get_lo_pool()
+    if pool is not None:
+        try:
+            await pool.start()
+        except LibreOfficePoolError as e:
+            # non blocca l'avvio: si riproverà alla prima conversione
+            log.error("lo_pool_start_failed", error=str(e))
+
+
+async def shutdown_lo_pool() -> None:
+    """Da registrare sullo shutdown dell'app FastAPI."""
+    global _pool
+    if _pool is not None:
+        await _pool.shutdown()
+        _pool = None
@@ -1,28 +1,230 @@
 # utils/local_store.py
 """
-Mini-store in-memory: ora thread-safe.
-Se in futuro userai Redis o un DB potrai rimuovere il lock.
+Store degli esiti di validazione
+================================
+Le voci (ValidationResult + DocumentSpec) vengono serializzate in JSON e
+affidate a un backend intercambiabile, scelto con STORE_BACKEND:
+
+• memory  — in-process, LRU + TTL con budget in byte (default)
+• sqlite  — file condiviso: più worker uvicorn sullo stesso host vedono
+            gli stessi validation_id
+• redis   — qualunque server compatibile Redis (TTL nativo; il tetto di
+            memoria è la `maxmemory` del server, con policy allkeys-lru)
+
+L'API pubblica resta save_result / get_entry.
 """
-from threading import Lock  # 👈 nuovo
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
 from typing import TypedDict
 
+from config import settings
 from models import DocumentSpec, ValidationResult
 
+try:
+    import redis
+except ImportError:
+    redis = None
+
 
 class _Entry(TypedDict):
     result: ValidationResult
     spec:   DocumentSpec
 
-_storage: dict[str, _Entry] = {}
-_lock = Lock()                                # 👈 nuovo
+
+# ------------------------------------------------------------------ #
+# backend
+# ------------------------------------------------------------------ #
+class StoreBackend(ABC):
+    """Key-value di byte con scadenza."""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes, ttl: float) -> None: ...
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+
+class MemoryBackend(StoreBackend):
+    """Dict ordinato in RAM: scadenza TTL + eviction LRU oltre `max_bytes`."""
+
+    _SWEEP_EVERY = 60.0  # s tra due pulizie complete delle voci scadute
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._bytes = 0
+        self._lock = Lock()
+        self._last_sweep = time.monotonic()
+
+    def _drop(self, key: str) -> None:
+        _, value = self._data.pop(key)
+        self._bytes -= len(value)
+
+    def _sweep(self, now: float) -> None:
+        for key in [k for k, (exp, _) in self._data.items() if exp <= now]:
+            self._drop(key)
+        self._last_sweep = now
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (now + ttl, value)
+            self._bytes += len(value)
+            if now - self._last_sweep > self._SWEEP_EVERY or self._bytes > self.max_bytes:
+                self._sweep(now)
+            while self._bytes > self.max_bytes and len(self._data) > 1:
+                self._drop(next(iter(self._data)))  # la meno usata di recente
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            if item[0] <= time.monotonic():
+                self._drop(key)
+                return None
+            self._data.move_to_end(key)
+            return item[1]
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+class SQLiteBackend(StoreBackend):
+    """Tabella key-value su file (WAL): condivisa tra processi dello stesso host."""
+
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        self._db = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS store ("
+            " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS store_accessed ON store(accessed_at)")
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO store VALUES (?, ?, ?, ?)", (key, value, now + ttl, now)
+            )
+            self._db.execute("DELETE FROM store WHERE expires_at <= ?", (now,))
+            (total,) = self._db.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM store").fetchone()
+            if total > self.max_bytes:
+                # elimina le voci meno usate finché il totale rientra nel budget:
+                # una riga cade se i byte già liberati prima di lei non bastano
+                self._db.execute(
+                    "DELETE FROM store WHERE key IN ("
+                    " SELECT key FROM ("
+                    "  SELECT key, LENGTH(value) AS size,"
+                    "         SUM(LENGTH(value)) OVER (ORDER BY accessed_at, key) AS running"
+                    "  FROM store WHERE key != ?)"
+                    " WHERE running - size < ?)",
+                    (key, total - self.max_bytes),
+                )
+
+    def get(self, key: str) -> bytes | None:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM store WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE store SET accessed_at = ? WHERE key = ?", (now, key))
+            return bytes(row[0])
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM store WHERE key = ?", (key,))
+
+
+class RedisBackend(StoreBackend):
+    """Server compatibile Redis; richiede il pacchetto `redis`."""
+
+    def __init__(self, url: str, prefix: str = "docval:") -> None:
+        if redis is None:
+            raise RuntimeError("STORE_BACKEND=redis richiede il pacchetto 'redis' (pip install redis).")
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._client.set(self._prefix + key, value, ex=max(1, int(ttl)))
+
+    def get(self, key: str) -> bytes | None:
+        return self._client.get(self._prefix + key)
+
+    def delete(self, key: str) -> None:
+        self._client.delete(self._prefix + key)
+
+
+def _make_backend() -> StoreBackend:
+    kind = settings.STORE_BACKEND.lower()
+    if kind == "memory":
+        return MemoryBackend(settings.STORE_MAX_BYTES)
+    if kind == "sqlite":
+        return SQLiteBackend(settings.STORE_SQLITE_PATH, settings.STORE_MAX_BYTES)
+    if kind == "redis":
+        return RedisBackend(settings.STORE_REDIS_URL)
+    raise ValueError(f"STORE_BACKEND sconosciuto: {settings.STORE_BACKEND}")
+
+
+_backend: StoreBackend | None = None
+_backend_lock = Lock()
+
+
+def get_backend() -> StoreBackend:
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            _backend = _make_backend()
+        return _backend
+
 
 # --------------------------------------------------------------- #
 def save_result(result: ValidationResult, spec: DocumentSpec) -> None:
     """Salva (o sovrascrive) l’esito di una validazione."""
-    with _lock:                               # 👈 protezione
-        _storage[result.id] = {"result": result, "spec": spec}
+    payload = json.dumps(
+        {"result": result.model_dump(mode="json"), "spec": spec.model_dump(mode="json")},
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+    get_backend().set(f"result:{result.id}", payload, settings.STORE_TTL_SECONDS)
+
+
+def has_entry(result_id: str) -> bool:
+    """True se l’esito esiste ancora (senza deserializzarlo)."""
+    return get_backend().get(f"result:{result_id}") is not None
+
 
 def get_entry(result_id: str) -> _Entry | None:
-    """Recupera risultato + spec; None se l’id non esiste."""
-    with _lock:                               # 👈 protezione
-        return _storage.get(result_id)
+    """Recupera risultato + spec; None se l’id non esiste o è scaduto."""
+    payload = get_backend().get(f"result:{result_id}")
+    if payload is None:
+        return None
+    data = json.loads(payload)
+    return {
+        "result": ValidationResult.model_validate(data["result"]),
+        "spec": DocumentSpec.model_validate(data["spec"]),
+    }
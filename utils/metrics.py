@@ -4,7 +4,7 @@ utils.metrics
 Definisce metriche custom Prometheus.
 """
 
-from prometheus_client import Counter
+from prometheus_client import Counter, Gauge, Histogram
 
 # Totale validazioni raggruppate per esito
 VALIDATION_RESULT = Counter(
@@ -12,3 +12,31 @@ VALIDATION_RESULT = Counter(
     "Conteggio validazioni documento per esito",
     ["status"],          # label: ok | ko | error
 )
+
+# Cache risultati di estrazione (utils.result_cache)
+RESULT_CACHE_EVENTS = Counter(
+    "result_cache_events_total",
+    "Eventi della cache dei risultati di estrazione",
+    ["cache", "tier", "event"],   # tier: memory | disk — event: hit | miss | eviction
+)
+
+RESULT_CACHE_BYTES = Gauge(
+    "result_cache_bytes",
+    "Byte occupati dalla cache dei risultati di estrazione",
+    ["cache", "tier"],
+)
+
+# Pagine PDF riusate dalla cache per pagina (services.extract.page_cache)
+PDF_PAGE_CACHE_PAGES = Counter(
+    "pdf_page_cache_pages_total",
+    "Pagine PDF prese dalla cache per pagina o rianalizzate",
+    ["outcome"],         # label: reused | analysed
+)
+
+# Durata delle fasi della pipeline di validazione (utils.tracing)
+VALIDATION_STAGE_SECONDS = Histogram(
+    "validation_stage_seconds",
+    "Durata delle fasi di validazione documento",
+    ["stage", "file_format", "pages"],   # pages: fascia di page_count (1-10, 11-50, …)
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300),
+)
@@ -0,0 +1,149 @@
+"""
+utils.result_cache
+==================
+Cache content-addressed a due livelli per valori già serializzati (bytes):
+• memoria: LRU con contabilità in byte (max_bytes)
+• disco (opzionale): un file per chiave sotto `disk_dir`, potato per mtime
+  oltre `disk_max_bytes`
+
+Le chiavi sono stringhe opache; per i risultati di estrazione vedi
+`services.extract.cached`. Hit / miss / eviction finiscono in
+`utils.metrics.RESULT_CACHE_EVENTS`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import pathlib
+import tempfile
+from collections import OrderedDict
+from threading import Lock
+
+from utils.metrics import RESULT_CACHE_BYTES, RESULT_CACHE_EVENTS
+
+
+class ResultCache:
+    def __init__(
+        self,
+        name: str,
+        max_bytes: int,
+        *,
+        disk_dir: str | os.PathLike[str] | None = None,
+        disk_max_bytes: int = 0,
+    ) -> None:
+        self.name = name
+        self.max_bytes = max_bytes
+        self._mem: OrderedDict[str, bytes] = OrderedDict()
+        self._mem_bytes = 0
+        self._lock = Lock()
+
+        self.disk_dir = pathlib.Path(disk_dir) / name if disk_dir else None
+        self.disk_max_bytes = disk_max_bytes
+        self._disk_bytes = 0
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+            self._disk_bytes = sum(p.stat().st_size for p in self.disk_dir.glob("*/*"))
+            RESULT_CACHE_BYTES.labels(cache=self.name, tier="disk").set(self._disk_bytes)
+
+    # -------------------------------------------------------------
+    def _event(self, tier: str, event: str, n: int = 1) -> None:
+        RESULT_CACHE_EVENTS.labels(cache=self.name, tier=tier, event=event).inc(n)
+
+    def _disk_path(self, key: str) -> pathlib.Path:
+        assert self.disk_dir is not None
+        h = hashlib.sha256(key.encode()).hexdigest()
+        return self.disk_dir / h[:2] / h
+
+    # ---------------- memoria ------------------------------------
+    def _mem_put(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return  # troppo grande per il tier in memoria
+        old = self._mem.pop(key, None)
+        if old is not None:
+            self._mem_bytes -= len(old)
+        self._mem[key] = value
+        self._mem_bytes += len(value)
+        evicted = 0
+        while self._mem_bytes > self.max_bytes:
+            _, dropped = self._mem.popitem(last=False)
+            self._mem_bytes -= len(dropped)
+            evicted += 1
+        if evicted:
+            self._event("memory", "eviction", evicted)
+        RESULT_CACHE_BYTES.labels(cache=self.name, tier="memory").set(self._mem_bytes)
+
+    # ---------------- disco --------------------------------------
+    def _disk_get(self, key: str) -> bytes | None:
+        path = self._disk_path(key)
+        try:
+            value = path.read_bytes()
+        except OSError:
+            return None
+        os.utime(path)  # "usato di recente" per la potatura
+        return value
+
+    def _disk_put(self, key: str, value: bytes) -> None:
+        path = self._disk_path(key)
+        path.parent.mkdir(exist_ok=True)
+        if path.exists():
+            self._disk_bytes -= path.stat().st_size
+        # scrittura atomica: mai un file a metà visibile a un altro worker
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "wb") as fh:
+            fh.write(value)
+        os.replace(tmp, path)
+        self._disk_bytes += len(value)
+        if self.disk_max_bytes and self._disk_bytes > self.disk_max_bytes:
+            self._prune_disk()
+        RESULT_CACHE_BYTES.labels(cache=self.name, tier="disk").set(self._disk_bytes)
+
+    def _prune_disk(self) -> None:
+        """Elimina i file meno recenti fino a scendere al 90% del budget."""
+        assert self.disk_dir is not None
+        files = sorted(
+            ((p.stat().st_mtime, p.stat().st_size, p) for p in self.disk_dir.glob("*/*") if not p.name.startswith(".")),
+            key=lambda t: t[0],
+        )
+        total = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, p in files:
+            if total <= self.disk_max_bytes * 0.9:
+                break
+            p.unlink(missing_ok=True)
+            total -= size
+            evicted += 1
+        self._disk_bytes = total
+        if evicted:
+            self._event("disk", "eviction", evicted)
+
+    # ---------------- API pubblica -------------------------------
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            value = self._mem.get(key)
+            if value is not None:
+                self._mem.move_to_end(key)
+                self._event("memory", "hit")
+                return value
+            self._event("memory", "miss")
+
+            if self.disk_dir is None:
+                return None
+            value = self._disk_get(key)
+            self._event("disk", "hit" if value is not None else "miss")
+            if value is not None:
+                self._mem_put(key, value)  # promozione nel tier veloce
+            return value
+
+    def put(self, key: str, value: bytes) -> None:
+        with self._lock:
+            self._mem_put(key, value)
+            if self.disk_dir is not None:
+                self._disk_put(key, value)
+
+    def __len__(self) -> int:
+        return len(self._mem)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self._mem_bytes
@@ -0,0 +1,177 @@
+"""
+Tempi per fase della pipeline di validazione
+============================================
+Una *traccia* raccoglie la durata delle fasi (upload, conversione,
+estrazione, validazione, salvataggio, report) di un'operazione:
+
+    with tracing(result_id, file_format="pdf"):
+        with span("extract"):
+            ...
+
+• ogni `span` chiuso produce un evento di log strutturato `span` con l'id
+  della traccia (per le validazioni è l'id dell'esito)
+• alla chiusura della traccia le durate finiscono nell'istogramma
+  Prometheus `validation_stage_seconds`, con etichette formato file e fascia
+  di page_count (`annotate` le imposta appena sono note)
+• `ServerTimingMiddleware` apre una traccia per ogni richiesta /api e, con
+  SERVER_TIMING attivo, ne espone le fasi nell'header `Server-Timing`
+  (incluse quelle delle tracce annidate, es. i file di un batch)
+
+La traccia corrente vive in una ContextVar: i task asyncio e
+`asyncio.to_thread` la ereditano, il codice intermedio non deve passarla.
+`span` fuori da una traccia non misura nulla.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import time
+import uuid
+from collections.abc import Iterator
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from starlette.datastructures import MutableHeaders
+
+from config import settings
+from utils.logging import get_logger
+from utils.metrics import VALIDATION_STAGE_SECONDS
+
+log = get_logger("document_validator")
+
+# limiti superiori delle fasce di page_count
+_PAGE_BUCKETS = (10, 50, 200, 1000)
+
+
+def page_bucket(pages: int | None) -> str:
+    """Fascia di page_count per le etichette: bassa cardinalità."""
+    if not pages or pages < 0:
+        return "unknown"
+    low = 1
+    for high in _PAGE_BUCKETS:
+        if pages <= high:
+            return f"{low}-{high}"
+        low = high + 1
+    return f">{_PAGE_BUCKETS[-1]}"
+
+
+@dataclass
+class Trace:
+    id: str
+    file_format: str = "unknown"
+    pages: int | None = None
+    parent: Trace | None = None
+    stages: dict[str, float] = field(default_factory=dict)  # s, span propri
+    nested: dict[str, float] = field(default_factory=dict)  # s, tracce figlie
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def totals(self) -> dict[str, float]:
+        totals = dict(self.nested)
+        for stage, seconds in self.stages.items():
+            totals[stage] = totals.get(stage, 0.0) + seconds
+        return totals
+
+    def server_timing(self) -> str:
+        """Valore dell'header Server-Timing (durate in ms)."""
+        return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in self.totals().items())
+
+
+_current: ContextVar[Trace | None] = ContextVar("validation_trace", default=None)
+
+
+def current_trace() -> Trace | None:
+    return _current.get()
+
+
+def annotate(*, file_format: str | None = None, pages: int | None = None) -> None:
+    """Etichette della traccia corrente, appena note."""
+    trace = _current.get()
+    if trace is None:
+        return
+    if file_format:
+        trace.file_format = file_format.lower()
+    if pages:
+        trace.pages = pages
+
+
+def _finish(trace: Trace) -> None:
+    labels = {"file_format": trace.file_format, "pages": page_bucket(trace.pages)}
+    for stage, seconds in trace.stages.items():
+        VALIDATION_STAGE_SECONDS.labels(stage=stage, **labels).observe(seconds)
+    if trace.parent is not None:
+        for stage, seconds in trace.totals().items():
+            trace.parent.nested[stage] = trace.parent.nested.get(stage, 0.0) + seconds
+
+
+@contextlib.contextmanager
+def tracing(trace_id: str | None = None, *, file_format: str | None = None) -> Iterator[Trace]:
+    """Nuova traccia (figlia di quella corrente, se c'è) per la durata del blocco."""
+    parent = _current.get()
+    trace = Trace(trace_id or uuid.uuid4().hex, parent=parent)
+    if file_format:
+        trace.file_format = file_format.lower()
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        _finish(trace)
+
+
+@contextlib.contextmanager
+def span(stage: str) -> Iterator[None]:
+    """Misura il blocco come fase `stage` della traccia corrente."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    failed = False
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        trace.add(stage, seconds)
+        log.info(
+            "span",
+            trace_id=trace.id,
+            stage=stage,
+            duration_ms=round(seconds * 1000, 3),
+            file_format=trace.file_format,
+            failed=failed,
+        )
+
+
+# ------------------------------------------------------------------ #
+# middleware ASGI: una traccia per richiesta + header Server-Timing
+# ------------------------------------------------------------------ #
+class ServerTimingMiddleware:
+    """
+    Traccia ogni richiesta sotto `path_prefix`. L'header viene scritto
+    all'inizio della risposta: per le risposte in streaming contiene solo
+    le fasi concluse fino a quel momento.
+    """
+
+    def __init__(self, app, path_prefix: str = "/api/") -> None:
+        self.app = app
+        self.path_prefix = path_prefix
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        with tracing() as trace:
+            async def timed_send(message) -> None:
+                if message["type"] == "http.response.start" and settings.SERVER_TIMING:
+                    value = trace.server_timing()
+                    if value:
+                        MutableHeaders(scope=message).append("Server-Timing", value)
+                await send(message)
+
+            await self.app(scope, receive, timed_send)
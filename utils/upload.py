@@ -0,0 +1,246 @@
+"""
+Ingestione in streaming degli upload
+====================================
+• `BodySizeLimitMiddleware` rifiuta con 413 le richieste troppo grandi prima
+  che il parser multipart le scriva per intero: subito se lo dice il
+  Content-Length, altrimenti appena i byte ricevuti superano il limite.
+• `ingest_upload` rilegge l'UploadFile a blocchi: verifica la dimensione,
+  calcola lo SHA-256 (chiave della cache di estrazione) e riconosce il formato
+  dai magic byte invece che dall'estensione del nome file.
+
+Starlette conserva già il file in uno SpooledTemporaryFile (RAM fino a 1 MB,
+poi disco): qui non lo si copia mai interamente in memoria.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import hashlib
+import json
+import shutil
+import tempfile
+import zipfile
+from dataclasses import dataclass, replace
+from typing import IO
+
+from fastapi import HTTPException, UploadFile, status
+
+from utils.document_source import DocumentSource
+from utils.logging import get_logger
+
+log = get_logger("document_validator")
+
+_CHUNK_SIZE = 1024 * 1024
+_HEAD_BYTES = 1024                    # %PDF- può stare ovunque nel primo KB
+_FORM_OVERHEAD = 1024 * 1024          # testo ordine + framing multipart
+_SPOOL_IN_MEMORY = 1024 * 1024        # come Starlette: oltre 1 MB su disco
+
+_OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+_ZIP_MAGIC = b"PK\x03\x04"
+_ODT_MIMETYPE = b"application/vnd.oasis.opendocument.text"
+
+
+def _too_large(max_size: int) -> HTTPException:
+    max_mb = max_size // (1024 * 1024)
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"File troppo grande: massimo {max_mb} MB.",
+    )
+
+
+# ------------------------------------------------------------------ #
+# middleware ASGI: limite sul corpo della richiesta
+# ------------------------------------------------------------------ #
+class _BodyTooLarge(Exception):
+    pass
+
+
+class BodySizeLimitMiddleware:
+    """
+    Limita il corpo delle richieste sotto `path_prefix` a `max_file_size`
+    più un margine per i campi del form; `path_limits` assegna a singoli
+    path un limite diverso (es. gli upload batch).
+    """
+
+    def __init__(
+        self,
+        app,
+        max_file_size: int,
+        path_prefix: str = "/api/",
+        path_limits: dict[str, int] | None = None,
+    ) -> None:
+        self.app = app
+        self.max_file_size = max_file_size
+        self.path_prefix = path_prefix
+        self.path_limits = path_limits or {}
+
+    async def _reject(self, send, limit: int) -> None:
+        body = json.dumps({"detail": _too_large(limit).detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.path_limits.get(scope["path"], self.max_file_size)
+        max_body = limit + _FORM_OVERHEAD
+
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > max_body:
+            await self._reject(send, limit)
+            return
+
+        received = 0
+        exceeded = started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_body:
+                    exceeded = True
+                    raise _BodyTooLarge
+            return message
+
+        async def guarded_send(message) -> None:
+            nonlocal started
+            if exceeded:
+                return  # la risposta d'errore dell'app lascia il posto al 413
+            started = True
+            await send(message)
+
+        with contextlib.suppress(_BodyTooLarge):
+            await self.app(scope, limited_receive, guarded_send)
+        if exceeded and not started:
+            await self._reject(send, limit)
+
+
+# ------------------------------------------------------------------ #
+# riconoscimento del formato
+# ------------------------------------------------------------------ #
+def sniff_format(head: bytes, fileobj: IO[bytes] | None = None) -> str | None:
+    """
+    Formato reale dai magic byte: pdf | docx | odt | doc, None se ignoto.
+    Per gli zip serve `fileobj` (seekable) per guardare dentro l'archivio.
+    """
+    if b"%PDF-" in head[:_HEAD_BYTES]:
+        return "pdf"
+    if head.startswith(_OLE_MAGIC):
+        return "doc"
+    if head.startswith(_ZIP_MAGIC) and fileobj is not None:
+        try:
+            fileobj.seek(0)
+            with zipfile.ZipFile(fileobj) as zf:
+                names = set(zf.namelist())
+                if "word/document.xml" in names:
+                    return "docx"
+                if "mimetype" in names and zf.read("mimetype").strip() == _ODT_MIMETYPE:
+                    return "odt"
+        except zipfile.BadZipFile:
+            return None
+    return None
+
+
+# ------------------------------------------------------------------ #
+# ingestione
+# ------------------------------------------------------------------ #
+@dataclass(frozen=True)
+class IngestedUpload:
+    filename: str
+    file_format: str
+    sha256: str
+    size: int
+    upload: UploadFile
+
+    async def source(self) -> DocumentSource:
+        """
+        Contenuto su file temporaneo, copiato a blocchi dallo spool
+        dell'upload: gli estrattori lo aprono per percorso. Da chiudere.
+        """
+        return await asyncio.to_thread(DocumentSource.from_fileobj, self.upload.file, self.file_format)
+
+
+async def ingest_upload(
+    file: UploadFile,
+    max_size: int,
+    *,
+    chunk_size: int = _CHUNK_SIZE,
+) -> IngestedUpload:
+    """
+    Legge l'upload a blocchi: 413 appena supera `max_size`, 400 se il nome
+    manca o il formato non è riconoscibile.
+    """
+    if not file.filename:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Nome file non specificato.",
+        )
+    if file.size is not None and file.size > max_size:
+        raise _too_large(max_size)
+
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    await file.seek(0)
+    while chunk := await file.read(chunk_size):
+        size += len(chunk)
+        if size > max_size:
+            raise _too_large(max_size)
+        if len(head) < _HEAD_BYTES:
+            head += chunk[: _HEAD_BYTES - len(head)]
+        digest.update(chunk)
+
+    ext = file.filename.rsplit(".", 1)[-1].lower() if "." in file.filename else ""
+    fmt = await asyncio.to_thread(sniff_format, head, file.file)
+    if fmt is None and ext == "doc" and head.lstrip().startswith(b"{\\rtf"):
+        fmt = "doc"  # RTF salvato come .doc: LibreOffice lo converte comunque
+    if fmt is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Formato file non riconosciuto: sono accettati PDF, DOCX, DOC e ODT.",
+        )
+    if fmt != ext:
+        log.warning("upload_extension_mismatch", filename=file.filename, sniffed=fmt)
+
+    return IngestedUpload(
+        filename=file.filename,
+        file_format=fmt,
+        sha256=digest.hexdigest(),
+        size=size,
+        upload=file,
+    )
+
+
+def _copy_to_spool(src: IO[bytes]) -> IO[bytes]:
+    spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_IN_MEMORY)  # noqa: SIM115 – lo chiude il chiamante
+    try:
+        src.seek(0)
+        shutil.copyfileobj(src, spool, _CHUNK_SIZE)
+        spool.seek(0)
+    except BaseException:
+        spool.close()
+        raise
+    return spool
+
+
+async def detach_upload(ingested: IngestedUpload) -> IngestedUpload:
+    """
+    Copia l'upload in uno spool proprio: FastAPI chiude gli UploadFile del
+    form al ritorno dell'endpoint, quindi chi li usa dopo (risposte in
+    streaming, job in background) deve staccarsene. Il chiamante chiude la
+    copia con `ingested.upload.close()`.
+    """
+    spool = await asyncio.to_thread(_copy_to_spool, ingested.upload.file)
+    return replace(ingested, upload=UploadFile(spool, size=ingested.size, filename=ingested.filename))
@@ -0,0 +1,243 @@
+"""
+Client Zendesk asincrono
+========================
+• un solo `httpx.AsyncClient` per processo (connessioni riusate, limiti
+  e timeout espliciti)
+• retry con backoff esponenziale + jitter su 429/5xx ed errori di rete,
+  rispettando `Retry-After`
+• la creazione del ticket usa un `Idempotency-Key`: un retry dopo un
+  timeout non apre un secondo ticket
+• `enqueue_ticket` crea il ticket in background e ritorna subito un job id;
+  lo stato del job vive nello store (utils.local_store), così è visibile a
+  tutti i worker che condividono il backend.
+
+ZENDESK_BASE_URL permette di puntare il client a uno stub locale nei test.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import uuid
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import httpx
+
+from config import settings
+from utils.local_store import get_backend
+from utils.logging import get_logger
+
+log = get_logger("document_validator")
+
+_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_JOB_TTL = 24 * 3600  # s: per quanto resta consultabile lo stato di un job
+
+
+class ZendeskError(Exception):
+    """Risposta non valida da Zendesk (dopo gli eventuali retry)."""
+
+    def __init__(self, message: str, status_code: int | None = None) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    """Secondi indicati da `Retry-After` (intero o data HTTP), None se assente."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class ZendeskClient:
+    def __init__(
+        self,
+        base_url: str,
+        email: str,
+        api_token: str,
+        *,
+        timeout: float = 10.0,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        max_connections: int = 10,
+    ) -> None:
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            auth=(f"{email}/token", api_token),
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        )
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    # -------------------------------------------------------------
+    def _backoff(self, attempt: int, response: httpx.Response | None) -> float:
+        hinted = _retry_after(response) if response is not None else None
+        if hinted is not None:
+            return min(hinted, self.backoff_max)
+        # "full jitter": i retry di più richieste non si sincronizzano
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        for attempt in range(self.max_retries + 1):
+            response: httpx.Response | None = None
+            try:
+                response = await self._client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == self.max_retries:
+                    raise ZendeskError(f"Zendesk non raggiungibile: {e}") from e
+                log.warning("zendesk_retry", url=url, attempt=attempt + 1, error=str(e))
+            else:
+                if response.status_code < 400:
+                    return response
+                if response.status_code not in _RETRY_STATUSES or attempt == self.max_retries:
+                    raise ZendeskError(
+                        f"Errore Zendesk {response.status_code}", status_code=response.status_code
+                    )
+                log.warning("zendesk_retry", url=url, attempt=attempt + 1, status=response.status_code)
+            await asyncio.sleep(self._backoff(attempt, response))
+        raise AssertionError("unreachable")  # pragma: no cover
+
+    # -------------------------------------------------------------
+    async def upload(self, pdf_bytes: bytes, pdf_name: str) -> str:
+        """Carica l’allegato (uploads.json) → upload_token."""
+        response = await self._request(
+            "POST",
+            "/uploads.json",
+            params={"filename": pdf_name},
+            content=pdf_bytes,
+            headers={"Content-Type": "application/pdf"},
+        )
+        return response.json()["upload"]["token"]
+
+    async def create_ticket(
+        self,
+        subject: str,
+        body: str,
+        pdf_bytes: bytes,
+        pdf_name: str,
+        requester_email: str,
+    ) -> int:
+        """
+        • carica l’allegato (uploads.json)  → upload_token
+        • crea il ticket (tickets.json)     → id ticket
+
+        Il requester è l’e-mail del cliente: riceverà la notifica come
+        vero mittente.
+        """
+        upload_token = await self.upload(pdf_bytes, pdf_name)
+        ticket_data = {
+            "ticket": {
+                "subject": subject,
+                "requester": {"name": requester_email.split("@")[0], "email": requester_email},
+                "comment": {"body": body, "uploads": [upload_token], "public": True},
+            }
+        }
+        response = await self._request(
+            "POST",
+            "/tickets.json",
+            json=ticket_data,
+            headers={"Idempotency-Key": str(uuid.uuid4())},
+        )
+        return response.json()["ticket"]["id"]
+
+
+# ------------------------------------------------------------------ #
+# istanza di processo (lazy)
+# ------------------------------------------------------------------ #
+_client: ZendeskClient | None = None
+
+
+def get_zendesk_client() -> ZendeskClient:
+    global _client
+    if _client is None:
+        s = settings
+        if not (s.ZENDESK_EMAIL and s.ZENDESK_API_TOKEN and (s.ZENDESK_BASE_URL or s.ZENDESK_SUBDOMAIN)):
+            raise ZendeskError("Zendesk non configurato")
+        _client = ZendeskClient(
+            s.ZENDESK_BASE_URL or f"https://{s.ZENDESK_SUBDOMAIN}.zendesk.com/api/v2",
+            s.ZENDESK_EMAIL,
+            s.ZENDESK_API_TOKEN,
+            timeout=s.ZENDESK_TIMEOUT,
+            max_retries=s.ZENDESK_MAX_RETRIES,
+        )
+    return _client
+
+
+# ------------------------------------------------------------------ #
+# invio in background
+# ------------------------------------------------------------------ #
+_tasks: set[asyncio.Task] = set()
+
+
+def _save_job(job_id: str, **state: Any) -> None:
+    get_backend().set(f"zendesk_job:{job_id}", json.dumps(state).encode(), _JOB_TTL)
+
+
+def get_ticket_job(job_id: str) -> dict[str, Any] | None:
+    """Stato di un job: {"status": queued|done|failed|cancelled, "ticket_id"?, "error"?}."""
+    raw = get_backend().get(f"zendesk_job:{job_id}")
+    return json.loads(raw) if raw is not None else None
+
+
+async def _run_job(job_id: str, args: tuple) -> None:
+    try:
+        ticket_id = await get_zendesk_client().create_ticket(*args)
+    except ZendeskError as e:
+        log.error("zendesk_job_failed", job_id=job_id, error=str(e))
+        _save_job(job_id, status="failed", error=str(e))
+    except asyncio.CancelledError:
+        # shutdown oltre il periodo di grazia: il job non resta "queued" per sempre
+        log.warning("zendesk_job_cancelled", job_id=job_id)
+        _save_job(job_id, status="cancelled")
+        raise
+    except Exception as e:  # noqa: BLE001 – risposta inattesa (JSON non valido, chiavi mancanti…)
+        log.exception("zendesk_job_failed", job_id=job_id)
+        _save_job(job_id, status="failed", error=f"Risposta Zendesk inattesa: {type(e).__name__}: {e}")
+    else:
+        log.info("zendesk_job_done", job_id=job_id, ticket_id=ticket_id)
+        _save_job(job_id, status="done", ticket_id=ticket_id)
+
+
+def enqueue_ticket(
+    subject: str,
+    body: str,
+    pdf_bytes: bytes,
+    pdf_name: str,
+    requester_email: str,
+) -> str:
+    """Pianifica `create_ticket` nell'event-loop corrente e ritorna il job id."""
+    job_id = str(uuid.uuid4())
+    _save_job(job_id, status="queued")
+    task = asyncio.get_running_loop().create_task(
+        _run_job(job_id, (subject, body, pdf_bytes, pdf_name, requester_email))
+    )
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job_id
+
+
+async def close_zendesk_client(grace: float = 10.0) -> None:
+    """Da registrare sullo shutdown: attende i job in corso, poi chiude le connessioni."""
+    global _client
+    if _tasks:
+        await asyncio.wait(list(_tasks), timeout=grace)
+    if _client is not None:
+        await _client.aclose()
+        _client = None